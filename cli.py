@@ -1,11 +1,12 @@
 # Module for the command line interface
 # Time complexities for this module are largely user-driven
-import itertools
 from datetime import date
+from data_structures.package_index import PackageIndex
+from models.package import Package
 import utils
 
 
-def control(truck_list, package_lists, package_hash):
+def control(truck_list, package_lists, package_hash, package_index=None):
     """
     Main control for the CLI.
 
@@ -14,12 +15,13 @@ def control(truck_list, package_lists, package_hash):
     until the user chooses to exit.
 
     :param list[Truck] truck_list: list of truck objects
-    :param list[list[str]] package_lists: list of lists of package ids (i.e. delayed and priority lists)
-    :param ChainingHashTable[str, Package] package_hash: ChainingHashTable of package objects
+    :param list[list[str]] package_lists: list of lists of package ids (i.e. delayed and pending packages)
+    :param PackageStore package_hash: the PackageStore of package objects
+    :param PackageIndex package_index: the secondary indexes of the package objects, built on the first search if None
     :return:
     """
     user_exit = False
-    max_choice = 6
+    max_choice = 8
     min_choice = 1
     choice = 0
 
@@ -35,7 +37,9 @@ def control(truck_list, package_lists, package_hash):
             print('3. Final Package Info (all)')
             print('4. Package Time Snapshot (single)')
             print('5. Package Time Snapshot (all)')
-            print('6. Exit')
+            print('6. Package Search')
+            print('7. Truck Positions')
+            print('8. Exit')
             print()
 
             try:
@@ -65,10 +69,18 @@ def control(truck_list, package_lists, package_hash):
             time = get_user_time()
             print_all_snapshots(time, package_hash)
         elif choice == 6:
+            if package_index is None:
+                package_index = PackageIndex(package_hash)  # O(n log n)
+            search_packages(package_hash, package_index)
+        elif choice == 7:
+            time = get_user_time()
+            print()
+            print_truck_positions(time, truck_list, package_hash)
+        elif choice == 8:
             print('Goodbye.')
             user_exit = True
 
-        if choice != 6:
+        if choice != 8:
             print()
             input('Press Enter to return to Main Menu...')
             print()
@@ -88,18 +100,18 @@ def print_final_statistics(truck_list, package_lists):
         print(f'Truck {truck.id}: \n\tfinished @ {str(truck.time)}\n\ttraveled {truck.distance} miles')
 
     print(f'Total Distance: {sum([truck.distance for truck in truck_list])}')
-    print(f'Packages left: {len(list(itertools.chain(*package_lists)))}')
+    print(f'Packages left: {sum(len(package_list) for package_list in package_lists)}')
 
 
 def print_all_packages(package_hash):
     """
     Prints all packages in their final state, in ascending package id order.
 
-    :param ChainingHashTable[str, Package] package_hash: Chaining hash table of Package objects
+    :param PackageStore package_hash: PackageStore of Package objects
     :return:
     """
-    for index in range(len(package_hash)):
-        print_package(index + 1, package_hash)
+    for pkg in sorted_packages(package_hash):
+        print(pkg)
         print()
 
 
@@ -108,7 +120,7 @@ def print_package(id, package_hash):
     Prints a specific package in its final state
 
     :param str id: the id of the package
-    :param ChainingHashTable[str, Package] package_hash: ChainingHashTable of Package objects
+    :param PackageStore package_hash: PackageStore of Package objects
     :return:
     """
     print(package_hash.lookup(str(id)))
@@ -119,32 +131,120 @@ def print_all_snapshots(time, package_hash):
     Prints all packages in the state they were in at a specific time.
 
     :param datetime.time time: the time for the snapshots
-    :param ChainingHashTable[str, Package] package_hash: ChainingHashTable of Package objects
+    :param PackageStore package_hash: PackageStore of Package objects
     :return:
     """
-    for index in range(len(package_hash)):
-        print_snapshot(index + 1, time, package_hash)
+    for pkg in sorted_packages(package_hash):
+        pkg.print_snapshot(time)
         print()
 
 
+def print_truck_positions(time, truck_list, package_hash):
+    """
+    Prints where every truck was at a specific time and how many miles it had driven.
+
+    :param datetime.time time: the time
+    :param list[Truck] truck_list: the list of truck objects
+    :param PackageStore package_hash: PackageStore of Package objects
+    :return:
+    """
+    # Time complexity O(n) to name the locations, O(log n) per truck
+    addresses = dict(zip(package_hash.location_ids, package_hash.addresses))  # location id -> address
+    hubs = {truck.hub for truck in truck_list}
+    seconds = utils.time_to_seconds(time)
+
+    def name(location):
+        return 'the hub' if location in hubs else addresses.get(location, f'location {location}')
+
+    print(f'*** Truck positions at {utils.time_str(time, utils.TIME_FORMAT)} ***')
+
+    for truck in truck_list:
+        location, next_location, miles = truck.position_at(seconds)  # O(log n)
+
+        if next_location is None:
+            print(f'Truck {truck.id}: at {name(location)}, {miles:.1f} miles driven')
+        else:
+            print(f'Truck {truck.id}: driving from {name(location)} to {name(next_location)}, {miles:.1f} miles driven')
+
+
+def sorted_packages(package_hash):
+    """
+    Gets every package in ascending package id order, from a single pass over the packages.
+
+    :param PackageStore package_hash: PackageStore of Package objects
+    :return: the packages
+    :rtype: list[Package]
+    """
+    # Time complexity O(n log n)
+    return sorted(package_hash.values(), key=lambda pkg: (len(pkg.id), pkg.id))
+
+
 def print_snapshot(id, time, package_hash):
     """
     Prints a specific package in the state it was in at a specific time.
 
     :param datetime.time time: the time for the snapshot
-    :param ChainingHashTable[str, Package] package_hash: ChainingHashTable of Package objects
+    :param PackageStore package_hash: PackageStore of Package objects
     :return:
     """
     package_hash.lookup(str(id)).print_snapshot(time)
 
 
-def get_user_time():
+def search_packages(package_hash, package_index):
+    """
+    Prompts the user for search criteria and prints every package that matches all of them.
+
+    :param PackageStore package_hash: PackageStore of Package objects
+    :param PackageIndex package_index: the secondary indexes of the package objects
+    :return:
+    """
+    print('Leave a criterion blank to match any value.')
+    zipcode = input('\nZip: ').strip() or None
+    due_by = get_user_time(allow_blank=True)
+    status = get_user_choice('Status', Package.STATUSES)
+    truck = input('\nTruck: ').strip()
+    print()
+
+    pkg_ids = package_index.query(zipcode=zipcode, status=status, truck=int(truck) if truck.isdigit() else None,
+                                  due_by=due_by)
+
+    for pkg in package_hash.lookup_many(pkg_ids):
+        print(pkg)
+        print()
+
+    print(f'{len(pkg_ids)} package(s) found.')
+
+
+def get_user_choice(name, choices):
+    """
+    Prompt the user to pick one of a list of choices, or none of them.
+
+    If an invalid entry is given, the prompt is repeated until a valid entry is given.
+
+    :param str name: the name of what is being chosen
+    :param tuple[str] choices: the choices
+    :return: the chosen value, None if the entry was blank
+    :rtype: str
+    """
+    while True:
+        entry = input(f'\n{name} ({", ".join(f"{i + 1}. {c}" for i, c in enumerate(choices))}): ').strip()
+
+        if entry == '':
+            return None
+        elif entry.isdigit() and 1 <= int(entry) <= len(choices):
+            return choices[int(entry) - 1]
+
+        print(f'ERROR Must enter a number between 1 and {len(choices)}.')
+
+
+def get_user_time(allow_blank=False):
     """
     Prompt the user for a time in the correct format.
 
     If an invalid entry is given, the prompt is repeated until a valid entry is given.
 
-    :return: the user-given time
+    :param bool allow_blank: if True, a blank entry is accepted
+    :return: the user-given time, None if the entry was blank and blank entries are allowed
     :rtype: datetime.time
     """
     final_time = None
@@ -152,6 +252,9 @@ def get_user_time():
     while not final_time:
         user_time = input('\nPlease enter a time in the format HH:MM AM/PM: ')
 
+        if allow_blank and user_time.strip() == '':
+            return None
+
         try:
             final_time = utils.str_to_time(user_time, utils.TIME_FORMAT)
         except ValueError:
@@ -0,0 +1,137 @@
+# Module for clustering packages into truck-sized groups before they are routed
+# Packages are grouped into stops, stops holding siblings are kept together, and the groups are clustered with a
+# capacitated k-medoids over the distance matrix. Each cluster is at most a full truck load, so routing a truck only
+# has to consider the packages of its cluster.
+from models.stop import Stop
+
+KMEDOIDS_ITERATIONS = 10  # most rounds of assignment and medoid updates
+
+
+def units(pkg_ids, package_hash, capacity):
+    """
+    Groups packages into the units that are clustered.
+
+    Packages at the same location form a stop, and a stop with more packages than a truck holds is split into
+    truck-sized stops, most urgent packages first. Stops holding siblings of each other are joined, so siblings always
+    end up in the same cluster.
+
+    :param list[str] pkg_ids: the ids of the packages
+    :param PackageStore package_hash: the Package objects
+    :param int capacity: the most packages a truck holds
+    :return: the units, each a list of stops
+    :rtype: list[list[Stop]]
+    """
+    # Time complexity O(n log n)
+    pkgs = dict(zip(pkg_ids, package_hash.lookup_many(pkg_ids)))  # O(n)
+    stops = list()
+
+    for stop in Stop.group(pkg_ids, package_hash):  # O(n log n)
+        if len(stop) <= capacity:
+            stops.append(stop)
+            continue
+
+        by_deadline = sorted(stop.pkg_ids, key=lambda pkg_id: pkgs[pkg_id].deadline)
+        for i in range(0, len(by_deadline), capacity):
+            stops.append(Stop(stop.location_id))
+            for pkg_id in by_deadline[i:i + capacity]:
+                stops[-1].add(pkg_id, pkgs[pkg_id].deadline)
+
+    stop_of = {pkg_id: i for i, stop in enumerate(stops) for pkg_id in stop.pkg_ids}
+    parent = list(range(len(stops)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for pkg_id, pkg in pkgs.items():  # O(n)
+        for sibling in pkg.siblings:
+            if sibling in stop_of:
+                parent[find(stop_of[sibling])] = find(stop_of[pkg_id])
+
+    groups = dict()  # root stop -> unit
+    for i, stop in enumerate(stops):  # O(n)
+        groups.setdefault(find(i), list()).append(stop)
+
+    return list(groups.values())
+
+
+def unit_size(unit):
+    """
+    Gets the number of packages in a unit.
+
+    :param list[Stop] unit: the unit
+    :return: the number of packages
+    :rtype: int
+    """
+    # Time complexity O(1) per stop
+    return sum(len(stop) for stop in unit)
+
+
+def k_medoids(unit_list, matrix, capacities, start, pinned=None):
+    """
+    Clusters units into one cluster per truck with a capacitated k-medoids.
+
+    Medoids start at the unit with the earliest deadline, then each next medoid is the unit farthest from those already
+    chosen, picking among the units with the earliest deadline while there are enough of them. Each round assigns the
+    units, earliest deadline first and then nearest first, to the nearest medoid with room, and then moves each medoid
+    to the unit with the least total distance to its cluster. Units that fit in no cluster are left out, to be loaded on
+    a later trip.
+
+    :param list[list[Stop]] unit_list: the units to cluster
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[int] capacities: the most packages in each cluster
+    :param int start: the location id the trucks start from, used to break ties between the first medoids
+    :param list[int] pinned: the only cluster each unit may join, None for any cluster
+    :return: the clusters in the same order as the capacities, each a list of units
+    :rtype: list[list[list[Stop]]]
+    """
+    # Time complexity O(i * n*k + n^2/k) for i iterations, n units and k clusters
+    k = len(capacities)
+    clusters = [list() for _ in range(k)]
+
+    if len(unit_list) == 0 or k == 0:
+        return clusters
+
+    pinned = pinned or [None] * len(unit_list)
+    sizes = [unit_size(unit) for unit in unit_list]
+    deadlines = [min(stop.deadline for stop in unit) for unit in unit_list]
+    locs = [unit[0].location_id for unit in unit_list]
+
+    # Farthest-first medoids among the most urgent units
+    by_urgency = sorted(range(len(unit_list)), key=lambda u: (deadlines[u], matrix[start][locs[u]]))
+    urgent = [u for u in by_urgency if deadlines[u] < deadlines[by_urgency[-1]]]
+    seeds = urgent if len(urgent) >= k else by_urgency
+    medoids = [seeds[0]]
+    nearest = [matrix[locs[seeds[0]]][locs[u]] for u in seeds]  # distance from each seed to its nearest medoid
+    while len(medoids) < min(k, len(seeds)):  # O(n*k)
+        far = max(range(len(seeds)), key=lambda i: nearest[i])
+        medoids.append(seeds[far])
+        nearest = [min(d, matrix[locs[seeds[far]]][locs[u]]) for d, u in zip(nearest, seeds)]
+    medoids += [medoids[-1]] * (k - len(medoids))
+
+    for _ in range(KMEDOIDS_ITERATIONS):  # O(i * n*k)
+        # Assign the most urgent units first, each to the nearest medoid with room
+        distances = [[matrix[locs[m]][loc] for m in medoids] for loc in locs]  # O(n*k)
+        order = sorted(range(len(unit_list)), key=lambda u: (deadlines[u], min(distances[u])))
+        loads = [0] * k
+        members = [list() for _ in range(k)]
+
+        for u in order:  # O(n*k)
+            fits = [c for c in range(k) if loads[c] + sizes[u] <= capacities[c] and pinned[u] in (None, c)]
+            if len(fits) > 0:
+                c = min(fits, key=lambda c: distances[u][c])
+                members[c].append(u)
+                loads[c] += sizes[u]
+
+        # Move each medoid to the unit with the least total distance to the rest of its cluster
+        new_medoids = [min(group, key=lambda m: sum(matrix[locs[m]][locs[u]] * sizes[u] for u in group))
+                       if len(group) > 0 else medoids[c] for c, group in enumerate(members)]  # O(n^2/k)
+
+        clusters = [[unit_list[u] for u in group] for group in members]
+        if new_medoids == medoids:
+            break
+        medoids = new_medoids
+
+    return clusters
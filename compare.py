@@ -0,0 +1,93 @@
+# Module for comparing loaders and sequencers side by side
+# Each strategy plans the same manifest from a fresh read of the package file. The locations and distances are read
+# once and shared, and only the planning is timed, so the runtimes of the strategies can be compared directly.
+import time
+
+import csv_parsing.location_csv as location_csv
+import csv_parsing.package_csv as package_csv
+import dijkstras
+import hubs
+import scheduling
+from data_structures.address_index import AddressIndex
+
+
+def strategies(names=None):
+    """
+    Gets the loader and sequencer of each strategy to compare.
+
+    :param list[str] names: the strategies, each 'loader' or 'loader/sequencer', a loader alone is compared with every
+                            sequencer. None or empty for every loader with every sequencer
+    :return: the (loader, sequencer) pairs
+    :rtype: list[tuple[str, str]]
+    :raises ValueError: if a loader or sequencer is not registered
+    """
+    # Time complexity O(l*s) for l loaders and s sequencers
+    pairs = list()
+
+    for name in names or scheduling.LOADERS:
+        loader, _, sequencer = name.partition('/')
+
+        if loader not in scheduling.LOADERS:
+            raise ValueError(f'Unknown loader {loader}, expected one of {", ".join(scheduling.LOADERS)}.')
+        if sequencer and sequencer not in scheduling.SEQUENCERS:
+            raise ValueError(f'Unknown sequencer {sequencer}, expected one of {", ".join(scheduling.SEQUENCERS)}.')
+
+        pairs.extend((loader, s) for s in ([sequencer] if sequencer else scheduling.SEQUENCERS))
+
+    return pairs
+
+
+def compare(package_file, hub_addresses, pairs, anneal=0.0):
+    """
+    Plans and simulates the same day with each strategy and measures the result.
+
+    :param str package_file: the path of the package file
+    :param list[str] hub_addresses: the addresses of the hubs, each with two trucks
+    :param list[tuple[str, str]] pairs: the (loader, sequencer) pairs to compare, as returned by strategies
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :return: for each strategy, its loader and sequencer, the seconds spent planning, the total miles, the number of
+             late packages and the number of packages left
+    :rtype: list[dict]
+    """
+    # Time complexity O(s * n^7) for s strategies
+    address_index = AddressIndex()
+    location_hash = location_csv.read(address_index)  # O(n^3)
+    graph = dijkstras.build_graph(location_hash)  # O(n^2)
+    matrix = dijkstras.build_distance_matrix(graph, len(address_index))  # O(n^3)
+    edges = dijkstras.build_edge_matrix(location_hash, len(address_index))  # O(n^2)
+    hub_ids = hubs.find_hubs(address_index, hub_addresses)
+    results = list()
+
+    for loader, sequencer in pairs:  # O(s * n^7)
+        package_hash, pending, delayed, sibling_sets = package_csv.read(address_index, package_file)  # O(n^3)
+
+        start = time.perf_counter()
+        truck_list, package_lists = hubs.plan(package_hash, hub_ids, graph, matrix, edges, address_index,
+                                              [delayed, pending], sibling_sets, loader, sequencer, anneal)  # O(n^7)
+        seconds = time.perf_counter() - start
+
+        results.append({
+            'loader': loader,
+            'sequencer': sequencer,
+            'seconds': seconds,
+            'miles': sum(truck.distance for truck in truck_list),
+            'late': len(package_hash.late_ids()),
+            'left': sum(len(package_list) for package_list in package_lists)
+        })
+
+    return results
+
+
+def print_results(results):
+    """
+    Prints the results of a comparison as a table, one strategy per row.
+
+    :param list[dict] results: the results, as returned by compare
+    :return:
+    """
+    # Time complexity O(s) for s strategies
+    print(f'{"Loader":<10} {"Sequencer":<10} {"Seconds":>9} {"Miles":>9} {"Late":>6} {"Left":>6}')
+
+    for r in results:
+        print(f'{r["loader"]:<10} {r["sequencer"]:<10} {r["seconds"]:>9.3f} {r["miles"]:>9.1f} {r["late"]:>6} '
+              f'{r["left"]:>6}')
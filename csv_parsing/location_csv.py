@@ -3,10 +3,13 @@ from data_structures.chaining_hash_table import ChainingHashTable
 from models.location import Location
 
 
-def read():
+def read(address_index):
     """
     Parses the csv file for possible locations and their distances from one another.
 
+    Each address is interned in the address index as it is read, and Locations are keyed by their location id.
+
+    :param AddressIndex address_index: the index used to intern addresses to location ids
     :returns: a ChainingHashTable of the Location objects representing each location.
     """
     # Time complexity O(n^3)
@@ -24,9 +27,9 @@ def read():
             if address != '':
                 address_parts = str(address).split('\n')
                 address_parts[1] = address_parts[1].strip(' ,')
-                address_refs.append(address_parts[1])
+                address_refs.append(address_index.intern(address_parts[1]))
             else:
-                address_refs.append(address)
+                address_refs.append(None)
 
         location_hash = ChainingHashTable(10)  # O(n)
 
@@ -40,7 +43,7 @@ def read():
             zipcode = row[1][zip_i:(zip_i + 5)]
 
             # Creating the Location Object
-            new_loc = Location(address, zipcode, name)
+            new_loc = Location(address_index.intern(address), address, zipcode, name)
 
             # Adding destinations and distances to Location
             for i in range(2, len(row)):  # O(n^2)
@@ -50,14 +53,15 @@ def read():
                     # Adding distance for reverse direction
                     other_loc = location_hash.lookup(address_refs[i])  # O(n)
                     if other_loc is None:
-                        print(f'Cannot add distance for {address_refs[i]}, location not found in hash table.')
+                        print(f'Cannot add distance for {address_index.get_address(address_refs[i])}, '
+                              f'location not found in hash table.')
                     else:
-                        other_loc.add_destination(new_loc.address, row[i])
+                        other_loc.add_destination(new_loc.id, row[i])
 
             # Add Location to its own destinations
-            new_loc.add_destination(new_loc.address, '0.0')
+            new_loc.add_destination(new_loc.id, '0.0')
 
             # Add the new Location object to the hash table
-            location_hash.insert(new_loc.address, new_loc)
+            location_hash.insert(new_loc.id, new_loc)
 
         return location_hash
@@ -1,40 +1,47 @@
 import csv
 from datetime import datetime, time
 
-from data_structures.chaining_hash_table import ChainingHashTable
+from data_structures.package_store import PackageStore
+from data_structures.deadline_queue import DeadlineQueue
+from data_structures.pending_queue import DelayedQueue
 from models.package import Package
 from utils import TIME_FORMAT
 
+PACKAGE_FILE = 'assets/WGUPS Package File.csv'
 
-def read():
+
+def read(address_index, path=PACKAGE_FILE):
     """
     Parses the csv file for the packages and creates the associated package lists and package objects.
 
+    Each package address is interned in the address index so packages carry the location id of their destination. A
+    deadline may be any time of day, and a package due at EOD is due at Package.PRIORITY_3.
+
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param str path: the path of the package file
     :return: a tuple containing the following data in order:
 
-        - ChainingHashTable of the package objects representing each package
-        - List of package ids with priority 1
-        - List of package ids with priority 2
-        - List of package ids with priority 3
-        - List of package ids with 'Delayed' status
+        - PackageStore of the packages
+        - DeadlineQueue of the package ids that are at the hub, ordered by deadline
+        - DelayedQueue of package ids with 'Delayed' status
         - List of sets that contain the package ids that must be delivered on the same truck (sibling sets)
     """
     # Time complexity O(n^3)
-    with open("assets/WGUPS Package File.csv", encoding="utf-8-sig") as csvfile:
+    with open(path, encoding="utf-8-sig") as csvfile:
         package_raw = csv.reader(csvfile, dialect='excel')
 
         # Get first row and parse headers
         headers = next(package_raw)
         headers = [str(x).upper() for x in headers]
+        package_rows = list(package_raw)  # O(n)
 
-        package_hash = ChainingHashTable(10)
-        delayed = []
-        priority_1 = []
-        priority_2 = []
-        priority_3 = []
+        # One bucket per package keeps the id -> row lookups of the queues below O(1) on average
+        package_hash = PackageStore(max(len(package_rows), 10))
+        delayed = DelayedQueue(package_hash)
+        pending = DeadlineQueue(package_hash)
         all_sibling_sets = list()
 
-        for row in package_raw:  # O(n^3)
+        for row in package_rows:  # O(n^3)
             pid = None
             address = None
             deadline = Package.PRIORITY_3
@@ -98,18 +105,33 @@ def read():
                 else:
                     print(f'Error parsing column: {header}')
 
-            new_package = Package(pid, address, deadline, city, state, zipcode,
-                                  weight, status, delay_time, req_truck, siblings)
-
-            package_hash.insert(new_package.id, new_package)
+            new_package = package_hash.add(pid, address, deadline, city, state, zipcode,
+                                           weight, status, delay_time, req_truck, siblings,
+                                           address_index.intern(address))
 
             if new_package.status == Package.DELAYED:
                 delayed.append(new_package.id)
-            elif new_package.deadline == Package.PRIORITY_1:
-                priority_1.append(new_package.id)
-            elif new_package.deadline == Package.PRIORITY_2:
-                priority_2.append(new_package.id)
             else:
-                priority_3.append(new_package.id)
+                pending.append(new_package.id)
+
+        return package_hash, pending, delayed, all_sibling_sets
+
+
+def read_rows(path=PACKAGE_FILE):
+    """
+    Reads the raw rows of the package file, keyed by package id.
+
+    The rows are used to tell which packages were added, removed or changed between two versions of a package file.
+
+    :param str path: the path of the package file
+    :return: the rows of the file, each a list of its column values
+    :rtype: dict[str -> list[str]]
+    """
+    # Time complexity O(n)
+    with open(path, encoding="utf-8-sig") as csvfile:
+        package_raw = csv.reader(csvfile, dialect='excel')
+
+        headers = [str(x).upper() for x in next(package_raw)]
+        id_i = headers.index('ID')
 
-        return package_hash, priority_1, priority_2, priority_3, delayed, all_sibling_sets
+        return {row[id_i]: row for row in package_raw}  # O(n)
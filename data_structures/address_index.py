@@ -0,0 +1,87 @@
+import re
+
+
+class AddressIndex:
+    """
+    Interns addresses to dense integer location ids.
+
+    Addresses are normalized before interning so that small differences in case, spacing and trailing punctuation
+    resolve to the same location. Ids are assigned in the order addresses are first seen, starting at 0, so they can be
+    used directly as indexes into lists and distance matrices. The first spelling of an address seen is kept for
+    display.
+    """
+    def __init__(self, addresses=()):
+        """
+        Creates an empty index and interns any addresses provided, in order.
+
+        :param iterable[str] addresses: addresses to intern up front
+        """
+        # Time complexity O(n)
+        self.ids = dict()
+        self.addresses = list()
+
+        for address in addresses:  # O(n)
+            self.intern(address)
+
+    @staticmethod
+    def normalize(address):
+        """
+        Normalizes an address so equivalent spellings share a key.
+
+        :param str address: the address to normalize
+        :return: the normalized address
+        :rtype: str
+        """
+        # Time complexity O(1)
+        return re.sub(r'\s+', ' ', str(address)).strip(' ,.').upper()
+
+    def intern(self, address):
+        """
+        Gets the location id of an address, assigning the next id if the address has not been seen before.
+
+        :param str address: the address to intern
+        :return: the location id of the address
+        :rtype: int
+        """
+        # Time complexity O(1)
+        key = AddressIndex.normalize(address)
+        location_id = self.ids.get(key)
+
+        if location_id is None:
+            location_id = len(self.addresses)
+            self.ids[key] = location_id
+            self.addresses.append(str(address).strip())
+
+        return location_id
+
+    def get_id(self, address):
+        """
+        Gets the location id of an address without interning it.
+
+        :param str address: the address
+        :return: the location id, None if the address has not been interned
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return self.ids.get(AddressIndex.normalize(address))
+
+    def get_address(self, location_id):
+        """
+        Gets the display address of a location id.
+
+        :param int location_id: the location id
+        :return: the address as it was first seen
+        :rtype: str
+        """
+        # Time complexity O(1)
+        return self.addresses[location_id]
+
+    def __len__(self):
+        """
+        Provide the number of interned addresses.
+
+        :return: number of interned addresses
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return len(self.addresses)
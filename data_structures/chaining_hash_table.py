@@ -17,6 +17,7 @@ class ChainingHashTable:
         """
         # Time complexity O(n)
         self.table = list()
+        self.count = 0  # number of entries, kept so the length does not require walking every bucket
 
         for i in range(num_buckets):
             self.table.append(list())
@@ -33,6 +34,18 @@ class ChainingHashTable:
         # Time complexity O(1)
         bucket = self.hash(key)
         self.table[bucket].append([key, value])
+        self.count += 1
+
+    def insert_many(self, pairs):
+        """
+        Inserts key-value pairs into the hash table.
+
+        :param pairs: the (key, value) pairs to insert, each key must uniquely identify its value
+        :return:
+        """
+        # Time complexity O(n)
+        for key, value in pairs:  # O(n)
+            self.insert(key, value)
 
     def lookup(self, key):
         """
@@ -45,6 +58,17 @@ class ChainingHashTable:
         :return: the associated value if the key is found, None if the the key is not found
         """
         # Time complexity O(n)
+        return self.get(key)
+
+    def get(self, key, default=None):
+        """
+        Lookup a value in the hash table by its unique key, returning a default if the key is not found.
+
+        :param key: the unique key of the value being searched for
+        :param default: the value returned if the key is not found
+        :return: the associated value if the key is found, the default if the key is not found
+        """
+        # Time complexity O(n)
         bucket = self.hash(key)
         bucket_list = self.table[bucket]
 
@@ -52,27 +76,81 @@ class ChainingHashTable:
             if kv[0] == key:
                 return kv[1]
 
-        return None
+        return default
+
+    def lookup_many(self, keys):
+        """
+        Lookup the values of many keys at once.
+
+        Each bucket holding one of the keys is walked only once, no matter how many of the keys hash to it, and only the
+        entries of the wanted keys are kept.
+
+        :param keys: the unique keys of the values being searched for
+        :return: the associated values in the same order as the keys, None for each key that is not found
+        :rtype: list
+        """
+        # Time complexity O(n)
+        keys = list(keys)
+        wanted = set(keys)
+        found = dict()
+
+        for bucket in {self.hash(key) for key in keys}:  # O(n), each key is hashed once
+            for key, value in self.table[bucket]:
+                if key in wanted:
+                    found[key] = value
+
+        return [found.get(key) for key in keys]  # O(n)
+
+    def items(self):
+        """
+        Iterates over every key-value pair in the hash table, in bucket order.
+
+        :return: the (key, value) pairs
+        """
+        # Time complexity O(n)
+        for bucket in self.table:
+            for key, value in bucket:
+                yield key, value
+
+    def keys(self):
+        """
+        Iterates over every key in the hash table, in bucket order.
+
+        :return: the keys
+        """
+        # Time complexity O(n)
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Iterates over every value in the hash table, in bucket order.
+
+        :return: the values
+        """
+        # Time complexity O(n)
+        for _, value in self.items():
+            yield value
 
     def remove(self, key):
         """
         Removes a key-value pair from the hash table.
 
-        The lookup method is used to find the value. If the value is found, the key is hashed to get the bucket and
-        the key-value pair is removed.
+        The key is hashed to get the bucket, and the key-value pair with a matching key is removed from the bucket.
 
         :param key: the unique key of the value to be removed
         :return: True if the key is found and key-value pair removed, False if the key is not found
         """
         # Time complexity O(n)
-        value = self.lookup(key)  # O(n)
+        bucket_list = self.table[self.hash(key)]
+
+        for i, kv in enumerate(bucket_list):  # O(n)
+            if kv[0] == key:
+                del bucket_list[i]
+                self.count -= 1
+                return True
 
-        if value:
-            bucket = self.hash(key)
-            self.table[bucket].remove([key, value])
-            return True
-        else:
-            return False
+        return False
 
     def hash(self, key):
         """
@@ -105,12 +183,5 @@ class ChainingHashTable:
         :return: number of entries in the hash table
         :rtype: int
         """
-        # Time complexity O(n)
-        sum_len = 0
-
-        for bucket in self.table:
-            sum_len += len(bucket)
-
-        return sum_len
-
-
+        # Time complexity O(1)
+        return self.count
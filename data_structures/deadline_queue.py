@@ -0,0 +1,221 @@
+from data_structures.pending_queue import PendingQueue
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class DeadlineBucket(PendingQueue):
+    """
+    The ids of the packages in a DeadlineQueue that share a deadline minute, in the order they were added.
+
+    A bucket is handed to the loaders as one of the package lists, so adding and removing ids through the bucket keeps
+    the size, cursor and bucket index of its queue up to date.
+    """
+
+    def __init__(self, queue, minute):
+        """
+        Creates an empty bucket.
+
+        :param DeadlineQueue queue: the queue the bucket belongs to
+        :param int minute: the deadline of the packages in the bucket, in minutes since midnight
+        """
+        # Time complexity O(1)
+        self.queue = queue
+        self.minute = minute
+
+        super().__init__()
+
+    def append(self, pkg_id):
+        """
+        Adds a package to the back of the bucket. A package already in the bucket keeps its place.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(1)
+        if pkg_id in self.pkg_ids:
+            return
+
+        super().append(pkg_id)
+        self.queue.minutes[pkg_id] = self.minute
+        self.queue.count += 1
+        self.queue.cursor = min(self.queue.cursor, self.minute)
+
+    def remove(self, pkg_id):
+        """
+        Removes a package from the bucket.
+
+        :param str pkg_id: the id of the package
+        :return:
+        :raises ValueError: if the package is not in the bucket
+        """
+        # Time complexity O(1)
+        super().remove(pkg_id)
+        del self.queue.minutes[pkg_id]
+        self.queue.count -= 1
+
+    def discard(self, pkg_id):
+        """
+        Removes a package from the bucket if it is in the bucket.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(1)
+        if pkg_id in self.pkg_ids:
+            self.remove(pkg_id)
+
+
+class DeadlineQueue:
+    """
+    Ids of packages waiting to be loaded, ordered by deadline.
+
+    The queue is a calendar queue with one bucket per minute of the day, so any deadline in the package file has its
+    own bucket instead of being treated as end of day. A package is added to or removed from its bucket in O(1), and a
+    cursor marks the earliest minute that may hold packages. The cursor only moves back when a package with an earlier
+    deadline is added, so finding the most urgent packages skips each empty minute once and is O(1) amortized.
+
+    Adding a package looks up its deadline in the package store, which has one bucket per package in the manifest so
+    the lookup is O(1) on average. The bucket of every package in the queue is kept in a dict, so removing and checking
+    a package do not look it up again.
+
+    The loaders take the non-empty buckets, most urgent first, as their package lists.
+    """
+
+    def __init__(self, package_hash, pkg_ids=()):
+        """
+        Creates a queue.
+
+        :param PackageStore package_hash: the Package objects, read for the deadline of each package
+        :param pkg_ids: the ids of the packages initially in the queue
+        """
+        # Time complexity O(n)
+        self.package_hash = package_hash
+        self.buckets = [None] * MINUTES_PER_DAY  # deadline minute -> DeadlineBucket, created when first used
+        self.minutes = dict()  # package id -> deadline minute of the bucket holding it
+        self.cursor = MINUTES_PER_DAY  # no bucket before the cursor holds a package
+        self.count = 0
+
+        for pkg_id in pkg_ids:  # O(n)
+            self.append(pkg_id)
+
+    def minute(self, pkg_id):
+        """
+        Gets the bucket of a package.
+
+        :param str pkg_id: the id of the package
+        :return: the deadline of the package, in whole minutes since midnight
+        :rtype: int
+        """
+        # Time complexity O(1)
+        seconds = self.package_hash.deadlines[self.package_hash.rows.lookup(pkg_id)]  # O(1), one bucket per package
+        return min(max(int(seconds // 60), 0), MINUTES_PER_DAY - 1)
+
+    def append(self, pkg_id):
+        """
+        Adds a package to the bucket of its deadline.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(1)
+        if pkg_id in self.minutes:
+            return
+
+        minute = self.minute(pkg_id)  # O(1)
+
+        if self.buckets[minute] is None:
+            self.buckets[minute] = DeadlineBucket(self, minute)
+
+        self.buckets[minute].append(pkg_id)
+
+    def extend(self, pkg_ids):
+        """
+        Adds many packages to the buckets of their deadlines.
+
+        :param pkg_ids: the ids of the packages
+        :return:
+        """
+        # Time complexity O(n)
+        for pkg_id in pkg_ids:  # O(n)
+            self.append(pkg_id)
+
+    def remove(self, pkg_id):
+        """
+        Removes a package from the queue.
+
+        :param str pkg_id: the id of the package
+        :return:
+        :raises ValueError: if the package is not in the queue
+        """
+        # Time complexity O(1)
+        if pkg_id not in self.minutes:
+            raise ValueError(f'Package {pkg_id} is not in the queue.')
+
+        self.buckets[self.minutes[pkg_id]].remove(pkg_id)
+
+    def discard(self, pkg_id):
+        """
+        Removes a package from the queue if it is in the queue.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(1)
+        if pkg_id in self.minutes:
+            self.buckets[self.minutes[pkg_id]].remove(pkg_id)
+
+    def first(self):
+        """
+        Gets the bucket of the most urgent packages, moving the cursor past any empty minutes.
+
+        :return: the bucket, None if the queue is empty
+        :rtype: DeadlineBucket
+        """
+        # Time complexity O(1) amortized
+        while self.cursor < MINUTES_PER_DAY and not self.buckets[self.cursor]:
+            self.cursor += 1
+
+        return self.buckets[self.cursor] if self.cursor < MINUTES_PER_DAY else None
+
+    def batches(self):
+        """
+        Gets the non-empty buckets, most urgent first, to be loaded as package lists.
+
+        :return: the buckets
+        :rtype: list[DeadlineBucket]
+        """
+        # Time complexity O(m) for the m minutes after the cursor, at most one day
+        if self.first() is None:
+            return list()
+
+        return [bucket for bucket in self.buckets[self.cursor:] if bucket]
+
+    def __contains__(self, pkg_id):
+        """
+        Checks if a package is in the queue.
+
+        :param str pkg_id: the id of the package
+        :return: True if the package is in the queue
+        """
+        # Time complexity O(1)
+        return pkg_id in self.minutes
+
+    def __iter__(self):
+        """
+        Iterates over the ids, earliest deadline first and in the order they were added for equal deadlines.
+
+        :return: the package ids
+        """
+        # Time complexity O(n)
+        for bucket in self.batches():
+            yield from bucket
+
+    def __len__(self):
+        """
+        Provide the number of packages in the queue.
+
+        :return: number of packages in the queue
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return self.count
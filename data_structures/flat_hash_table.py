@@ -0,0 +1,263 @@
+import mmap
+import struct
+import zlib
+from multiprocessing import shared_memory
+
+
+class FlatHashTable:
+    """
+    Read-only hash table laid out in one flat buffer, so it can be shared between processes without copying.
+
+    The buffer holds a header, an open-addressed array of fixed-size slots and a heap of key and value bytes. Each slot
+    holds the hash of its key and the offsets and lengths of the key and value in the heap. Keys are hashed with CRC-32,
+    which, unlike the built-in hash, gives the same value in every process. Collisions are resolved by linear probing,
+    and the table is at most half full, so lookups are O(1) on average.
+
+    Lookups read straight from the buffer, which may be bytes, a memory-mapped file or a block of shared memory, so a
+    worker process only maps the table instead of reading the package file again or unpickling its own copy. Keys are
+    strings and values are bytes.
+    """
+    MAGIC = b'FLATHASH'
+    VERSION = 1
+    HEADER = struct.Struct('<8sHII')  # magic, version, number of slots, number of entries
+    SLOT = struct.Struct('<IIIII')  # key hash, key offset, key length, value offset, value length
+    EMPTY = 0xFFFFFFFF  # key length of an empty slot
+
+    def __init__(self, buffer, owner=None):
+        """
+        Opens a table over a buffer built by FlatHashTable.build.
+
+        :param buffer: the buffer holding the table, e.g. bytes, an mmap or SharedMemory.buf
+        :param owner: the mmap or SharedMemory the buffer belongs to, closed with the table
+        """
+        # Time complexity O(1)
+        self.buffer = memoryview(buffer)
+        self.owner = owner
+
+        magic, version, self.num_slots, self.count = FlatHashTable.HEADER.unpack_from(self.buffer, 0)
+
+        if magic != FlatHashTable.MAGIC:
+            raise ValueError('Buffer does not hold a FlatHashTable.')
+        if version != FlatHashTable.VERSION:
+            raise ValueError(f'FlatHashTable has version {version}, expected {FlatHashTable.VERSION}.')
+
+    @staticmethod
+    def build(pairs):
+        """
+        Lays out key-value pairs as a flat table.
+
+        :param pairs: the (key, value) pairs, each key must be a unique string and each value bytes
+        :return: the buffer holding the table
+        :rtype: bytearray
+        """
+        # Time complexity O(n)
+        pairs = [(key.encode(), bytes(value)) for key, value in pairs]  # O(n)
+        num_slots = 1
+        while num_slots < 2 * len(pairs):  # at most half full
+            num_slots *= 2
+
+        slots_offset = FlatHashTable.HEADER.size
+        heap_offset = slots_offset + num_slots * FlatHashTable.SLOT.size
+        heap_size = sum(len(key) + len(value) for key, value in pairs)
+
+        buffer = bytearray(heap_offset + heap_size)
+        FlatHashTable.HEADER.pack_into(buffer, 0, FlatHashTable.MAGIC, FlatHashTable.VERSION, num_slots, len(pairs))
+
+        for i in range(num_slots):  # O(n)
+            FlatHashTable.SLOT.pack_into(buffer, slots_offset + i * FlatHashTable.SLOT.size, 0, 0,
+                                         FlatHashTable.EMPTY, 0, 0)
+
+        offset = heap_offset
+        mask = num_slots - 1
+
+        for key, value in pairs:  # O(n)
+            key_hash = zlib.crc32(key)
+            i = key_hash & mask
+
+            # Probe for an empty slot
+            while struct.unpack_from('<I', buffer, slots_offset + i * FlatHashTable.SLOT.size + 8)[0] \
+                    != FlatHashTable.EMPTY:
+                i = (i + 1) & mask
+
+            buffer[offset:offset + len(key)] = key
+            buffer[offset + len(key):offset + len(key) + len(value)] = value
+            FlatHashTable.SLOT.pack_into(buffer, slots_offset + i * FlatHashTable.SLOT.size, key_hash, offset,
+                                         len(key), offset + len(key), len(value))
+            offset += len(key) + len(value)
+
+        return buffer
+
+    @staticmethod
+    def share(pairs, name=None):
+        """
+        Lays out key-value pairs as a flat table in a new block of shared memory.
+
+        The creating process must unlink the block once every process is done with it.
+
+        :param pairs: the (key, value) pairs, each key must be a unique string and each value bytes
+        :param str name: the name of the block, None for a generated name
+        :return: the table, its owner is the SharedMemory whose name other processes attach to
+        :rtype: FlatHashTable
+        """
+        # Time complexity O(n)
+        buffer = FlatHashTable.build(pairs)  # O(n)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(buffer))
+        shm.buf[:len(buffer)] = buffer
+
+        return FlatHashTable(shm.buf, shm)
+
+    @staticmethod
+    def attach(name):
+        """
+        Opens a table that another process put in shared memory.
+
+        :param str name: the name of the block of shared memory
+        :return: the table
+        :rtype: FlatHashTable
+        """
+        # Time complexity O(1)
+        shm = shared_memory.SharedMemory(name=name)
+
+        return FlatHashTable(shm.buf, shm)
+
+    @staticmethod
+    def save(path, pairs):
+        """
+        Lays out key-value pairs as a flat table in a file.
+
+        :param str path: the path of the file
+        :param pairs: the (key, value) pairs, each key must be a unique string and each value bytes
+        :return:
+        """
+        # Time complexity O(n)
+        with open(path, 'wb') as table_file:
+            table_file.write(FlatHashTable.build(pairs))
+
+    @staticmethod
+    def open(path):
+        """
+        Opens a table saved by FlatHashTable.save by memory-mapping the file.
+
+        :param str path: the path of the file
+        :return: the table
+        :rtype: FlatHashTable
+        """
+        # Time complexity O(1)
+        with open(path, 'rb') as table_file:
+            mm = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return FlatHashTable(mm, mm)
+
+    def lookup(self, key):
+        """
+        Lookup a value in the table by its unique key.
+
+        :param str key: the unique key of the value being searched for
+        :return: the associated value if the key is found, None if the key is not found
+        :rtype: bytes
+        """
+        # Time complexity O(1)
+        return self.get(key)
+
+    def get(self, key, default=None):
+        """
+        Lookup a value in the table by its unique key, returning a default if the key is not found.
+
+        :param str key: the unique key of the value being searched for
+        :param default: the value returned if the key is not found
+        :return: the associated value if the key is found, the default if the key is not found
+        """
+        # Time complexity O(1)
+        key = key.encode()
+        key_hash = zlib.crc32(key)
+        mask = self.num_slots - 1
+        i = key_hash & mask
+
+        while True:
+            slot_hash, key_offset, key_length, value_offset, value_length = FlatHashTable.SLOT.unpack_from(
+                self.buffer, FlatHashTable.HEADER.size + i * FlatHashTable.SLOT.size)
+
+            if key_length == FlatHashTable.EMPTY:
+                return default
+            if slot_hash == key_hash and self.buffer[key_offset:key_offset + key_length] == key:
+                return bytes(self.buffer[value_offset:value_offset + value_length])
+
+            i = (i + 1) & mask
+
+    def lookup_many(self, keys):
+        """
+        Lookup the values of many keys at once.
+
+        :param keys: the unique keys of the values being searched for
+        :return: the associated values in the same order as the keys, None for each key that is not found
+        :rtype: list[bytes]
+        """
+        # Time complexity O(n)
+        return [self.get(key) for key in keys]
+
+    def items(self):
+        """
+        Iterates over every key-value pair in the table, in slot order.
+
+        :return: the (key, value) pairs
+        """
+        # Time complexity O(n)
+        for i in range(self.num_slots):
+            _, key_offset, key_length, value_offset, value_length = FlatHashTable.SLOT.unpack_from(
+                self.buffer, FlatHashTable.HEADER.size + i * FlatHashTable.SLOT.size)
+
+            if key_length != FlatHashTable.EMPTY:
+                yield (bytes(self.buffer[key_offset:key_offset + key_length]).decode(),
+                       bytes(self.buffer[value_offset:value_offset + value_length]))
+
+    def keys(self):
+        """
+        Iterates over every key in the table, in slot order.
+
+        :return: the keys
+        """
+        # Time complexity O(n)
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Iterates over every value in the table, in slot order.
+
+        :return: the values
+        """
+        # Time complexity O(n)
+        for _, value in self.items():
+            yield value
+
+    def close(self):
+        """
+        Releases the buffer and closes its mmap or shared memory. Shared memory is not unlinked.
+
+        :return:
+        """
+        # Time complexity O(1)
+        self.buffer.release()
+
+        if self.owner is not None:
+            self.owner.close()
+
+    def __contains__(self, key):
+        """
+        Checks if a key is in the table.
+
+        :param str key: the key
+        :return: True if the key is found
+        """
+        # Time complexity O(1)
+        return self.get(key) is not None
+
+    def __len__(self):
+        """
+        Provide the number of entries in the table.
+
+        :return: number of entries in the table
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return self.count
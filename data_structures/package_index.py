@@ -0,0 +1,152 @@
+from bisect import bisect_left, bisect_right, insort
+
+from models.package import Package
+import utils
+
+
+class PackageIndex:
+    """
+    Secondary indexes of a PackageStore.
+
+    Zipcode, location id, status and delivery truck are indexed with hash indexes that map each value to the rows that
+    have it. Deadline is indexed with a sorted list, so range queries on deadline find their first match by binary
+    search. The indexes listen to the store, so they stay current as packages are added and their columns change.
+
+    Equality lookups are O(1 + k) and deadline range lookups are O(log n + k), for k matching packages.
+    """
+    HASH_COLUMNS = ('zipcodes', 'location_ids', 'statuses', 'delivery_trucks')
+
+    def __init__(self, store):
+        """
+        Builds the indexes for every package in the store and starts listening for changes.
+
+        :param PackageStore store: the store to index
+        """
+        # Time complexity O(n log n)
+        self.store = store
+        self.hash_indexes = {column: dict() for column in PackageIndex.HASH_COLUMNS}
+
+        for column, index in self.hash_indexes.items():  # O(n)
+            for row, value in enumerate(getattr(store, column)):
+                index.setdefault(value, set()).add(row)
+
+        self.deadlines = sorted((deadline, row) for row, deadline in enumerate(store.deadlines))  # O(n log n)
+
+        store.listeners.append(self)
+
+    def package_added(self, row):
+        """
+        Indexes a package that was added to the store.
+
+        :param int row: the row of the package
+        :return:
+        """
+        # Time complexity O(n)
+        for column, index in self.hash_indexes.items():
+            index.setdefault(getattr(self.store, column)[row], set()).add(row)
+
+        insort(self.deadlines, (self.store.deadlines[row], row))  # O(n)
+
+    def column_changed(self, row, column, old, new):
+        """
+        Re-indexes a package after one of its columns changed.
+
+        :param int row: the row of the package
+        :param str column: the name of the column
+        :param old: the previous encoded value
+        :param new: the new encoded value
+        :return:
+        """
+        # Time complexity O(1) for hash indexed columns, O(n) for the deadline
+        if old == new:
+            return
+
+        if column in self.hash_indexes:
+            index = self.hash_indexes[column]
+            index[old].discard(row)
+            if len(index[old]) == 0:
+                del index[old]
+            index.setdefault(new, set()).add(row)
+        elif column == 'deadlines':
+            del self.deadlines[bisect_left(self.deadlines, (old, row))]  # O(n)
+            insort(self.deadlines, (new, row))  # O(n)
+
+    def values_changed(self, rows, column, olds, news):
+        """
+        Re-indexes many packages after one of their columns changed in a single bulk write.
+
+        Hash indexed columns are re-indexed row by row. If any deadline changed, the deadline index is re-sorted once
+        instead of moving each row on its own.
+
+        :param list[int] rows: the rows of the packages
+        :param str column: the name of the column
+        :param list olds: the previous encoded values, in the same order as the rows
+        :param list news: the new encoded values, in the same order as the rows
+        :return:
+        """
+        # Time complexity O(k) for k rows for hash indexed columns, O(n log n) for the deadline
+        if column in self.hash_indexes:
+            for row, old, new in zip(rows, olds, news):  # O(k)
+                self.column_changed(row, column, old, new)
+        elif column == 'deadlines':
+            moved = {row: new for row, old, new in zip(rows, olds, news) if old != new}
+            if len(moved) > 0:
+                self.deadlines = sorted((moved.get(row, deadline), row) for deadline, row in self.deadlines)
+
+    def rows_due_between(self, start=None, end=None):
+        """
+        Gets the rows of packages with a deadline in a range.
+
+        :param datetime.time start: the earliest deadline, None for no limit
+        :param datetime.time end: the latest deadline, None for no limit
+        :return: the rows in deadline order
+        :rtype: list[int]
+        """
+        # Time complexity O(log n + k)
+        lo = 0 if start is None else bisect_left(self.deadlines, (utils.time_to_seconds(start), -1))
+        hi = len(self.deadlines) if end is None else bisect_right(self.deadlines,
+                                                                   (utils.time_to_seconds(end), float('inf')))
+        return [row for _, row in self.deadlines[lo:hi]]
+
+    def query(self, zipcode=None, location_id=None, status=None, truck=None, due_after=None, due_by=None):
+        """
+        Finds the packages matching every criterion given.
+
+        The criterion with the fewest matches is used to find candidates and the rest are checked against each
+        candidate.
+
+        :param str zipcode: the zipcode
+        :param int location_id: the location id of the address
+        :param str status: the status
+        :param int truck: the id of the delivery truck
+        :param datetime.time due_after: the earliest deadline
+        :param datetime.time due_by: the latest deadline
+        :return: the ids of the matching packages, in deadline order if a deadline was given
+        :rtype: list[str]
+        """
+        # Time complexity O(log n + k)
+        sets = list()
+        if zipcode is not None:
+            sets.append(self.hash_indexes['zipcodes'].get(zipcode, set()))
+        if location_id is not None:
+            sets.append(self.hash_indexes['location_ids'].get(location_id, set()))
+        if status is not None:
+            sets.append(self.hash_indexes['statuses'].get(Package.STATUS_CODES[status], set()))
+        if truck is not None:
+            sets.append(self.hash_indexes['delivery_trucks'].get(truck, set()))
+
+        sets.sort(key=len)
+
+        if due_after is not None or due_by is not None:
+            candidates = self.rows_due_between(due_after, due_by)  # O(log n + k)
+            if len(sets) > 0 and len(sets[0]) < len(candidates):
+                lo = utils.time_to_seconds(due_after) if due_after is not None else float('-inf')
+                hi = utils.time_to_seconds(due_by) if due_by is not None else float('inf')
+                candidates = sorted((row for row in sets[0] if lo <= self.store.deadlines[row] <= hi),
+                                    key=lambda r: self.store.deadlines[r])
+        elif len(sets) > 0:
+            candidates = sorted(sets[0])
+        else:
+            candidates = range(len(self.store))
+
+        return [self.store.ids[row] for row in candidates if all(row in s for s in sets)]
@@ -0,0 +1,328 @@
+import json
+from array import array
+from datetime import time
+
+from data_structures.chaining_hash_table import ChainingHashTable
+from models.package import Package
+import utils
+
+
+class PackageStore:
+    """
+    Columnar store of packages.
+
+    Each package attribute is held in its own column, one row per package. Numeric attributes (location ids, times,
+    statuses and truck ids) are held in typed arrays, so a package costs a few bytes per attribute instead of a full
+    object. Times are stored as seconds since midnight and are negative when there is no time. Truck ids are 0 when
+    there is no truck.
+
+    Packages are accessed through lightweight Package views, and scans over a status or deadline are a single pass
+    over one column. Listeners, such as a PackageIndex, are told about every package added and every column changed,
+    and about a column changed for many packages at once in a single call.
+    """
+    COLUMNS = ('ids', 'addresses', 'cities', 'states', 'zipcodes', 'weights', 'siblings', 'location_ids', 'deadlines',
+               'statuses', 'req_trucks', 'delivery_trucks', 'delay_times', 'at_hub_times', 'en_route_times',
+               'delivered_times')
+
+    def __init__(self, num_buckets):
+        """
+        Creates an empty store.
+
+        :param int num_buckets: the number of buckets used to hash package ids to rows
+        """
+        # Time complexity O(n)
+        self.rows = ChainingHashTable(num_buckets)  # package id -> row
+        self.listeners = list()
+
+        self.ids = list()
+        self.addresses = list()
+        self.cities = list()
+        self.states = list()
+        self.zipcodes = list()
+        self.weights = list()
+        self.siblings = list()
+
+        self.location_ids = array('l')
+        self.deadlines = array('d')
+        self.statuses = array('b')
+        self.req_trucks = array('l')
+        self.delivery_trucks = array('l')
+        self.delay_times = array('d')
+        self.at_hub_times = array('d')
+        self.en_route_times = array('d')
+        self.delivered_times = array('d')
+
+    def add(self, pid, address, deadline, city, state, zipcode, weight, status=Package.AT_HUB, delay_time=None,
+            req_truck=None, siblings=[], location_id=None):
+        """
+        Adds a package to the store.
+
+        :param str pid: the unique id of the package
+        :param str address: the display address of the package
+        :param datetime.time deadline: the delivery deadline
+        :param str city: the city
+        :param str state: the state
+        :param str zipcode: the zipcode
+        :param str weight: the weight
+        :param str status: the initial status
+        :param datetime.time delay_time: the time a delayed package arrives at the hub
+        :param int req_truck: the id of the only truck the package can be delivered by
+        :param siblings: the ids of packages it must be delivered with
+        :param int location_id: the interned id of the address
+        :return: a view of the new package
+        :rtype: Package
+        """
+        # Time complexity O(1)
+        row = len(self.ids)
+
+        self.ids.append(pid)
+        self.addresses.append(address)
+        self.cities.append(city)
+        self.states.append(state)
+        self.zipcodes.append(zipcode)
+        self.weights.append(weight)
+        self.siblings.append(siblings)
+
+        self.location_ids.append(-1 if location_id is None else location_id)
+        self.deadlines.append(utils.time_to_seconds(deadline))
+        self.statuses.append(Package.STATUS_CODES[status])
+        self.req_trucks.append(req_truck if req_truck else 0)
+        self.delivery_trucks.append(0)
+        self.delay_times.append(utils.time_to_seconds(delay_time))
+        self.at_hub_times.append(utils.time_to_seconds(time(0)))
+        self.en_route_times.append(-1.0)
+        self.delivered_times.append(-1.0)
+
+        self.rows.insert(pid, row)  # O(1)
+
+        for listener in self.listeners:
+            listener.package_added(row)
+
+        return Package(self, row)
+
+    def add_record(self, record):
+        """
+        Adds a package to the store from the encoded columns of a record.
+
+        :param dict record: the encoded value of each column keyed by column name, as returned by record
+        :return: a view of the new package
+        :rtype: Package
+        """
+        # Time complexity O(1)
+        row = len(self.ids)
+
+        for column in PackageStore.COLUMNS:
+            getattr(self, column).append(record[column])
+
+        self.rows.insert(record['ids'], row)  # O(1)
+
+        for listener in self.listeners:
+            listener.package_added(row)
+
+        return Package(self, row)
+
+    def set_value(self, row, column, value):
+        """
+        Sets the value of a column for one package.
+
+        :param int row: the row of the package
+        :param str column: the name of the column
+        :param value: the encoded value
+        :return:
+        """
+        # Time complexity O(1)
+        values = getattr(self, column)
+        old = values[row]
+        values[row] = value
+
+        for listener in self.listeners:
+            listener.column_changed(row, column, old, value)
+
+    def set_values(self, rows, column, values):
+        """
+        Sets the value of a column for many packages at once.
+
+        The values are written straight into the column in one pass, and each listener is then told about the whole
+        batch in one call.
+
+        :param list[int] rows: the rows of the packages
+        :param str column: the name of the column
+        :param list values: the encoded values, in the same order as the rows
+        :return:
+        """
+        # Time complexity O(n)
+        column_values = getattr(self, column)
+        olds = [column_values[row] for row in rows] if len(self.listeners) > 0 else None  # O(n)
+
+        for row, value in zip(rows, values):  # O(n)
+            column_values[row] = value
+
+        for listener in self.listeners:
+            listener.values_changed(rows, column, olds, values)
+
+    def lookup(self, pid):
+        """
+        Lookup a package by its id.
+
+        :param str pid: the id of the package
+        :return: a view of the package, None if the id is not found
+        :rtype: Package
+        """
+        # Time complexity O(n)
+        return self.get(pid)
+
+    def get(self, pid, default=None):
+        """
+        Lookup a package by its id, returning a default if the id is not found.
+
+        :param str pid: the id of the package
+        :param default: the value returned if the id is not found
+        :return: a view of the package, the default if the id is not found
+        """
+        # Time complexity O(n)
+        row = self.rows.lookup(pid)  # O(n)
+
+        if row is None:
+            return default
+
+        return Package(self, row)
+
+    def lookup_many(self, pids):
+        """
+        Lookup many packages by their ids at once.
+
+        :param pids: the ids of the packages
+        :return: views of the packages in the same order as the ids, None for each id that is not found
+        :rtype: list[Package]
+        """
+        # Time complexity O(n)
+        return [None if row is None else Package(self, row) for row in self.rows.lookup_many(pids)]  # O(n)
+
+    def items(self):
+        """
+        Iterates over every package in the order they were added.
+
+        :return: the (id, Package) pairs
+        """
+        # Time complexity O(n)
+        for row, pid in enumerate(self.ids):
+            yield pid, Package(self, row)
+
+    def keys(self):
+        """
+        Iterates over every package id in the order they were added.
+
+        :return: the package ids
+        """
+        # Time complexity O(n)
+        return iter(self.ids)
+
+    def values(self):
+        """
+        Iterates over every package in the order they were added.
+
+        :return: views of the packages
+        """
+        # Time complexity O(n)
+        for row in range(len(self.ids)):
+            yield Package(self, row)
+
+    def record(self, row):
+        """
+        Gets every column of one package.
+
+        :param int row: the row of the package
+        :return: the encoded value of each column keyed by column name
+        :rtype: dict
+        """
+        # Time complexity O(1)
+        return {column: getattr(self, column)[row] for column in PackageStore.COLUMNS}
+
+    def flat_pairs(self):
+        """
+        Iterates over every package as a key-value pair for a FlatHashTable.
+
+        :return: the (id, record) pairs, each record is JSON encoded bytes
+        """
+        # Time complexity O(n)
+        for row, pid in enumerate(self.ids):
+            yield pid, json.dumps(self.record(row), default=sorted).encode()  # sibling sets are encoded as lists
+
+    def status_at(self, row, seconds):
+        """
+        Gets the status a package had at a time, without changing the package.
+
+        :param int row: the row of the package
+        :param float seconds: the time, in seconds since midnight
+        :return: the status at the time
+        :rtype: str
+        """
+        # Time complexity O(1)
+        status = Package.STATUSES[self.statuses[row]]
+
+        if status == Package.CANCELLED:
+            return status
+        elif 0 <= seconds < self.delay_times[row]:
+            return Package.DELAYED
+        elif seconds < self.en_route_times[row]:
+            return Package.AT_HUB
+        elif seconds < self.delivered_times[row]:
+            return Package.EN_ROUTE
+
+        return status
+
+    def ids_with_status(self, status):
+        """
+        Gets the ids of all packages with a status.
+
+        :param str status: the status
+        :return: the package ids
+        :rtype: list[str]
+        """
+        # Time complexity O(n)
+        code = Package.STATUS_CODES[status]
+        return [pid for pid, s in zip(self.ids, self.statuses) if s == code]
+
+    def count_status(self, status):
+        """
+        Counts the packages with a status.
+
+        :param str status: the status
+        :return: the number of packages
+        :rtype: int
+        """
+        # Time complexity O(n)
+        return self.statuses.tolist().count(Package.STATUS_CODES[status])
+
+    def ids_due_by(self, t):
+        """
+        Gets the ids of all packages with a deadline at or before a time.
+
+        :param datetime.time t: the time
+        :return: the package ids
+        :rtype: list[str]
+        """
+        # Time complexity O(n)
+        seconds = utils.time_to_seconds(t)
+        return [pid for pid, deadline in zip(self.ids, self.deadlines) if deadline <= seconds]
+
+    def late_ids(self):
+        """
+        Gets the ids of all packages that were delivered after their deadline.
+
+        :return: the package ids
+        :rtype: list[str]
+        """
+        # Time complexity O(n)
+        return [pid for pid, delivered, deadline in zip(self.ids, self.delivered_times, self.deadlines)
+                if delivered > deadline]
+
+    def __len__(self):
+        """
+        Provide the number of packages in the store.
+
+        :return: number of packages in the store
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return len(self.ids)
@@ -0,0 +1,196 @@
+import heapq
+
+import utils
+
+
+class PendingQueue:
+    """
+    Ids of packages waiting to be loaded, kept in the order they were added.
+
+    The ids are the keys of a dict, so adding, removing and checking an id are O(1) on average instead of the O(n)
+    scans of a list, and the order they were added in is kept for the loaders that walk the queue. The queue can be
+    used wherever a list of package ids was used, except that it cannot be indexed.
+    """
+
+    def __init__(self, pkg_ids=()):
+        """
+        Creates a queue.
+
+        :param pkg_ids: the ids of the packages initially in the queue
+        """
+        # Time complexity O(n)
+        self.pkg_ids = dict()
+
+        for pkg_id in pkg_ids:  # O(n)
+            self.append(pkg_id)
+
+    def append(self, pkg_id):
+        """
+        Adds a package to the back of the queue. A package already in the queue keeps its place.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(1)
+        self.pkg_ids.setdefault(pkg_id, None)
+
+    def extend(self, pkg_ids):
+        """
+        Adds many packages to the back of the queue.
+
+        :param pkg_ids: the ids of the packages
+        :return:
+        """
+        # Time complexity O(n)
+        for pkg_id in pkg_ids:  # O(n)
+            self.append(pkg_id)
+
+    def remove(self, pkg_id):
+        """
+        Removes a package from the queue.
+
+        :param str pkg_id: the id of the package
+        :return:
+        :raises ValueError: if the package is not in the queue, as list.remove does
+        """
+        # Time complexity O(1)
+        if pkg_id not in self.pkg_ids:
+            raise ValueError(f'Package {pkg_id} is not in the queue.')
+
+        del self.pkg_ids[pkg_id]
+
+    def discard(self, pkg_id):
+        """
+        Removes a package from the queue if it is in the queue.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(1)
+        self.pkg_ids.pop(pkg_id, None)
+
+    def __contains__(self, pkg_id):
+        """
+        Checks if a package is in the queue.
+
+        :param str pkg_id: the id of the package
+        :return: True if the package is in the queue
+        """
+        # Time complexity O(1)
+        return pkg_id in self.pkg_ids
+
+    def __iter__(self):
+        """
+        Iterates over the ids in the order they were added. The queue must not change while it is iterated.
+
+        :return: the package ids
+        """
+        # Time complexity O(n)
+        return iter(self.pkg_ids)
+
+    def __len__(self):
+        """
+        Provide the number of packages in the queue.
+
+        :return: number of packages in the queue
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return len(self.pkg_ids)
+
+
+class DelayedQueue(PendingQueue):
+    """
+    Ids of delayed packages, ordered by the time they arrive at the hub.
+
+    Besides the PendingQueue, the ids are held in a min-heap and a max-heap keyed by delay time, so the packages that
+    have arrived are popped in O(log n) each and the first and last arrivals are found without a scan. Removed ids are
+    left in the heaps and skipped when they reach the top. Each id is stored with the order it was added in, which
+    breaks ties between equal delay times and tells an id that was removed and added again from its stale entries.
+    """
+
+    def __init__(self, package_hash, pkg_ids=()):
+        """
+        Creates a queue.
+
+        :param PackageStore package_hash: the Package objects, read for the delay time of each package added
+        :param pkg_ids: the ids of the packages initially in the queue
+        """
+        # Time complexity O(n log n)
+        self.package_hash = package_hash
+        self.earliest = list()  # (delay seconds, order, package id) min-heap
+        self.latest = list()  # (-delay seconds, order, package id) min-heap
+        self.added = 0
+
+        super().__init__(pkg_ids)  # O(n log n)
+
+    def append(self, pkg_id):
+        """
+        Adds a delayed package to the queue. A package already in the queue keeps its place.
+
+        :param str pkg_id: the id of the package
+        :return:
+        """
+        # Time complexity O(log n)
+        if pkg_id in self.pkg_ids:
+            return
+
+        seconds = self.package_hash.delay_times[self.package_hash.rows.lookup(pkg_id)]  # O(1), one bucket per package
+        self.pkg_ids[pkg_id] = self.added
+        heapq.heappush(self.earliest, (seconds, self.added, pkg_id))  # O(log n)
+        heapq.heappush(self.latest, (-seconds, self.added, pkg_id))  # O(log n)
+        self.added += 1
+
+    def prune(self, heap):
+        """
+        Pops the entries of removed packages off the top of a heap.
+
+        :param list[tuple] heap: the min-heap or the max-heap
+        :return:
+        """
+        # Time complexity O(log n) amortized
+        while len(heap) > 0 and self.pkg_ids.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def first(self):
+        """
+        Gets the package with the earliest delay time.
+
+        :return: the id of the package, None if the queue is empty
+        :rtype: str
+        """
+        # Time complexity O(log n) amortized
+        self.prune(self.earliest)
+        return self.earliest[0][2] if len(self.earliest) > 0 else None
+
+    def last(self):
+        """
+        Gets the package with the latest delay time.
+
+        :return: the id of the package, None if the queue is empty
+        :rtype: str
+        """
+        # Time complexity O(log n) amortized
+        self.prune(self.latest)
+        return self.latest[0][2] if len(self.latest) > 0 else None
+
+    def pop_arrived(self, curr_time):
+        """
+        Removes every package whose delay time is at or before a time.
+
+        :param datetime.time curr_time: the time
+        :return: the ids of the packages, earliest delay time first and in the order they were added for equal times
+        :rtype: list[str]
+        """
+        # Time complexity O(k log n) for k packages popped
+        seconds = utils.time_to_seconds(curr_time)
+        arrived = list()
+
+        self.prune(self.earliest)
+        while len(self.earliest) > 0 and self.earliest[0][0] <= seconds:  # O(k log n)
+            _, _, pkg_id = heapq.heappop(self.earliest)
+            del self.pkg_ids[pkg_id]
+            arrived.append(pkg_id)
+            self.prune(self.earliest)
+
+        return arrived
@@ -0,0 +1,119 @@
+import struct
+from array import array
+from multiprocessing import shared_memory
+
+
+class SharedMatrix:
+    """
+    Read-only square matrix of floats laid out in one block of shared memory, so the processes on a host share one copy.
+
+    The block holds a header with the number of rows followed by the rows of 8-byte floats, one after another. Each row
+    is a read-only memoryview over the block, so matrix[i][j] reads straight from shared memory and the matrix can be
+    used wherever a list of lists of distances was used.
+
+    Pickling a matrix only sends the name of its block, so handing the matrix to a worker process attaches the worker
+    to the same block instead of copying it. The process that published the matrix must unlink it once every process
+    is done with it.
+    """
+    HEADER = struct.Struct('<Q')  # number of rows
+
+    def __init__(self, shm):
+        """
+        Opens a matrix over a block of shared memory written by SharedMatrix.publish.
+
+        :param SharedMemory shm: the block of shared memory
+        """
+        # Time complexity O(n) for n rows
+        self.owner = shm
+        self.size, = SharedMatrix.HEADER.unpack_from(shm.buf, 0)
+        self.buffer = shm.buf[SharedMatrix.HEADER.size:SharedMatrix.HEADER.size + self.size * self.size * 8]
+        self.values = self.buffer.toreadonly().cast('d')
+        self.rows = [self.values[i * self.size:(i + 1) * self.size] for i in range(self.size)]  # O(n)
+
+    @staticmethod
+    def publish(rows, name=None):
+        """
+        Copies a matrix into a new block of shared memory.
+
+        :param list[list[float]] rows: the rows of the matrix, each as long as the number of rows
+        :param str name: the name of the block, None for a generated name
+        :return: the matrix, its owner is the SharedMemory whose name other processes attach to
+        :rtype: SharedMatrix
+        """
+        # Time complexity O(n^2) for n rows
+        size = len(rows)
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=SharedMatrix.HEADER.size + max(size * size * 8, 1))
+        SharedMatrix.HEADER.pack_into(shm.buf, 0, size)
+
+        values = shm.buf[SharedMatrix.HEADER.size:SharedMatrix.HEADER.size + size * size * 8].cast('d')
+        for i, row in enumerate(rows):  # O(n^2)
+            values[i * size:(i + 1) * size] = memoryview(array('d', row))
+        values.release()
+
+        return SharedMatrix(shm)
+
+    @staticmethod
+    def attach(name):
+        """
+        Opens a matrix that another process published.
+
+        :param str name: the name of the block of shared memory
+        :return: the matrix
+        :rtype: SharedMatrix
+        """
+        # Time complexity O(n) for n rows
+        return SharedMatrix(shared_memory.SharedMemory(name=name))
+
+    def close(self):
+        """
+        Releases the rows and closes the shared memory. The shared memory is not unlinked.
+
+        :return:
+        """
+        # Time complexity O(n) for n rows
+        for row in self.rows:
+            row.release()
+        self.rows = list()
+        self.values.release()
+        self.buffer.release()
+        self.owner.close()
+
+    def __reduce__(self):
+        """
+        Pickles the matrix as the name of its block, so unpickling attaches to the block instead of copying it.
+
+        :return: the function and arguments that attach to the block
+        """
+        # Time complexity O(1)
+        return SharedMatrix.attach, (self.owner.name,)
+
+    def __getitem__(self, i):
+        """
+        Gets a row of the matrix.
+
+        :param int i: the index of the row
+        :return: the row, a read-only view of the shared memory
+        :rtype: memoryview
+        """
+        # Time complexity O(1)
+        return self.rows[i]
+
+    def __iter__(self):
+        """
+        Iterates over the rows of the matrix.
+
+        :return: the rows
+        """
+        # Time complexity O(n)
+        return iter(self.rows)
+
+    def __len__(self):
+        """
+        Provide the number of rows in the matrix.
+
+        :return: number of rows in the matrix
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return self.size
@@ -1,5 +1,8 @@
 # Module for delivering packages
+from itertools import accumulate
 
+from models.package import Package
+from models.truck import Truck
 import utils
 
 
@@ -10,21 +13,21 @@ def deliver(truck, package_hash, location_hash):
     Delivers the next package off of the truck and updates the state of the truck and package objects.
 
     :param Truck truck: the delivering truck
-    :param ChainingHashTable[str, Package] package_hash: Package objects
-    :param ChainingHashTable[str, Location] location_hash: Location objects
+    :param PackageStore package_hash: Package objects
+    :param ChainingHashTable[int, Location] location_hash: Location objects
     :return:
     """
     # O(n) because of ChainingHashTable.lookup
     pkg_id = truck.deliver()
     pkg = package_hash.lookup(pkg_id)
-    distance = location_hash.lookup(truck.current_address).get_distance(pkg.address)
+    distance = location_hash.lookup(truck.current_location).get_distance(pkg.location_id)
     hours = float(distance) / float(truck.SPEED)
     eta = utils.add_time(truck.time, utils.timedelta(hours=hours))
 
     # Update the truck
     truck.distance += distance
     truck.time = eta
-    truck.current_address = pkg.address
+    truck.current_location = pkg.location_id
 
     # Update the package
     pkg.advance_status(eta, truck.id)
@@ -32,15 +35,18 @@ def deliver(truck, package_hash, location_hash):
 
 def deliver_dijkstras(truck, package_hash):
     """
+    .. warning:: USED IN A PREVIOUS VERSION. NOT CURRENTLY USED. Use **deliver_stop_dijkstras** instead.
+
     Delivers the next package off of the truck and updates the state of the truck and package objects.
 
     *This version uses Dijkstra's Algorithm.*
 
     :param Truck truck: the delivering truck
-    :param ChainingHashTable[str, Package] package_hash: Package objects
+    :param PackageStore package_hash: Package objects
     :return:
     """
     # Time complexity O(n)
+    trip = truck.current_trip()
     pkg_id, distance = truck.deliver()
     pkg = package_hash.lookup(pkg_id)  # O(n)
     hours = float(distance) / float(truck.SPEED)
@@ -49,24 +55,130 @@ def deliver_dijkstras(truck, package_hash):
     # Update the truck
     truck.distance += distance
     truck.time = eta
-    truck.current_address = pkg.address
+    truck.current_location = pkg.location_id
+    trip.pkg_ids.append(pkg_id)
+    trip.distance += distance
 
     # Update the package
     pkg.advance_status(eta, truck.id)
 
 
-def return_to_hub(truck_list, hub, location_hash):
+def deliver_stop_dijkstras(truck, package_hash):
+    """
+    .. warning:: USED IN A PREVIOUS VERSION. NOT CURRENTLY USED. Use **deliver_route** instead.
+
+    Delivers every package at the next stop off of the truck in one hop and updates the state of the truck and package
+    objects.
+
+    *This version uses Dijkstra's Algorithm.*
+
+    :param Truck truck: the delivering truck
+    :param PackageStore package_hash: Package objects
+    :return:
+    """
+    # Time complexity O(n)
+    trip = truck.current_trip()
+    pkg_id, distance = truck.deliver()
+    pkg = package_hash.lookup(pkg_id)  # O(n)
+    stop = [pkg]
+
+    # Packages at the same location are sorted together, so they follow the first package
+    while not truck.empty():  # O(n)
+        next_pkg = package_hash.lookup(truck.peek()[0])  # O(n)
+        if next_pkg.location_id != pkg.location_id:
+            break
+        distance += truck.deliver()[1]
+        stop.append(next_pkg)
+
+    hours = float(distance) / float(truck.SPEED)
+    eta = utils.add_time(truck.time, utils.timedelta(hours=hours))
+
+    # Update the truck
+    truck.distance += distance
+    truck.time = eta
+    truck.current_location = pkg.location_id
+    trip.pkg_ids.extend(p.id for p in stop)
+    trip.distance += distance
+
+    # Update the packages
+    for p in stop:
+        p.advance_status(eta, truck.id)
+
+
+def arrival_times(start, legs, speed=Truck.SPEED):
+    """
+    Gets the arrival time of every stop on a route at once, as the running total of the legs driven.
+
+    Only the times are computed, so candidate routes can be compared without changing any truck or package.
+
+    :param float start: the time the route starts, in seconds since midnight
+    :param list[float] legs: the distance driven to each stop in miles, 0 for a package at the same stop as the last
+    :param float speed: the speed of the truck in mph
+    :return: the arrival time at each stop, in seconds since midnight
+    :rtype: list[float]
+    """
+    # Time complexity O(n)
+    seconds_per_mile = 3600.0 / speed
+    return [start + miles * seconds_per_mile for miles in accumulate(legs)]
+
+
+def deliver_route(truck, package_hash):
+    """
+    Delivers every package on the truck in order and updates the state of the truck and package objects.
+
+    The arrival times of the whole route are computed at once, and the packages are marked delivered with one bulk write
+    per column instead of one lookup and status change per package.
+
+    :param Truck truck: the delivering truck
+    :param PackageStore package_hash: Package objects
+    :return:
     """
-    Returns all the trucks provided to the hub and updates their address, time, and distance traveled.
+    # Time complexity O(n)
+    if truck.empty():
+        return
+
+    trip = truck.current_trip()
+    pkg_ids = [pkg_id for pkg_id, _ in truck.packages]
+    legs = [distance for _, distance in truck.packages]
+    start = utils.time_to_seconds(truck.time)
+    arrivals = arrival_times(start, legs, truck.SPEED)  # O(n)
+    rows = package_hash.rows.lookup_many(pkg_ids)  # O(n)
+    distance = sum(legs)
+
+    # Track where the truck is at any time, starting from where it leaves
+    truck.record_stops([start] + arrivals, [truck.distance + miles for miles in accumulate(legs, initial=0.0)],
+                       [truck.current_location] + [package_hash.location_ids[row] for row in rows])  # O(n)
+
+    # Update the packages
+    package_hash.set_values(rows, 'statuses', [Package.STATUS_CODES[Package.DELIVERED]] * len(rows))  # O(n)
+    package_hash.set_values(rows, 'delivered_times', arrivals)  # O(n)
+    package_hash.set_values(rows, 'delivery_trucks', [truck.id] * len(rows))  # O(n)
+
+    # Update the truck
+    truck.packages = list()
+    truck.distance += distance
+    truck.time = utils.seconds_to_time(arrivals[-1])
+    truck.current_location = package_hash.location_ids[rows[-1]]
+    trip.pkg_ids.extend(pkg_ids)
+    trip.distance += distance
+
+
+def return_to_hub(truck_list, edges):
+    """
+    Returns all the trucks provided to their own hubs and updates their location, time, and distance traveled.
 
     :param list[Truck] truck_list: (list) the Truck objects
-    :param str hub: address of the hub
-    :param ChainingHashTable[str, Location] location_hash: the Location objects
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id
     :return:
     """
-    # Time complexity O(n^2)
+    # Time complexity O(n)
     for truck in truck_list:
-        distance_to_hub = location_hash.lookup(truck.current_address).get_distance(hub)  # O(n)
+        distance_to_hub = edges[truck.current_location][truck.hub]  # O(1)
         truck.distance += distance_to_hub
         truck.time = utils.add_time(truck.time, utils.timedelta(hours=distance_to_hub/truck.SPEED))
-        truck.current_address = hub
+        truck.current_location = truck.hub
+        truck.record_stops([utils.time_to_seconds(truck.time)], [truck.distance], [truck.hub])
+
+        if len(truck.trips) > 0 and not truck.trips[-1].returned():
+            truck.trips[-1].distance += distance_to_hub
+            truck.trips[-1].return_time = truck.time
@@ -9,7 +9,7 @@ class Node:
         # Time complexity O(1)
         self.distance = float('inf')
         self.pred = None
-        self.id = id
+        self.id = id  # location id of the Node
 
     def reset(self):
         """
@@ -40,6 +40,7 @@ class Graph:
         # Time complexity O(1)
         self.adjacency_list = {}
         self.edge_weights = {}
+        self.nodes = {}  # Nodes keyed by their location id
         self.dijkstras = False  # A flag to know if Dijkstra's Algorithm has been run on the graph
 
     def add_node(self, node):
@@ -51,6 +52,7 @@ class Graph:
         """
         # Time complexity O(1)
         self.adjacency_list[node] = set()
+        self.nodes[node.id] = node
 
     def add_directed_edge(self, from_node, to_node, weight):
         """
@@ -94,15 +96,12 @@ class Graph:
         """
         Get the node object where the id matches the key.
 
-        :param str key: the key to match the Node's id
+        :param int key: the location id to match the Node's id
         :return: the Node object if found, None if not found
         :rtype: Node
         """
-        # Time complexity O(n)
-        for node in self.adjacency_list:  # O(n)
-            if node.id == key:
-                return node
-        return None
+        # Time complexity O(1)
+        return self.nodes.get(key)
 
 
 def run_dijkstras(g, start_node):
@@ -169,24 +168,96 @@ def build_graph(location_hash):
     """
     Builds the graph object from a Chaining Hash Table of Location objects.
 
-    :param ChainingHashTable[str, Location] location_hash: the Chaining Hash Table of Location objects
+    :param ChainingHashTable[int, Location] location_hash: the Chaining Hash Table of Location objects
     :return: the Graph object
     :rtype: Graph
     """
-    # Time complexity O(n^3)
+    # Time complexity O(n^2)
     g = Graph()
 
     # Add all the nodes to the graph
-    for bucket in location_hash.table:  # O(n^2)
-        for [k, _] in bucket:  # O(n)
-            g.add_node(Node(k))
+    for k in location_hash.keys():  # O(n)
+        g.add_node(Node(k))
 
     # Add all the edges to the graph
-    for node in list(g.adjacency_list.keys()):  # O(n^3)
+    for node in list(g.adjacency_list.keys()):  # O(n^2)
         from_location = location_hash.lookup(node.id)  # O(n)
-        for key in from_location.destinations:  # O(n^2)
+        for key in from_location.destinations:  # O(n)
             edge_weight = from_location.get_distance(key)
-            to_node = g.get_node(key)  # O(n)
+            to_node = g.get_node(key)  # O(1)
             g.add_undirected_edge(node, to_node, edge_weight)
 
     return g
+
+
+def build_distance_matrix(g, size):
+    """
+    Builds a matrix of the shortest path distances between every pair of Nodes in the graph.
+
+    Dijkstra's Algorithm is run from every Node. The matrix is indexed by location id, so the distance between two
+    locations is a constant time lookup. Location ids without a Node in the graph have infinite distances.
+
+    :param Graph g: the Graph object
+    :param int size: the number of location ids, i.e. the length of the AddressIndex
+    :return: the distance matrix
+    :rtype: list[list[float]]
+    """
+    # Time complexity O(n^3)
+    matrix = [[float('inf')] * size for _ in range(size)]
+
+    for start_node in list(g.adjacency_list.keys()):  # O(n^3)
+        g.reset()  # O(n)
+        run_dijkstras(g, start_node)  # O(n^2)
+
+        row = matrix[start_node.id]
+        for node in g.adjacency_list:  # O(n)
+            row[node.id] = node.distance
+
+    g.reset()  # O(n)
+
+    return matrix
+
+
+def build_edge_matrix(location_hash, size):
+    """
+    Builds a matrix of the distances listed in the location file between every pair of locations.
+
+    Unlike the distance matrix, these are the direct distances, not the shortest paths. The matrix is indexed by
+    location id. Pairs without a listed distance have infinite distances.
+
+    :param ChainingHashTable[int, Location] location_hash: the Location objects
+    :param int size: the number of location ids, i.e. the length of the AddressIndex
+    :return: the edge matrix
+    :rtype: list[list[float]]
+    """
+    # Time complexity O(n^2)
+    matrix = [[float('inf')] * size for _ in range(size)]
+
+    for location_id in location_hash.keys():  # O(n^2)
+        row = matrix[location_id]
+        for destination, distance in location_hash.lookup(location_id).destinations.items():  # O(n)
+            row[destination] = distance
+
+    return matrix
+
+
+def shortest_distances(g, location_id):
+    """
+    Gets the shortest path distances from a location to every location.
+
+    A Graph runs Dijkstra's Algorithm from the location. A distance matrix, built by build_distance_matrix, already
+    holds them in the row of the location, so a matrix can be used in place of the Graph, e.g. by a worker process that
+    attaches to a shared matrix instead of building its own Graph.
+
+    :param g: the Graph object, or the distance matrix indexed by location id
+    :param int location_id: the location id of the location
+    :return: the distance to each location, indexed by location id
+    """
+    # Time complexity O(n^2) for a Graph, O(1) for a matrix
+    if not isinstance(g, Graph):
+        return g[location_id]
+
+    g.reset()  # O(n)
+    run_dijkstras(g, g.get_node(location_id))  # O(n^2)
+
+    return {node.id: node.distance for node in g.adjacency_list}  # O(n)
@@ -0,0 +1,151 @@
+# Module for sizing the fleet of one hub
+# The smallest number of trucks that delivers every package on time is found by an exponential search over the truck
+# count. Each truck count is planned in a worker process, several counts at a time. The packages and the distance
+# matrices are put in shared memory once and every worker attaches to them, so no trial reads the csv files again.
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import csv_parsing.location_csv as location_csv
+import csv_parsing.package_csv as package_csv
+import dijkstras
+import hubs
+from data_structures.address_index import AddressIndex
+from data_structures.flat_hash_table import FlatHashTable
+from data_structures.shared_matrix import SharedMatrix
+
+MAX_TRUCKS = 64  # most trucks tried
+
+
+def search_points(low, high, count, step=None):
+    """
+    Gets the truck counts to plan in one round of the search.
+
+    While galloping, the counts are low + step * 2^i - 1, so each count is about double the last. Otherwise the counts
+    split the range evenly, so one count is the midpoint of a binary search and more counts make a k-ary search that
+    narrows the range faster with more workers.
+
+    :param int low: the fewest trucks that may be enough
+    :param int high: one more than the most trucks that may be needed
+    :param int count: the most truck counts to plan
+    :param int step: the first gap while galloping, None once a fleet that is enough was found
+    :return: the truck counts, fewest first, each at least low and less than high
+    :rtype: list[int]
+    """
+    # Time complexity O(k) for k counts
+    if step is not None:
+        return sorted({min(low + step * 2 ** i - 1, high - 1) for i in range(count)})
+
+    return sorted({low + (high - low) * i // (count + 1) for i in range(1, count + 1)})
+
+
+def evaluate(package_hash, trucks, truck_list, left, records):
+    """
+    Measures a plan made by a worker, without changing the package store.
+
+    :param PackageStore package_hash: the Package objects
+    :param int trucks: the number of trucks
+    :param list[Truck] truck_list: the trucks
+    :param list[list[str]] left: the package ids that were not delivered
+    :param dict[str -> dict] records: the planned columns of each package
+    :return: the number of trucks, the total miles, the number of late packages and the number of packages left
+    :rtype: dict
+    """
+    # Time complexity O(n)
+    late = sum(1 for pid, record in records.items()
+               if record['delivered_times'] > package_hash.deadlines[package_hash.rows.lookup(pid)])  # O(n)
+
+    return {
+        'trucks': trucks,
+        'miles': sum(truck.distance for truck in truck_list),
+        'late': late,
+        'left': sum(len(package_list) for package_list in left),
+    }
+
+
+def size_fleet(package_file, hub_address, loader='nearest', sequencer='nearest', anneal=0.0, max_trucks=MAX_TRUCKS,
+               workers=None):
+    """
+    Finds the fewest trucks at a hub that deliver every package on time.
+
+    The search starts at the highest truck a package requires and gallops up, doubling the gap, until a fleet is
+    enough. It then binary searches the counts between the most trucks that were not enough and the fewest that were.
+    Each round plans up to one truck count per worker. Loading is greedy, so more trucks are not always better, and
+    galloping up from the fewest trucks keeps a small fleet that is enough from being skipped over.
+
+    :param str package_file: the path of the package file
+    :param str hub_address: the address of the hub
+    :param str loader: the loader used to load the trucks, one of scheduling.LOADERS
+    :param str sequencer: the sequencer used to order each truck's packages, one of scheduling.SEQUENCERS
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :param int max_trucks: the most trucks tried
+    :param int workers: the number of worker processes, None for one per CPU
+    :return: the result of each truck count that was planned, fewest trucks first, as returned by evaluate, and the
+             fewest trucks that deliver every package on time, None if max_trucks are not enough
+    :rtype: tuple[list[dict], int]
+    """
+    # Time complexity O(log t * n^7) for at most t trucks
+    address_index = AddressIndex()
+    location_hash = location_csv.read(address_index)  # O(n^3)
+    graph = dijkstras.build_graph(location_hash)  # O(n^2)
+    matrix = dijkstras.build_distance_matrix(graph, len(address_index))  # O(n^3)
+    edges = dijkstras.build_edge_matrix(location_hash, len(address_index))  # O(n^2)
+    hub = hubs.find_hubs(address_index, [hub_address])[0]
+    package_hash, pending, delayed, sibling_sets = package_csv.read(address_index, package_file)  # O(n^3)
+
+    package_lists = [list(delayed), list(pending)]
+    workers = workers or os.cpu_count() or 1
+    results = dict()  # number of trucks -> result
+    low = max([1] + [pkg.req_truck for pkg in package_hash.values() if pkg.req_truck])  # O(n)
+    high = max_trucks + 1
+    step = 1  # first gap while galloping, None once a fleet that is enough was found
+
+    table = FlatHashTable.share(package_hash.flat_pairs())  # O(n)
+    distances = [SharedMatrix.publish(matrix), SharedMatrix.publish(edges)]  # O(n^2)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=hubs.share_locations,
+                                 initargs=(address_index, *distances)) as executor:
+            while low < high:  # O(log t) rounds
+                points = search_points(low, high, workers, step)
+                step = step * 2 ** workers if step is not None else None
+                futures = {trucks: executor.submit(hubs.plan_hub, table.owner.name, hub, 1, package_lists,
+                                                   sibling_sets, loader, sequencer, anneal, None, trucks)
+                           for trucks in points}
+
+                for trucks in points:  # O(k * n^7)
+                    results[trucks] = evaluate(package_hash, trucks, *futures[trucks].result())
+
+                for trucks in points:
+                    if results[trucks]['late'] == 0 and results[trucks]['left'] == 0:
+                        high = trucks
+                        step = None
+                        break
+                    low = trucks + 1
+    finally:
+        table.close()
+        table.owner.unlink()
+        for shared in distances:
+            shared.close()
+            shared.owner.unlink()
+
+    return [results[trucks] for trucks in sorted(results)], (high if high <= max_trucks else None)
+
+
+def print_results(results, fewest):
+    """
+    Prints the results of a fleet search as a table, one truck count per row, and the fewest trucks that are enough.
+
+    :param list[dict] results: the results, as returned by size_fleet
+    :param int fewest: the fewest trucks that deliver every package on time, None if none were found
+    :return:
+    """
+    # Time complexity O(t) for t truck counts
+    print(f'{"Trucks":>6} {"Miles":>9} {"Late":>6} {"Left":>6}')
+
+    for r in results:
+        print(f'{r["trucks"]:>6} {r["miles"]:>9.1f} {r["late"]:>6} {r["left"]:>6}')
+
+    if fewest is None:
+        print('No fleet that was tried delivers every package on time.')
+    else:
+        print(f'Fewest trucks that deliver every package on time: {fewest}')
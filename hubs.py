@@ -0,0 +1,259 @@
+# Module for planning a day across several hubs
+# Packages are partitioned to the hub nearest their destination, and each hub's packages are planned with that hub's
+# trucks in a separate worker process. Workers read their packages from a FlatHashTable in shared memory instead of
+# reading the package file again. The distance matrices are published once into shared memory and every worker
+# attaches to them, so the workers neither read the location file nor build their own Locations and Graph.
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time
+
+import csv_parsing.location_csv as location_csv
+import dijkstras
+import scheduling
+from data_structures.address_index import AddressIndex
+from data_structures.flat_hash_table import FlatHashTable
+from data_structures.deadline_queue import DeadlineQueue
+from data_structures.package_store import PackageStore
+from data_structures.pending_queue import DelayedQueue
+from data_structures.shared_matrix import SharedMatrix
+from models.truck import Truck
+
+TRUCKS_PER_HUB = 2  # trucks 1 and 2 belong to the first hub, 3 and 4 to the second, and so on
+RESULT_COLUMNS = ('addresses', 'location_ids', 'statuses', 'delivery_trucks', 'at_hub_times', 'en_route_times',
+                  'delivered_times')
+
+worker_locations = None  # (address index, matrix, edges) of a worker process, set by share_locations
+
+
+def find_hubs(address_index, addresses):
+    """
+    Gets the location ids of the hubs.
+
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[str] addresses: the addresses of the hubs
+    :return: the location id of each hub
+    :rtype: list[int]
+    :raises ValueError: if an address is not a known location
+    """
+    # Time complexity O(h) for h hubs
+    hub_ids = list()
+
+    for address in addresses:
+        hub_ids.append(address_index.get_id(address))
+        if hub_ids[-1] is None:
+            raise ValueError(f'Hub {address} is not a known location.')
+
+    return hub_ids
+
+
+def plan(package_hash, hub_ids, graph, matrix, edges, address_index, package_lists, sibling_sets, loader='nearest',
+         sequencer='nearest', anneal=0.0, report=None, updates=None):
+    """
+    Plans and simulates the day with two trucks at each hub. One hub is planned in this process, several hubs are
+    planned in parallel by plan_hubs.
+
+    Streamed updates reach the schedule of a hub planned in this process, so they can only be used with one hub.
+
+    :param PackageStore package_hash: the Package objects
+    :param list[int] hub_ids: the location ids of the hubs
+    :param Graph graph: the Graph structure of the locations
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[PendingQueue] package_lists: the delayed package ids and the package ids waiting to be loaded
+    :param list[set[str]] sibling_sets: the sets of package ids that must be loaded together
+    :param str loader: the loader used to load the trucks, one of scheduling.LOADERS
+    :param str sequencer: the sequencer used to order each truck's packages, one of scheduling.SEQUENCERS
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :param report: called with the progress of the annealing, see local_search.anneal_routes, None for no reports
+    :param UpdateFeed updates: the streamed package updates, None for none
+    :return: the trucks and the package ids that were not delivered
+    :rtype: tuple[list[Truck], list[PendingQueue]]
+    :raises ValueError: if updates are given with more than one hub
+    """
+    # Time complexity O(n^7)
+    if len(hub_ids) > 1 and updates is not None:
+        raise ValueError('Package updates can only be streamed into the plan of one hub.')
+
+    if len(hub_ids) > 1:
+        return plan_hubs(package_hash, hub_ids, matrix, edges, address_index, package_lists, sibling_sets, loader,
+                         sequencer, anneal, report)  # O(n^7)
+
+    delayed, pending = package_lists
+    truck_list = [Truck(i + 1, time(8), hub_ids[0]) for i in range(TRUCKS_PER_HUB)]
+
+    scheduling.schedule(truck_list, package_hash, pending, delayed, sibling_sets, graph, matrix, edges, address_index,
+                        loader, sequencer, anneal, report, updates)  # O(n^7)
+
+    return truck_list, package_lists
+
+
+def partition(package_hash, hub_ids, matrix, sibling_sets):
+    """
+    Assigns every package to a hub.
+
+    A package that requires a truck goes to that truck's hub. Other packages go to the hub nearest their destination.
+    Sibling packages must share a truck, so each sibling set goes to the hub required by one of its packages, or else
+    to the hub with the least total distance to all of them.
+
+    :param PackageStore package_hash: the Package objects
+    :param list[int] hub_ids: the location ids of the hubs
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[set[str]] sibling_sets: the sets of package ids that must be loaded together
+    :return: the index of the hub of each package keyed by package id
+    :rtype: dict[str -> int]
+    """
+    # Time complexity O(n*h) for h hubs
+    hubs = range(len(hub_ids))
+    assignment = dict()
+
+    for pid, pkg in package_hash.items():  # O(n*h)
+        if pkg.req_truck:
+            assignment[pid] = min((pkg.req_truck - 1) // TRUCKS_PER_HUB, len(hub_ids) - 1)
+        else:
+            assignment[pid] = min(hubs, key=lambda h: matrix[hub_ids[h]][pkg.location_id])
+
+    for sib_set in sibling_sets:  # O(n*h)
+        pkgs = package_hash.lookup_many(sib_set)
+        required = [assignment[pkg.id] for pkg in pkgs if pkg.req_truck]
+        hub = required[0] if required else min(hubs, key=lambda h: sum(matrix[hub_ids[h]][pkg.location_id]
+                                                                         for pkg in pkgs))
+        for pkg in pkgs:
+            assignment[pkg.id] = hub
+
+    return assignment
+
+
+def share_locations(address_index, matrix, edges):
+    """
+    Keeps the address index and the distances for every plan_hub run by this worker process. Runs once when the worker
+    starts.
+
+    The matrices are SharedMatrix objects, which reach the worker as the names of their shared memory blocks, so the
+    worker attaches to the published matrices instead of holding its own copies.
+
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param SharedMatrix matrix: the distances between locations, indexed by location id
+    :param SharedMatrix edges: the distances listed in the location file, indexed by location id
+    :return:
+    """
+    # Time complexity O(n) for n locations
+    global worker_locations
+    worker_locations = (address_index, matrix, edges)
+
+
+def plan_hub(table_name, hub, first_truck_id, package_lists, sibling_sets, loader, sequencer, anneal=0.0,
+             report=None, trucks=TRUCKS_PER_HUB):
+    """
+    Plans and simulates one hub's packages. Runs in a worker process.
+
+    The worker's shared distances are used if share_locations was run, with the distance matrix in place of the Graph.
+    Otherwise the location file is read.
+
+    :param str table_name: the name of the shared memory holding every package in a FlatHashTable
+    :param int hub: the location id of the hub
+    :param int first_truck_id: the id of the hub's first truck
+    :param list[list[str]] package_lists: the hub's delayed package ids and package ids waiting to be loaded
+    :param list[set[str]] sibling_sets: the hub's sets of package ids that must be loaded together
+    :param str loader: the loader used to load the trucks, one of scheduling.LOADERS
+    :param str sequencer: the sequencer used to order each truck's packages, one of scheduling.SEQUENCERS
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :param report: called with the progress of the annealing, see local_search.anneal_routes, None for no reports
+    :param int trucks: the number of trucks at the hub
+    :return: the trucks, the lists of package ids that were not delivered and the planned columns of each package
+    :rtype: tuple[list[Truck], list[list[str]], dict[str -> dict]]
+    """
+    # Time complexity O(n^7)
+    if worker_locations is not None:
+        address_index, matrix, edges = worker_locations
+        graph = matrix  # the rows of the matrix hold the distances Dijkstra's Algorithm would find
+    else:
+        address_index = AddressIndex()
+        location_hash = location_csv.read(address_index)  # O(n^3)
+        graph = dijkstras.build_graph(location_hash)  # O(n^2)
+        matrix = dijkstras.build_distance_matrix(graph, len(address_index))  # O(n^3)
+        edges = dijkstras.build_edge_matrix(location_hash, len(address_index))  # O(n^2)
+
+    table = FlatHashTable.attach(table_name)
+    try:
+        package_hash = PackageStore(max(sum(len(package_list) for package_list in package_lists), 10))
+        for record in table.lookup_many(itertools.chain(*package_lists)):  # O(n)
+            package_hash.add_record(json.loads(record))
+    finally:
+        table.close()
+
+    delayed = DelayedQueue(package_hash, package_lists[0])  # O(n log n)
+    pending = DeadlineQueue(package_hash, package_lists[1])  # O(n)
+    truck_list = [Truck(first_truck_id + i, time(8), hub) for i in range(trucks)]
+
+    scheduling.schedule(truck_list, package_hash, pending, delayed, sibling_sets, graph, matrix, edges, address_index,
+                        loader, sequencer, anneal, report)  # O(n^7)
+
+    records = {pid: {column: getattr(package_hash, column)[row] for column in RESULT_COLUMNS}
+               for row, pid in enumerate(package_hash.ids)}  # O(n)
+
+    left = [list(delayed), list(pending)]  # O(n)
+
+    return truck_list, left, records
+
+
+def plan_hubs(package_hash, hub_ids, matrix, edges, address_index, package_lists, sibling_sets, loader='nearest',
+              sequencer='nearest', anneal=0.0, report=None):
+    """
+    Plans and simulates the day with two trucks at each hub, planning every hub in parallel.
+
+    The packages and distances are put in shared memory once and each worker process only reads the packages of its
+    own hub. The planned columns of every package are copied back into the store when the workers finish.
+
+    :param PackageStore package_hash: the Package objects
+    :param list[int] hub_ids: the location ids of the hubs
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[PendingQueue] package_lists: the delayed package ids and the package ids waiting to be loaded
+    :param list[set[str]] sibling_sets: the sets of package ids that must be loaded together
+    :param str loader: the loader used to load the trucks, one of scheduling.LOADERS
+    :param str sequencer: the sequencer used to order each truck's packages, one of scheduling.SEQUENCERS
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :param report: called with the progress of the annealing, see local_search.anneal_routes, None for no reports
+    :return: the trucks of every hub and the package ids that were not delivered
+    :rtype: tuple[list[Truck], list[PendingQueue]]
+    """
+    # Time complexity O(n^7)
+    assignment = partition(package_hash, hub_ids, matrix, sibling_sets)  # O(n*h)
+    table = FlatHashTable.share(package_hash.flat_pairs())  # O(n)
+    distances = [SharedMatrix.publish(matrix), SharedMatrix.publish(edges)]  # O(m^2) for m locations
+
+    try:
+        with ProcessPoolExecutor(max_workers=len(hub_ids), initializer=share_locations,
+                                 initargs=(address_index, *distances)) as executor:
+            futures = [executor.submit(plan_hub, table.owner.name, hub, h * TRUCKS_PER_HUB + 1,
+                                       [[pid for pid in package_list if assignment[pid] == h]
+                                        for package_list in package_lists],
+                                       [sib_set for sib_set in sibling_sets if assignment[next(iter(sib_set))] == h],
+                                       loader, sequencer, anneal, report)
+                       for h, hub in enumerate(hub_ids)]
+            results = [future.result() for future in futures]
+    finally:
+        table.close()
+        table.owner.unlink()
+        for shared in distances:
+            shared.close()
+            shared.owner.unlink()
+
+    truck_list = list()
+    left = [DelayedQueue(package_hash), DeadlineQueue(package_hash)]
+
+    for trucks, hub_lists, records in results:  # O(n)
+        truck_list.extend(trucks)
+        for package_list, hub_list in zip(left, hub_lists):
+            package_list.extend(hub_list)
+
+        for pid, record in records.items():
+            row = package_hash.rows.lookup(pid)
+            for column, value in record.items():
+                if getattr(package_hash, column)[row] != value:
+                    package_hash.set_value(row, column, value)
+
+    return truck_list, left
@@ -2,59 +2,70 @@
 from datetime import time
 
 
-def check_issues(truck_time, delayed, priority_dict, package_hash):
+def check_issues(truck_time, delayed, pending, package_hash, address_index, updates=None, truck_list=(),
+                 matrix=None, edges=None):
     """
     Checks the status of all issues of delayed packages and addresses them.
 
+    Without an update feed, the known address correction of the package file is applied. With a feed, the updates that
+    are due are applied instead, and the feed is expected to carry any address corrections.
+
     :param datetime.time truck_time: the time to check the status
-    :param list[str] delayed: list of package ids that are delayed
-    :param dict[datetime.time -> list[str]] priority_dict: package lists associated with each deadline
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param DelayedQueue delayed: the ids of the packages that are delayed
+    :param DeadlineQueue pending: the ids of the packages waiting to be loaded
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param UpdateFeed updates: the streamed package updates, None for the known address correction
+    :param list[Truck] truck_list: the trucks that updates may re-plan, from the next time each leaves the hub
+    :param list[list[float]] matrix: the distances between locations, indexed by location id, needed with updates
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id, used to re-plan
+                                    the trip back to the hub of a trip that has left
     :return:
     """
-    # Time complexity O(n^2)
+    # Time complexity O(n + k * n) for k packages that arrived, O(u * n^2) more for u updates
 
-    if truck_time >= time(10, 20):
-        fix_address(9, '410 S State St', package_hash)
+    if updates is not None:
+        updates.apply_due(truck_time, truck_list, delayed, pending, package_hash, address_index, matrix,
+                          edges)  # O(u * n^2)
+    elif truck_time >= time(10, 20):
+        fix_address(9, '410 S State St', package_hash, address_index)
 
-    add_delayed(truck_time, delayed, package_hash, priority_dict)  # O(n^2)
+    add_delayed(truck_time, delayed, package_hash, pending)  # O(k * n)
 
 
-def fix_address(pkg_id, new_address, package_hash):
+def fix_address(pkg_id, new_address, package_hash, address_index):
     """
     Replaces the current address of a package with a new address.
 
     :param str pkg_id: id of the package
     :param str new_address: the new address of the package
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index used to intern addresses to location ids
     :return:
     """
     # Time complexity O(n)
     pkg = package_hash.lookup(str(pkg_id))  # O(n)
+
+    # The package is planned from another hub
+    if pkg is None:
+        return
+
     pkg.address = new_address
+    pkg.location_id = address_index.intern(new_address)
 
 
-def add_delayed(curr_time, delayed_pkgs, package_hash, priority_dict):
+def add_delayed(curr_time, delayed_pkgs, package_hash, pending):
     """
-    If any packages have reached their delayed time, they are added to the appropriate package list.
+    If any packages have reached their delayed time, they are added to the packages waiting to be loaded.
 
     :param datetime.time curr_time: the time to check packages
-    :param list[str] delayed_pkgs: list of delayed package ids
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
-    :param dict[datetime.time -> list[str]] priority_dict: package lists associated with each deadline
+    :param DelayedQueue delayed_pkgs: the delayed package ids
+    :param PackageStore package_hash: the Package objects
+    :param DeadlineQueue pending: the ids of the packages waiting to be loaded
     :return:
     """
-    # Time complexity O(n^2)
-
-    altered_pkgs = list()
-
-    for pkg_id in delayed_pkgs:  # O(n^2)
-        pkg = package_hash.lookup(pkg_id)  # O(n)
-
-        if pkg.delay_time <= curr_time:
-            pkg.advance_status(pkg.delay_time)
-            priority_dict[pkg.deadline].append(pkg.id)
-            altered_pkgs.append(pkg_id)
+    # Time complexity O(k * n) for k packages that arrived
 
-    for pkg_id in altered_pkgs:  # O(n^2)
-        delayed_pkgs.remove(pkg_id)  # O(n)
+    for pkg in package_hash.lookup_many(delayed_pkgs.pop_arrived(curr_time)):  # O(k * n)
+        pkg.advance_status(pkg.delay_time)
+        pending.append(pkg.id)
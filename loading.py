@@ -1,134 +1,408 @@
 # Module for loading packages onto the truck and associated methods
+import heapq
+import time
+from operator import add
+
+import clustering
 import dijkstras
+from models.package import Package
+from models.route import Route
+from models.stop import Stop
+from models.truck import Truck
+import utils
 
-HUB_ADDRESS = '4001 South 700 East'
+HUB_ADDRESS = '4001 South 700 East'  # display address of the hub, trucks carry the hub's location id
+EXACT_MAX_STOPS = 12  # trucks with more stops than this are sorted heuristically
+EXACT_TIME_BUDGET = 0.5  # seconds an exact sort may take before falling back to the heuristic
+CLUSTER_POOL = 4  # truck loads of packages clustered for each truck being loaded
 
 
-def load_package_dijkstras(truck, pkg_id_list, g, package_hash):
+def load_package_dijkstras(truck, pkg_id_list, g, package_hash, matrix=None, route=None):
     """
-    Loads the next package onto a truck.
+    Loads the packages at the next stop onto a truck.
 
-    Nearest neighbor of the previous package added onto the truck is used to find the next package. If the truck is
-    empty, then the nearest neighbor of the Hub is used.
+    Packages are grouped into stops by location id, and the nearest neighbor stop of the previous package added onto
+    the truck is used to find the next stop. If the truck is empty, then the nearest neighbor of the Hub is used. Every
+    package at the stop that is allowed on the truck is loaded, as far as the truck has room.
+
+    If a distance matrix is given, the truck's packages are kept in the order of its Route. Stops that could not be
+    added to the route without a delivery being late are skipped, unless every stop would be late, and the packages
+    loaded from the stop are inserted as one stop, between two stops of the route, where it adds the least distance
+    with every delivery on time. If the route already visits the stop's location, the packages join the stop there, so
+    the truck does not return to an address it has left. The order the truck drives is the one whose deadlines were
+    checked. A stop that would be late anywhere is added to the end of the route with its deadline ignored, so a package
+    that cannot be on time does not keep other packages from being inserted before it.
 
     *This version uses Dijkstra's Algorithm.*
 
     :param Truck truck: the truck being loaded
-    :param list[str] pkg_id_list: the list of package ids currently being loaded from
+    :param PendingQueue pkg_id_list: the list of package ids currently being loaded from
     :param Graph g: the Graph structure that Dijkstra's Algorithm has been run on
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param Route route: the route of the truck's packages, kept up to date as packages are loaded, built from the
+                        truck if not given
     :return: True if a package was found to load onto the truck, False if no package was available to be loaded
     """
     # Time complexity O(n^2)
     if not truck.full() and len(pkg_id_list) > 0:
-        if truck.last_package_dijkstras() == -1:
-            truck_add = HUB_ADDRESS
-        else:
-            truck_add = package_hash.lookup(truck.last_package_dijkstras()).address  # O(n)
+        if matrix is not None and route is None:
+            route = build_route(truck, package_hash, matrix)  # O(n^2)
 
-        next_pkg_id, next_pkg_distance = find_closest_pkg_dijkstras(truck_add, truck.id, pkg_id_list, g, package_hash)  # O(n^2)
+        if route is not None:
+            truck_loc = route.location_before(len(route))
+        elif truck.last_package_dijkstras() == -1:
+            truck_loc = truck.hub
+        else:
+            truck_loc = package_hash.lookup(truck.last_package_dijkstras()).location_id  # O(n)
 
-        next_pkg = package_hash.lookup(next_pkg_id)  # O(n)
+        allowed = [pkg_id for pkg_id, pkg in zip(pkg_id_list, package_hash.lookup_many(pkg_id_list))
+                   if not pkg.req_truck or pkg.req_truck == truck.id]  # O(n)
+        next_stop, next_stop_distance = find_closest_stop_dijkstras(truck_loc, Stop.group(allowed, package_hash), g,
+                                                                    route)  # O(n^2)
 
-        if not next_pkg:
+        if next_stop is None:
             return False
-        else:
-            truck.add_package_dijkstras(next_pkg_id, next_pkg_distance)
-            package_hash.lookup(next_pkg_id).advance_status(truck.time, truck.id)  # O(n)
-            pkg_id_list.remove(next_pkg_id)  # O(n)
-            return True
+
+        if route is not None:
+            best = route.best_insertion(next_stop.location_id, next_stop.deadline)  # O(n)
+            loaded = Stop(next_stop.location_id)
+
+        for pkg_id in next_stop.pkg_ids:  # O(n^2)
+            if truck.full():
+                break
+
+            pkg = package_hash.lookup(pkg_id)  # O(n)
+
+            if route is None:
+                truck.add_package_dijkstras(pkg_id, next_stop_distance)
+                next_stop_distance = 0.0
+            else:
+                loaded.add(pkg_id, pkg.deadline if best is not None else Package.PRIORITY_3)
+                truck.add_package_dijkstras(pkg_id, 0.0)
+
+            pkg.advance_status(truck.time, truck.id)
+            pkg_id_list.remove(pkg_id)  # O(1)
+
+        if route is not None:
+            route.insert(loaded, len(route) if best is None else best[0])  # O(n)
+            follow_route(truck, route)  # O(n)
+
+        return True
+
+    return False
+
+
+def follow_route(truck, route):
+    """
+    Orders the packages on a truck as they are on its Route, with the distance of each leg. Every package after the
+    first at a stop is 0 miles away.
+
+    :param Truck truck: the truck
+    :param Route route: the route of every package on the truck
+    :return:
+    """
+    # Time complexity O(n)
+    truck.packages = [(pkg_id, route.matrix[route.location_before(i)][stop.location_id] if j == 0 else 0.0)
+                      for i, stop in enumerate(route.stops) for j, pkg_id in enumerate(stop.pkg_ids)]  # O(n)
+
+
+def find_closest_stop_dijkstras(curr_loc, stops, g, route=None):
+    """
+    Finds the nearest stop to the current location.
+
+    If a route is given, stops that cannot be inserted anywhere on the route with every delivery still on time are
+    passed over. The closest of those stops is only returned if there is no other stop.
+
+    *This version uses Dijkstra's Algorithm.*
+
+    :param int curr_loc: the location id of the current location
+    :param list[Stop] stops: the stops to choose from
+    :param g: the Graph structure that Dijkstra's Algorithm is run on, or the distance matrix in its place
+    :param Route route: the route of the truck, used to check deadlines
+    :return: the closest stop and its distance, None if there are no stops
+    :rtype: tuple[Stop, float]
+    """
+    # Time complexity O(n^2)
+    min_stop = None
+    min_stop_distance = float('inf')
+    late_stop = None
+    late_stop_distance = float('inf')
+
+    distances = dijkstras.shortest_distances(g, curr_loc)  # O(n^2)
+
+    for stop in stops:  # O(n)
+        distance = distances[stop.location_id]
+
+        if distance < min_stop_distance:
+            # Skip the stop if it would make a delivery late
+            if route is not None and route.best_insertion(stop.location_id, stop.deadline) is None:  # O(n)
+                if distance < late_stop_distance:
+                    late_stop = stop
+                    late_stop_distance = distance
+                continue
+
+            min_stop = stop
+            min_stop_distance = distance
+
+    if min_stop is None:
+        return late_stop, late_stop_distance
+
+    return min_stop, min_stop_distance
 
 
-def find_closest_pkg_dijkstras(curr_add, truck_id, pkg_id_list, g, package_hash):
+def find_closest_pkg_dijkstras(curr_loc, truck_id, pkg_id_list, g, package_hash, route=None):
     """
-    Finds the nearest package destination to the current address that is allowed on the specific truck.
+    .. warning:: USED IN A PREVIOUS VERSION. NOT CURRENTLY USED. Use **find_closest_stop_dijkstras** instead.
+
+    Finds the nearest package destination to the current location that is allowed on the specific truck.
+
+    Packages are grouped into stops, so each destination is only checked once. If a route is given, packages that cannot
+    be inserted anywhere on the route with every delivery still on time are passed over. The closest of those packages
+    is only returned if no other package is allowed on the truck.
 
     *This version uses Dijkstra's Algorithm.*
 
-    :param str curr_add: the current address
+    :param int curr_loc: the location id of the current location
     :param int truck_id: the id of the current truck
-    :param list[str] pkg_id_list: the package ids currently being loaded
+    :param PendingQueue pkg_id_list: the package ids currently being loaded
     :param Graph g: the Graph structure that Dijkstra's Algorithm has been run on
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param PackageStore package_hash: the Package objects
+    :param Route route: the route of the truck, used to check deadlines
     :return: the id of the closest package destination, '-1' if none found
     :rtype: str
     """
     # Time complexity O(n^2)
-    min_pkg_id = '-1'
-    min_pkg_distance = float('inf')
+    allowed = [pkg_id for pkg_id, pkg in zip(pkg_id_list, package_hash.lookup_many(pkg_id_list))
+               if not pkg.req_truck or pkg.req_truck == truck_id]  # O(n)
+    stop, distance = find_closest_stop_dijkstras(curr_loc, Stop.group(allowed, package_hash), g, route)  # O(n^2)
 
-    g.reset()  # O(n)
-    start_node = g.get_node(curr_add)  # O(n)
-    dijkstras.run_dijkstras(g, start_node)  # O(n^2)
+    if stop is None:
+        return '-1', distance
 
-    for pkg_id in pkg_id_list:  # O(n^2)
-        pkg = package_hash.lookup(pkg_id)  # O(n)
+    return stop.pkg_ids[0], distance
 
-        # Skip the package if cannot be loaded on this truck
-        if pkg.req_truck and pkg.req_truck != truck_id:
-            continue
 
-        end_node = g.get_node(pkg.address)  # O(n)
+def build_route(truck, package_hash, matrix, start_time=None):
+    """
+    Builds the Route of the packages on a truck, in the order they are loaded. Packages at a location the route already
+    visits join the stop there.
+
+    :param Truck truck: the truck
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param datetime.time start_time: the time the route starts, None for the truck's time
+    :return: the route of the truck
+    :rtype: Route
+    """
+    # Time complexity O(n^2)
+    route = Route(truck.current_location, truck.time if start_time is None else start_time, matrix, truck.SPEED)
+    pkg_ids = [pkg_id for (pkg_id, _) in truck.packages]
 
-        if end_node.distance < min_pkg_distance:
-            min_pkg_id = pkg_id
-            min_pkg_distance = end_node.distance
+    for pkg_id, pkg in zip(pkg_ids, package_hash.lookup_many(pkg_ids)):  # O(n^2)
+        route.append(Stop(pkg.location_id, [pkg_id], pkg.deadline))  # O(n)
 
-    return min_pkg_id, min_pkg_distance
+    return route
 
 
 def sort_truck_dijkstras(truck, g, package_hash):
     """
-    Sorts the packages on a truck, starting from the closest to the hub.
+    Sorts the packages on a truck by stop, starting from the stop closest to the hub.
+
+    Packages at the same stop are kept together, so every package after the first at a stop is 0 miles away.
 
     *This version uses Dijkstra's Algorithm.*
 
     :param Truck truck: the truck being sorted
     :param Graph g: the Graph structure that Dijkstra's Algorithm has been run on
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param PackageStore package_hash: the Package objects
     :return:
     """
     # Time complexity O(n^3)
-    sorted_pkgs = list()
-    sorted_distances = list()
+    stops = Stop.group([pkg_id for (pkg_id, _) in truck.packages], package_hash)  # O(n)
+    curr_loc = truck.hub
+    truck.packages = list()
 
-    while len(sorted_pkgs) < len(truck.packages):  # O(n^3)
-        if len(sorted_pkgs) == 0:
-            curr_add = HUB_ADDRESS
-        else:
-            last_pkg = package_hash.lookup(sorted_pkgs[-1])  # O(n)
-            curr_add = last_pkg.address
+    while len(stops) > 0:  # O(n^3)
+        stop, distance = find_closest_stop_dijkstras(curr_loc, stops, g)  # O(n^2)
+        stops.remove(stop)  # O(n)
+        curr_loc = stop.location_id
 
-        pkg_list = list()
-        for (pkg_id, _) in truck.packages:  # O(n)
-            if pkg_id not in sorted_pkgs:
-                pkg_list.append(pkg_id)
+        for pkg_id in stop.pkg_ids:
+            truck.packages.append((pkg_id, distance))
+            distance = 0.0
 
-        min_pkg_id, min_pkg_distance = find_closest_pkg_dijkstras(curr_add, truck.id, pkg_list, g, package_hash)  # O(n^2)
-        sorted_pkgs.append(min_pkg_id)
-        sorted_distances.append(min_pkg_distance)
 
-    truck.packages = list(zip(sorted_pkgs, sorted_distances))
+def sort_truck_exact(truck, matrix, package_hash, g=None, max_stops=EXACT_MAX_STOPS, time_budget=EXACT_TIME_BUDGET):
+    """
+    Sorts the packages on a truck into the shortest possible trip out of the hub and back.
+
+    Packages are collapsed into their distinct stops and the Held-Karp bitmask dynamic program is solved over the
+    distance submatrix of those stops. Each step of the program takes the minimum over a whole row of the previous step,
+    so the inner loop runs in C rather than Python. The shortest trip is used in whichever direction delivers every
+    package on time, but only if it is shorter than the current order and no later.
 
+    If the truck has more than max_stops stops, or the program runs longer than the time budget, the truck is sorted
+    with sort_truck_dijkstras instead when a graph is given, otherwise the current order is kept.
 
-def initiate_loading_dijkstras(truck_list, package_lists, g, package_hash):
+    :param Truck truck: the truck being sorted
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :param Graph g: the Graph structure used by the fallback heuristic
+    :param int max_stops: the largest number of stops solved exactly
+    :param float time_budget: the most seconds the exact solve may take
+    :return: True if the exact order was used
+    """
+    # Time complexity O(2^n * n^2) for n stops
+    pkg_ids = [pkg_id for (pkg_id, _) in truck.packages]
+    pkgs = dict(zip(pkg_ids, package_hash.lookup_many(pkg_ids)))  # O(n)
+    stops = {stop.location_id: stop for stop in Stop.group(pkg_ids, package_hash)}  # O(n)
+
+    locs = list(stops.keys())
+    n = len(locs)
+    tour = held_karp(locs, truck.hub, matrix, time.perf_counter() + time_budget) if 0 < n <= max_stops else None
+
+    if tour is None:
+        if g is not None and n > 0:
+            sort_truck_dijkstras(truck, g, package_hash)  # O(n^3)
+        return False
+
+    # Use the direction that is on time, if the current order is no better
+    current = [pkgs[pkg_id].location_id for pkg_id in pkg_ids]
+    current_late = trip_lateness(current, truck, matrix, pkgs, stops)
+    best = None
+
+    for order in (tour, tour[::-1]):
+        late = trip_lateness(order, truck, matrix, pkgs, stops)
+        if late <= current_late and (best is None or late < best[0]):
+            best = (late, order)
+
+    if best is None or trip_distance(best[1], truck.hub, matrix) >= trip_distance(current, truck.hub, matrix):
+        return False
+
+    prev_loc = truck.hub
+    truck.packages = list()
+    for loc in best[1]:  # O(n)
+        for pkg_id in stops[loc].pkg_ids:
+            truck.packages.append((pkg_id, matrix[prev_loc][loc]))
+            prev_loc = loc
+
+    return True
+
+
+def held_karp(locs, hub, matrix, deadline):
+    """
+    Finds the shortest trip from the hub through every location and back to the hub.
+
+    :param list[int] locs: the distinct location ids to visit
+    :param int hub: the location id of the hub
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param float deadline: the time.perf_counter value at which to give up
+    :return: the location ids in trip order, None if the deadline passed
+    :rtype: list[int]
+    """
+    # Time complexity O(2^n * n^2)
+    n = len(locs)
+    inf = float('inf')
+    full = (1 << n) - 1
+
+    # dist_to[j][k] is the distance from stop k to stop j, so a row lines up with a row of the table
+    dist_to = [[matrix[locs[k]][locs[j]] for k in range(n)] for j in range(n)]
+
+    cost = [None] * (1 << n)  # cost[mask][j] is the shortest path from the hub through mask ending at stop j
+    cost[0] = [inf] * n
+
+    for mask in range(1, 1 << n):  # O(2^n)
+        if mask & 0xFF == 0 and time.perf_counter() > deadline:
+            return None
+
+        row = [inf] * n
+        for j in range(n):  # O(n^2), the min over a row runs in C
+            bit = 1 << j
+            if mask & bit:
+                rest = mask ^ bit
+                row[j] = matrix[hub][locs[j]] if rest == 0 else min(map(add, cost[rest], dist_to[j]))
+        cost[mask] = row
+
+    # Close the trip and walk the table backwards to recover the order
+    last = min(range(n), key=lambda j: cost[full][j] + matrix[locs[j]][hub])
+    order = [last]
+    mask = full
+
+    while mask != (1 << last):  # O(n^2)
+        rest = mask ^ (1 << last)
+        prev = min((k for k in range(n) if rest & (1 << k)), key=lambda k: cost[rest][k] + dist_to[last][k])
+        order.append(prev)
+        mask, last = rest, prev
+
+    return [locs[j] for j in reversed(order)]
+
+
+def trip_distance(locs, hub, matrix):
+    """
+    Gets the distance of a trip from the hub through the locations in order and back to the hub.
+
+    :param list[int] locs: the location ids in trip order
+    :param int hub: the location id of the hub
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the distance in miles
+    :rtype: float
+    """
+    # Time complexity O(n)
+    path = [hub] + list(locs) + [hub]
+    return sum(matrix[a][b] for a, b in zip(path, path[1:]))
+
+
+def trip_lateness(locs, truck, matrix, pkgs, stops):
+    """
+    Gets the total time by which the packages on a trip would miss their deadlines.
+
+    :param list[int] locs: the location ids in trip order
+    :param Truck truck: the truck making the trip
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param dict[str -> Package] pkgs: the packages on the trip keyed by id
+    :param dict[int -> Stop] stops: the stop at each location
+    :return: the total lateness in seconds, 0 if every package is on time
+    :rtype: float
+    """
+    # Time complexity O(n)
+    now = utils.time_to_seconds(truck.time)
+    prev_loc = truck.hub
+    late = 0.0
+
+    for loc in dict.fromkeys(locs):  # O(n)
+        now += matrix[prev_loc][loc] * 3600.0 / truck.SPEED
+        prev_loc = loc
+        for pkg_id in stops[loc].pkg_ids:
+            late += max(0.0, now - utils.time_to_seconds(pkgs[pkg_id].deadline))
+
+    return late
+
+
+def initiate_loading_dijkstras(truck_list, package_lists, g, package_hash, matrix=None):
     """
     Loads the truck with the packages from the package list.
 
     If more than one truck is given, trucks are loaded evenly by iterating over the trucks and loading the next package
-    closest to its previously loaded package. After a package is loaded, the truck is sorted. This helps if there were
-    sibling sets or other package lists loaded onto this truck previously.
+    closest to its previously loaded package.
+
+    If a distance matrix is given, one Route is kept for each truck, starting from the packages already on it, such as
+    sibling sets. Each stop is inserted into the route where it keeps every delivery on time, and the truck follows the
+    order of its route. Otherwise the truck is sorted by nearest neighbor after each package is loaded.
 
     *This version uses Dijkstra's Algorithm.*
 
     :param list[Truck] truck_list: the trucks to be loaded
-    :param list[str] package_lists: the package ids to be loaded
+    :param list[PendingQueue] package_lists: the package ids to be loaded
     :param Graph g: the Graph structure that Dijkstra's Algorithm has been run on
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, used to check deadlines while loading
     :return:
     """
-    # Time complexity O(n^6)
+    # Time complexity O(n^6), O(n^5) with a distance matrix
     escape_condition = [True] * len(truck_list)
+    routes = None if matrix is None else {truck.id: build_route(truck, package_hash, matrix)
+                                          for truck in truck_list}  # O(t * n^2)
 
     for package_list in package_lists:  # O(n^6)
         eligible_pkg = True
@@ -136,8 +410,12 @@ def initiate_loading_dijkstras(truck_list, package_lists, g, package_hash):
         while len(package_list) > 0 and not [t.full() for t in truck_list] == escape_condition and eligible_pkg:  # O(n^5)
             for truck in truck_list:  # O(n^4)
                 if not truck.full():
-                    eligible_pkg = load_package_dijkstras(truck, package_list, g, package_hash)  # O(n^2)
-                    sort_truck_dijkstras(truck, g, package_hash)  # O(n^3)
+                    if routes is None:
+                        eligible_pkg = load_package_dijkstras(truck, package_list, g, package_hash)  # O(n^2)
+                        sort_truck_dijkstras(truck, g, package_hash)  # O(n^3)
+                    else:
+                        eligible_pkg = load_package_dijkstras(truck, package_list, g, package_hash, matrix,
+                                                              routes[truck.id])  # O(n^2)
 
 
 def load_siblings_dijkstras(truck_list, sibling_sets, package_lists, package_hash):
@@ -149,8 +427,8 @@ def load_siblings_dijkstras(truck_list, sibling_sets, package_lists, package_has
 
     :param list[Truck] truck_list: the trucks to be loaded
     :param list[set[str]] sibling_sets: the sets of package ids that must be loaded together
-    :param list[list[str]] package_lists: the list of package id lists
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param list[PendingQueue] package_lists: the list of package id lists
+    :param PackageStore package_hash: the Package objects
     :return:
     """
     # Time complexity O(n^3)
@@ -162,12 +440,9 @@ def load_siblings_dijkstras(truck_list, sibling_sets, package_lists, package_has
             curr_truck.add_package_dijkstras(pkg, float('inf'))
             package_hash.lookup(pkg).advance_status(curr_truck.time, curr_truck.id)  # O(n)
 
-            # Remove package from any priority lists
-            for package_list in package_lists:  # O(n)
-                try:
-                    package_list.remove(pkg)
-                except ValueError:
-                    pass
+            # Remove package from the packages waiting to be loaded
+            for package_list in package_lists:  # O(1)
+                package_list.discard(pkg)
 
         # swap the truck to load next sibling_set
         i = 0 if i == len(truck_list) - 1 else i + 1
@@ -175,28 +450,324 @@ def load_siblings_dijkstras(truck_list, sibling_sets, package_lists, package_has
         curr_truck = truck_list[i]
 
 
-def get_last_delayed_package(delayed, package_hash):
+def initiate_loading_cluster(truck_list, package_lists, g, matrix, package_hash):
     """
-    Gets the delayed package object with the latest delay time.
+    Loads each truck with one cluster of nearby packages, then sorts the truck.
 
-    :param list[str] delayed: the delayed package ids
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
-    :return: the latest delayed package
-    :rtype: Package
+    Only about CLUSTER_POOL truck loads per truck are considered: every package at the locations of the most urgent
+    packages. They are grouped into stops, stops holding siblings are joined, and the groups are clustered with a
+    capacitated k-medoids into one cluster per truck that fits the room left on the truck. Packages that require a
+    truck only join that truck's cluster. Routing a truck then depends on the size of its cluster instead of the size of
+    the manifest.
+
+    Each cluster is inserted into its truck's route, the groups with the least time to spare first, and groups that
+    would make a delivery late are left for a later truck. The truck is then sorted by nearest neighbor, unless that
+    makes a delivery late.
+
+    :param list[Truck] truck_list: the trucks to be loaded
+    :param list[PendingQueue] package_lists: the package ids to be loaded, most urgent list first
+    :param Graph g: the Graph structure used to sort the trucks
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :return:
+    """
+    # Time complexity O(n + p*t + t*c^3) for a pool of p packages, t trucks and clusters of c packages
+    trucks = [truck for truck in truck_list if not truck.full()]
+    if len(trucks) == 0:
+        return
+
+    cluster_of = {truck.id: c for c, truck in enumerate(trucks)}
+    pool_size = CLUSTER_POOL * Truck.MAX_PKGS * len(trucks)
+
+    # Every package one of the trucks can carry, by location, with the locations of the most urgent packages first
+    by_location = dict()  # location id -> (package id, index of the cluster it must join or None for any)
+    for package_list in package_lists:  # O(n)
+        for pkg_id, pkg in zip(package_list, package_hash.lookup_many(package_list)):
+            if not pkg.req_truck or pkg.req_truck in cluster_of:
+                by_location.setdefault(pkg.location_id, list()).append((pkg_id, cluster_of.get(pkg.req_truck)))
+
+    # The pool holds whole locations, so packages at the same address can share a truck
+    required = dict()  # package id -> index of the cluster it must join, None for any
+    for pkgs in by_location.values():  # O(p)
+        if len(required) >= pool_size:
+            break
+        required.update(pkgs)
+
+    unit_list = clustering.units(list(required.keys()), package_hash, Truck.MAX_PKGS)  # O(p log p)
+    pinned = [next((required[pkg_id] for stop in unit for pkg_id in stop.pkg_ids if required[pkg_id] is not None),
+                   None) for unit in unit_list]
+    clusters = clustering.k_medoids(unit_list, matrix, [Truck.MAX_PKGS - len(truck.packages) for truck in trucks],
+                                    trucks[0].hub, pinned)  # O(p*t)
+
+    loaded = set()
+    for truck, cluster in zip(trucks, clusters):  # O(t*c^3)
+        # Siblings that cannot fit on an empty truck are split
+        if len(cluster) == 0 and truck.empty():
+            cluster = [unit for unit, c in zip(unit_list, pinned) if c in (None, cluster_of[truck.id])
+                       and not any(pkg_id in loaded for stop in unit for pkg_id in stop.pkg_ids)][:1]
+
+        route = build_route(truck, package_hash, matrix)  # O(c^2)
+        start = utils.time_to_seconds(truck.time)
+        spare = {id(unit): min(utils.time_to_seconds(stop.deadline) - start -
+                               matrix[truck.current_location][stop.location_id] * route.seconds_per_mile
+                               for stop in unit) for unit in cluster}  # time left if each group were delivered first
+        skipped = list()
+
+        for unit in sorted(cluster, key=lambda u: spare[id(u)]):  # O(c^3)
+            inserted = insert_unit(route, unit)  # O(c^2)
+            if inserted is not None:
+                route = inserted
+            elif spare[id(unit)] < 0:
+                # A group that is late on any truck is loaded anyway, the rest are left for a later truck
+                route = insert_unit(route, unit, on_time=False)  # O(c^2)
+            else:
+                skipped.append(unit)
+
+        # If no group can be delivered on time, the most urgent one is still loaded so it is not left behind
+        if len(route.package_ids()) == len(truck.packages) and len(skipped) > 0:
+            route = insert_unit(route, skipped[0], on_time=False)  # O(c^2)
+
+        on_truck = {pkg_id for (pkg_id, _) in truck.packages}
+        follow_route(truck, route)  # O(c)
+        truck.packages = truck.packages[:Truck.MAX_PKGS]
+
+        for pkg_id, _ in truck.packages:  # O(c*n)
+            if pkg_id not in on_truck:
+                package_hash.lookup(pkg_id).advance_status(truck.time, truck.id)  # O(n)
+                loaded.add(pkg_id)
+
+        inserted = list(truck.packages)
+        sort_truck_dijkstras(truck, g, package_hash)  # O(c^3)
+        if not build_route(truck, package_hash, matrix).feasible():  # O(c^2)
+            truck.packages = inserted
+
+    for package_list in package_lists:  # O(n)
+        for pkg_id in loaded:
+            package_list.discard(pkg_id)
+
+
+def insert_unit(route, unit, on_time=True):
+    """
+    Inserts every stop of a group of stops into a route where it adds the least distance.
+
+    :param Route route: the route, which is left unchanged
+    :param list[Stop] unit: the stops
+    :param bool on_time: if True, the group is only inserted if every delivery stays on time
+    :return: a copy of the route with the group inserted, None if the group cannot be inserted on time
+    :rtype: Route
     """
     # Time complexity O(n^2)
-    last_delayed_pkg = None
+    route = route.copy()  # O(n)
+
+    for stop in unit:  # O(n^2)
+        position = route.best_insertion(stop.location_id, stop.deadline, on_time)  # O(n)
+
+        if position is None:
+            return None
+
+        route.insert(stop, position[0])  # O(n)
+
+    return route
+
+
+def initiate_loading_savings(truck_list, package_lists, matrix, package_hash):
+    """
+    Loads the trucks using the Clarke-Wright savings algorithm.
+
+    Every package starts on its own route out of the hub and back. The packages already on a truck start as one route
+    that must stay on that truck. The saving of joining two routes at packages i and j is
+    d(hub, i) + d(hub, j) - d(i, j). Savings are kept in a heap and routes are joined end to end from the largest saving
+    down, as long as the joined route fits on a truck, can be carried by the same truck (required trucks), keeps sibling
+    packages together and delivers every package on time.
 
-    for pkg_id in delayed:  # O(n^2)
-        pkg = package_hash.lookup(pkg_id)  # O(n)
+    Each truck is then given the most urgent route it is allowed to carry, with the packages at each location delivered
+    together when the route first reaches it. Packages on routes that are not given to a truck stay in their package
+    lists for a later trip.
 
-        if not last_delayed_pkg:
-            last_delayed_pkg = pkg
+    :param list[Truck] truck_list: the trucks to be loaded
+    :param list[PendingQueue] package_lists: the package ids to be loaded
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :return:
+    """
+    # Time complexity O(n^2 log n)
+    hub = truck_list[0].hub
+    start_time = min(truck.time for truck in truck_list)
+    hub_row = matrix[hub]
+
+    # Build the starting routes
+    routes = dict()  # route id -> [package ids in order, required truck id or None]
+    route_of = dict()  # package id -> route id
+
+    for truck in truck_list:  # O(n)
+        if not truck.empty():
+            routes[-truck.id] = [[pkg_id for (pkg_id, _) in truck.packages], truck.id]
+            for (pkg_id, _) in truck.packages:
+                route_of[pkg_id] = -truck.id
+
+    pending = [pkg_id for package_list in package_lists for pkg_id in package_list]
+    pkgs = dict(zip(pending, package_hash.lookup_many(pending)))  # O(n)
+
+    for pkg_id in pending:  # O(n)
+        routes[len(routes)] = [[pkg_id], pkgs[pkg_id].req_truck]
+        route_of[pkg_id] = len(routes) - 1
+
+    for truck in truck_list:  # O(n)
+        for (pkg_id, _) in truck.packages:
+            pkgs[pkg_id] = package_hash.lookup(pkg_id)  # O(n)
+
+    # Sibling packages start on the same route
+    for pkg_id in pending:  # O(n)
+        for sibling in pkgs[pkg_id].siblings:
+            if sibling in route_of and route_of[sibling] != route_of[pkg_id]:
+                a, b = route_of[pkg_id], route_of[sibling]
+                joined = join_routes(routes[a], routes[b], routes[a][0][-1], routes[b][0][0])
+                if joined is not None:
+                    routes[a] = joined
+                    for moved in routes.pop(b)[0]:
+                        route_of[moved] = a
+
+    # Compute the savings of every pair of packages
+    savings = list()
+    ids = list(pkgs.keys())
+    locs = [pkgs[pkg_id].location_id for pkg_id in ids]
+
+    for i in range(len(ids)):  # O(n^2)
+        row = matrix[locs[i]]
+        for j in range(i + 1, len(ids)):
+            savings.append((row[locs[j]] - hub_row[locs[i]] - hub_row[locs[j]], ids[i], ids[j]))
+
+    heapq.heapify(savings)  # O(n^2)
+
+    # Join routes from the largest saving down
+    while len(savings) > 0:  # O(n^2 log n)
+        _, i, j = heapq.heappop(savings)
+        a, b = route_of[i], route_of[j]
+
+        if a == b or len(routes[a][0]) + len(routes[b][0]) > Truck.MAX_PKGS:
+            continue
+
+        joined = join_routes(routes[a], routes[b], i, j)
+        if joined is None or not route_on_time(joined[0], hub, start_time, matrix, pkgs):  # O(n)
+            continue
+
+        routes[a] = joined
+        for moved in routes.pop(b)[0]:
+            route_of[moved] = a
+
+    # Give each truck its own route or the most urgent route it can carry
+    def urgency(route):
+        return min(pkgs[pkg_id].deadline for pkg_id in route[0]), -len(route[0])
+
+    unassigned = sorted((r for route_id, r in routes.items() if route_id >= 0), key=urgency)  # O(n log n)
+
+    for truck in truck_list:  # O(n^2)
+        if -truck.id in routes:
+            route = routes[-truck.id][0]
         else:
-            if last_delayed_pkg.delay_time < pkg.delay_time:
-                last_delayed_pkg = pkg
+            route = None
+            for candidate in unassigned:
+                if candidate[1] is None or candidate[1] == truck.id:
+                    route = candidate[0]
+                    unassigned.remove(candidate)
+                    break
+
+            if route is None:
+                continue
+
+        for pkg_id in route:  # O(n^2)
+            if pkgs[pkg_id].status == Package.AT_HUB:
+                pkgs[pkg_id].advance_status(truck.time, truck.id)
+
+                for package_list in package_lists:  # O(1)
+                    package_list.discard(pkg_id)
+
+        # Packages at the same location are delivered in one visit, where the route first reaches the location
+        prev_loc = truck.hub
+        truck.packages = list()
+        for stop in Stop.group(route, package_hash):  # O(n)
+            for pkg_id in stop.pkg_ids:
+                truck.packages.append((pkg_id, matrix[prev_loc][stop.location_id]))
+                prev_loc = stop.location_id
+
+
+def join_routes(route_a, route_b, i, j):
+    """
+    Joins two routes so that package i of the first route is next to package j of the second route.
+
+    The routes are only joined if i and j are at an end of their routes and both routes can be carried by the same
+    truck.
+
+    :param list route_a: the first route, [package ids in order, required truck id or None]
+    :param list route_b: the second route, [package ids in order, required truck id or None]
+    :param str i: the package id at an end of the first route
+    :param str j: the package id at an end of the second route
+    :return: the joined route, None if the routes cannot be joined at i and j
+    :rtype: list
+    """
+    # Time complexity O(n)
+    pkgs_a, truck_a = route_a
+    pkgs_b, truck_b = route_b
+
+    if truck_a is not None and truck_b is not None and truck_a != truck_b:
+        return None
+
+    if pkgs_a[-1] == i:
+        first = pkgs_a
+    elif pkgs_a[0] == i:
+        first = pkgs_a[::-1]
+    else:
+        return None
+
+    if pkgs_b[0] == j:
+        second = pkgs_b
+    elif pkgs_b[-1] == j:
+        second = pkgs_b[::-1]
+    else:
+        return None
+
+    return [first + second, truck_a if truck_a is not None else truck_b]
+
+
+def route_on_time(pkg_ids, hub, start_time, matrix, pkgs):
+    """
+    Checks if every package on a route out of the hub would be delivered on time.
+
+    :param list[str] pkg_ids: the package ids in delivery order
+    :param int hub: the location id of the hub
+    :param datetime.time start_time: the time the route starts
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param dict[str -> Package] pkgs: the packages on the route keyed by id
+    :return: True if no delivery is late
+    """
+    # Time complexity O(n)
+    now = utils.time_to_seconds(start_time)
+    loc = hub
+
+    for pkg_id in pkg_ids:  # O(n)
+        pkg = pkgs[pkg_id]
+        now += matrix[loc][pkg.location_id] * 3600.0 / Truck.SPEED
+        loc = pkg.location_id
+
+        if now > utils.time_to_seconds(pkg.deadline):
+            return False
+
+    return True
+
+
+def get_last_delayed_package(delayed, package_hash):
+    """
+    Gets the delayed package object with the latest delay time.
+
+    :param DelayedQueue delayed: the delayed package ids
+    :param PackageStore package_hash: the Package objects
+    :return: the latest delayed package, None if there are no delayed packages
+    :rtype: Package
+    """
+    # Time complexity O(log n) amortized
+    last_pkg_id = delayed.last()  # O(log n)
 
-    return last_delayed_pkg
+    return None if last_pkg_id is None else package_hash.lookup(last_pkg_id)
 
 
 def get_return_order_of_trucks(truck_list):
@@ -237,17 +808,17 @@ def load_package(truck, pkg_id_list, package_hash, location_hash):
 
     :param Truck truck: the truck being loaded
     :param list[str] pkg_id_list: the list of package ids currently being loaded from
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
-    :param ChainingHashTable[str, Location] location_hash: the Location objects
+    :param PackageStore package_hash: the Package objects
+    :param ChainingHashTable[int, Location] location_hash: the Location objects
     :return: True if a package was found to load onto the truck, False if no package was available to be loaded
     """
     if not truck.full() and len(pkg_id_list) > 0:
         if truck.last_package_dijkstras() == -1:
-            truck_add = HUB_ADDRESS
+            truck_loc = truck.hub
         else:
-            truck_add = package_hash.lookup(truck.last_package_dijkstras()).address
+            truck_loc = package_hash.lookup(truck.last_package_dijkstras()).location_id
 
-        next_pkg_id = find_closest_pkg(truck_add, truck, pkg_id_list, package_hash, location_hash)
+        next_pkg_id = find_closest_pkg(truck_loc, truck, pkg_id_list, package_hash, location_hash)
 
         next_pkg = package_hash.lookup(next_pkg_id)
 
@@ -260,18 +831,18 @@ def load_package(truck, pkg_id_list, package_hash, location_hash):
             return True
 
 
-def find_closest_pkg(curr_add, truck_id, pkg_id_list, package_hash, location_hash):
+def find_closest_pkg(curr_loc, truck_id, pkg_id_list, package_hash, location_hash):
     """
     .. warning:: THIS METHOD WAS USED IN A PREVIOUS VERSION AND IS NOT CURRENTLY USED. Use
        **find_closest_pkg_dijkstras** instead.
 
-    Finds the nearest package destination to the current address that is allowed on the specific truck.
+    Finds the nearest package destination to the current location that is allowed on the specific truck.
 
-    :param str curr_add: the current address
+    :param int curr_loc: the location id of the current location
     :param int truck_id: the id of the current truck
     :param list[str] pkg_id_list: the package ids currently being loaded
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
-    :param ChainingHashTable[str, Location] location_hash: the Location objects
+    :param PackageStore package_hash: the Package objects
+    :param ChainingHashTable[int, Location] location_hash: the Location objects
     :return: the id of the closest package destination, '-1' if none found
     :rtype: str
     """
@@ -284,7 +855,7 @@ def find_closest_pkg(curr_add, truck_id, pkg_id_list, package_hash, location_has
         if pkg.req_truck and pkg.req_truck != truck_id:
             continue
 
-        pkg_distance = location_hash.lookup(pkg.address).get_distance(curr_add)
+        pkg_distance = location_hash.lookup(pkg.location_id).get_distance(curr_loc)
 
         if pkg_distance < min_pkg_distance:
             min_pkg_id = pkg.id
@@ -301,25 +872,25 @@ def sort_truck(truck, package_hash, location_hash):
     Sorts the packages on a truck, starting from the closest to the hub.
 
     :param Truck truck: the truck being sorted
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
-    :param ChainingHashTable[str, Location] location_hash: the Location objects
+    :param PackageStore package_hash: the Package objects
+    :param ChainingHashTable[int, Location] location_hash: the Location objects
     :return:
     """
     sorted_pkgs = list()
 
     while len(sorted_pkgs) < len(truck.packages):
         if len(sorted_pkgs) == 0:
-            curr_add = HUB_ADDRESS
+            curr_loc = truck.hub
         else:
             last_pkg = package_hash.lookup(sorted_pkgs[-1])
-            curr_add = last_pkg.address
+            curr_loc = last_pkg.location_id
 
         pkg_list = list()
         for pkg_id in truck.packages:
             if pkg_id not in sorted_pkgs:
                 pkg_list.append(pkg_id)
 
-        min_pkg_id = find_closest_pkg(curr_add, truck, pkg_list, package_hash, location_hash)
+        min_pkg_id = find_closest_pkg(curr_loc, truck, pkg_list, package_hash, location_hash)
         sorted_pkgs.append(min_pkg_id)
 
     truck.packages = sorted_pkgs
@@ -338,8 +909,8 @@ def initiate_loading(truck_list, package_lists, package_hash, location_hash):
 
     :param list[Truck] truck_list: the trucks to be loaded
     :param list[str] package_lists: the package ids to be loaded
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
-    :param ChainingHashTable[str, Location] location_hash: the Location objects
+    :param PackageStore package_hash: the Package objects
+    :param ChainingHashTable[int, Location] location_hash: the Location objects
     :return:
     """
 
@@ -366,7 +937,7 @@ def load_siblings(truck_list, sibling_sets, package_lists, package_hash):
     :param list[Truck] truck_list: the trucks to be loaded
     :param list[set[str]] sibling_sets: the sets of package ids that must be loaded together
     :param list[list[str]] package_lists: the list of package id lists
-    :param ChainingHashTable[str, Package] package_hash: the Package objects
+    :param PackageStore package_hash: the Package objects
     :return:
     """
     i = 0
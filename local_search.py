@@ -0,0 +1,594 @@
+# Module for improving loaded trucks by moving stops between their routes
+# Stops are moved between two trucks with relocate, swap and cross-exchange moves while that shortens the total
+# distance. All three are exchanges of two segments of consecutive stops, one of which may be empty. A stop moved to a
+# route that already visits its location joins the stop there, so no route visits a location twice. A move is priced
+# from the few edges it changes, and only moves that put a stop next to one of its nearest locations are tried.
+# When there is time before the trucks leave, simulated annealing keeps improving the routes with random moves until
+# the time budget runs out, always keeping the best plan found.
+import math
+import random
+import time
+
+from models.stop import Stop
+from models.truck import Truck
+import utils
+
+NEIGHBORS = 5  # nearest locations of each location that a move may connect it to
+SEGMENT_MAX = 2  # most consecutive stops taken from one route in a single move
+MAX_MOVES = 100  # most improving moves made
+MIN_GAIN = 1e-9  # least distance a move must save, so rounding errors do not count as gains
+ANNEAL_SEED = 0  # seed of the random moves, so a plan can be reproduced
+ANNEAL_START_TEMPERATURE = 1.0  # miles, a move adding this much distance is first accepted about a third of the time
+ANNEAL_END_TEMPERATURE = 0.01  # miles, the temperature when the time budget runs out
+REPORT_INTERVAL = 1.0  # seconds between progress reports
+
+
+def improve_routes(truck_list, matrix, package_hash):
+    """
+    Moves stops between the routes of loaded trucks while that shortens the total distance.
+
+    Each round makes the move that saves the most distance. A move is only made if both trucks stay within
+    Truck.MAX_PKGS, every package stays on a truck it may be delivered by, siblings stay on the same truck, packages
+    only move to a truck that leaves after they reach the hub, and no delivery that was on time becomes late. Only
+    trucks at the same location can exchange stops. A stop moved to a route that already visits its location joins the
+    stop there. Each route is priced from where its truck is, through its stops and back to its hub.
+
+    :param list[Truck] truck_list: the loaded trucks, before they leave
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :return: the distance saved in miles
+    :rtype: float
+    """
+    # Time complexity O(m * t^2 * s^2) for m moves, t trucks and s stops per truck
+    if len(truck_list) < 2:
+        return 0.0
+
+    neighbors = nearest_locations(matrix, NEIGHBORS)  # O(l^2 log l) for l locations
+    routes = [truck_stops(truck, package_hash) for truck in truck_list]  # O(n)
+    groups = sibling_groups(truck_list, package_hash)  # O(n)
+    saved = 0.0
+
+    for _ in range(MAX_MOVES):  # O(m * t^2 * s^2)
+        move = best_move(truck_list, routes, matrix, neighbors, groups, package_hash)
+
+        if move is None:
+            break
+
+        delta, a, i, l1, b, j, l2 = move
+        routes[a], routes[b] = exchange(routes, (a, i, l1, b, j, l2))  # O(s)
+        saved -= delta
+
+    for truck, route in zip(truck_list, routes):  # O(n)
+        load_stops(truck, route, matrix, package_hash)
+
+    return saved
+
+
+def anneal_routes(truck_list, matrix, package_hash, time_budget, report=None, seed=ANNEAL_SEED):
+    """
+    Keeps improving the routes of loaded trucks with simulated annealing until a time budget runs out.
+
+    Each step tries a random move: an exchange of segments between two trucks, as in improve_routes, or the reversal of
+    part of one truck's route. Moves that shorten the routes are always taken, and moves that lengthen them are taken
+    with a probability that falls as the temperature cools from ANNEAL_START_TEMPERATURE to ANNEAL_END_TEMPERATURE
+    over the time budget. Only moves that keep the plan feasible are taken, and no package that was on time at the
+    start may become late. The best plan found is kept, and it is the one loaded when the budget runs out or the search
+    is interrupted with Ctrl-C.
+
+    :param list[Truck] truck_list: the loaded trucks, before they leave
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :param float time_budget: the seconds to spend improving the routes
+    :param report: called every REPORT_INTERVAL seconds and at the end as report(seconds, best, current, steps) with
+                   the seconds spent, the miles of the best and current plans and the number of steps tried
+    :param int seed: the seed of the random moves
+    :return: the distance saved in miles
+    :rtype: float
+    """
+    # Time complexity O(k * s) for k steps and s stops per truck
+    routes = [truck_stops(truck, package_hash) for truck in truck_list]  # O(n)
+
+    if time_budget <= 0 or sum(len(route) for route in routes) < 2:
+        return 0.0
+
+    rng = random.Random(seed)
+    groups = sibling_groups(truck_list, package_hash)  # O(n)
+    permitted_late = set().union(*(late_packages(truck, route, matrix, package_hash)
+                                   for truck, route in zip(truck_list, routes)))  # O(n)
+    pairs = [(a, b) for a in range(len(truck_list)) for b in range(len(truck_list))
+             if a != b and truck_list[a].current_location == truck_list[b].current_location]
+
+    cost = sum(route_distance(truck, route, matrix) for truck, route in zip(truck_list, routes))  # O(n)
+    start_cost = best_cost = cost
+    best = [list(route) for route in routes]
+    visits = [positions(route) for route in routes]  # O(n)
+    start = last_report = time.perf_counter()
+    steps = 0
+
+    try:
+        while True:  # O(k * s)
+            now = time.perf_counter()
+            if now - start >= time_budget:
+                break
+
+            if report is not None and now - last_report >= REPORT_INTERVAL:
+                report(now - start, best_cost, cost, steps)
+                last_report = now
+
+            steps += 1
+            temperature = ANNEAL_START_TEMPERATURE * \
+                (ANNEAL_END_TEMPERATURE / ANNEAL_START_TEMPERATURE) ** ((now - start) / time_budget)
+
+            if len(pairs) > 0 and rng.random() < 0.5:
+                # Exchange a segment of one route with a segment of another, either of which may be empty
+                a, b = rng.choice(pairs)
+                i = rng.randint(0, len(routes[a]))
+                j = rng.randint(0, len(routes[b]))
+                l1 = rng.randint(0, min(SEGMENT_MAX, len(routes[a]) - i))
+                l2 = rng.randint(0, min(SEGMENT_MAX, len(routes[b]) - j))
+                if l1 == 0 and l2 == 0:
+                    continue
+
+                delta = move_cost(truck_list, routes, (a, i, l1, b, j, l2), matrix, visits)
+
+                if not accept(delta, temperature, rng) or \
+                        not allowed(truck_list, routes, (a, i, l1, b, j, l2), matrix, groups, package_hash,
+                                    permitted_late):
+                    continue
+
+                routes[a], routes[b] = exchange(routes, (a, i, l1, b, j, l2))  # O(s)
+                visits[a], visits[b] = positions(routes[a]), positions(routes[b])  # O(s)
+            else:
+                # Reverse the stops i to k of one route
+                a = rng.randrange(len(routes))
+                if len(routes[a]) < 2:
+                    continue
+
+                i, k = sorted(rng.sample(range(len(routes[a])), 2))
+                prev, following = location(truck_list[a], routes[a], i - 1), location(truck_list[a], routes[a], k + 1)
+                first, last = routes[a][i].location_id, routes[a][k].location_id
+                delta = (matrix[prev][last] + matrix[first][following] -
+                         matrix[prev][first] - matrix[last][following])
+                reversed_route = routes[a][:i] + routes[a][i:k + 1][::-1] + routes[a][k + 1:]
+
+                if not accept(delta, temperature, rng) or \
+                        not late_packages(truck_list[a], reversed_route, matrix, package_hash) <= permitted_late:
+                    continue
+
+                routes[a] = reversed_route
+                visits[a] = positions(reversed_route)  # O(s)
+
+            cost += delta
+            if cost < best_cost - MIN_GAIN:
+                best_cost = cost
+                best = [list(route) for route in routes]
+    except KeyboardInterrupt:
+        pass  # the best plan found so far is kept
+
+    for truck, route in zip(truck_list, best):  # O(n)
+        load_stops(truck, route, matrix, package_hash)
+
+    if report is not None:
+        report(time.perf_counter() - start, best_cost, cost, steps)
+
+    return start_cost - best_cost
+
+
+def accept(delta, temperature, rng):
+    """
+    Decides if simulated annealing takes a move.
+
+    :param float delta: the change in distance of the move in miles
+    :param float temperature: the current temperature in miles
+    :param random.Random rng: the random number generator
+    :return: True if the move shortens the routes, or else with probability e^(-delta / temperature)
+    """
+    # Time complexity O(1)
+    return delta < 0 or rng.random() < math.exp(-delta / temperature)
+
+
+def print_progress(seconds, best, current, steps):
+    """
+    Prints the progress of a search.
+
+    :param float seconds: the seconds spent
+    :param float best: the miles of the best plan found
+    :param float current: the miles of the current plan
+    :param int steps: the number of steps tried
+    :return:
+    """
+    # Time complexity O(1)
+    print(f'Annealing {seconds:.1f}s: best {best:.1f} miles, current {current:.1f} miles, {steps} steps')
+
+
+def route_distance(truck, route, matrix):
+    """
+    Gets the distance of a route, from where the truck is, through its stops and back to its hub.
+
+    :param Truck truck: the truck
+    :param list[Stop] route: the stops
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the distance in miles
+    :rtype: float
+    """
+    # Time complexity O(s)
+    locations = [truck.current_location] + [stop.location_id for stop in route] + [truck.hub]
+    return sum(matrix[u][v] for u, v in zip(locations, locations[1:]))
+
+
+def best_move(truck_list, routes, matrix, neighbors, groups, package_hash):
+    """
+    Finds the allowed move between two routes that saves the most distance.
+
+    A move exchanges route a's stops i to i + l1 with route b's stops j to j + l2. With l2 = 0 it relocates stops from a
+    to b, with l1 = 0 from b to a, with l1 = l2 = 1 it swaps two stops, and otherwise it is a cross-exchange. See
+    exchange for how a moved stop joins a stop at its location.
+
+    :param list[Truck] truck_list: the trucks
+    :param list[list[Stop]] routes: the stops of each truck
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[set[int]] neighbors: the nearest locations of each location
+    :param dict[str -> int] groups: the sibling group of each package that has siblings
+    :param PackageStore package_hash: the Package objects
+    :return: the change in distance and the move (a, i, l1, b, j, l2), None if no allowed move saves distance
+    :rtype: tuple[float, int, int, int, int, int, int]
+    """
+    # Time complexity O(t^2 * s^2)
+    best = None
+    visits = [positions(route) for route in routes]  # O(n)
+
+    for a in range(len(routes)):  # O(t^2 * s^2)
+        for b in range(a + 1, len(routes)):
+            if truck_list[a].current_location != truck_list[b].current_location:
+                continue
+
+            route_a, route_b = routes[a], routes[b]
+
+            for i in range(len(route_a) + 1):
+                for l1 in range(min(SEGMENT_MAX, len(route_a) - i) + 1):
+                    for j in range(len(route_b) + 1):
+                        for l2 in range(min(SEGMENT_MAX, len(route_b) - j) + 1):
+                            if l1 == 0 and l2 == 0:
+                                continue
+
+                            a_prev = location(truck_list[a], route_a, i - 1)
+                            a_next = location(truck_list[a], route_a, i + l1)
+                            b_prev = location(truck_list[b], route_b, j - 1)
+                            b_next = location(truck_list[b], route_b, j + l2)
+
+                            # Only try moves that join a stop to one of its nearest locations
+                            if not ((l1 > 0 and route_a[i].location_id in neighbors[b_prev]) or
+                                    (l2 > 0 and route_b[j].location_id in neighbors[a_prev]) or
+                                    (l1 > 0 and route_a[i + l1 - 1].location_id in neighbors[b_next]) or
+                                    (l2 > 0 and route_b[j + l2 - 1].location_id in neighbors[a_next])):
+                                continue
+
+                            delta = move_cost(truck_list, routes, (a, i, l1, b, j, l2), matrix, visits)
+
+                            if delta < -MIN_GAIN and (best is None or delta < best[0]) and \
+                                    allowed(truck_list, routes, (a, i, l1, b, j, l2), matrix, groups, package_hash):
+                                best = (delta, a, i, l1, b, j, l2)
+
+    return best
+
+
+def move_cost(truck_list, routes, move, matrix, visits):
+    """
+    Gets the change in distance of a move, with the stops that join a stop at their location adding no distance.
+
+    :param list[Truck] truck_list: the trucks
+    :param list[list[Stop]] routes: the stops of each truck
+    :param tuple[int, int, int, int, int, int] move: the move (a, i, l1, b, j, l2)
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[dict[int -> int]] visits: the position of each location on each route, see positions
+    :return: the change in distance in miles
+    :rtype: float
+    """
+    # Time complexity O(1)
+    a, i, l1, b, j, l2 = move
+    arriving_a = arriving(routes[b][j:j + l2], visits[a], i, l1)
+    arriving_b = arriving(routes[a][i:i + l1], visits[b], j, l2)
+
+    return (replace_cost(routes[a], i, l1, arriving_a, location(truck_list[a], routes[a], i - 1),
+                         location(truck_list[a], routes[a], i + l1), matrix) +
+            replace_cost(routes[b], j, l2, arriving_b, location(truck_list[b], routes[b], j - 1),
+                         location(truck_list[b], routes[b], j + l2), matrix))
+
+
+def replace_cost(route, i, length, segment, prev, following, matrix):
+    """
+    Gets the change in distance from replacing stops i to i + length of a route with a segment of stops.
+
+    Only the edges from prev to following, through the stops replaced or through the segment, change.
+
+    :param list[Stop] route: the stops of the route
+    :param int i: the position of the first stop replaced
+    :param int length: the number of stops replaced
+    :param list[Stop] segment: the stops put in their place
+    :param int prev: the location before position i
+    :param int following: the location after the stops replaced
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the change in distance in miles
+    :rtype: float
+    """
+    # Time complexity O(1), segments hold at most SEGMENT_MAX stops
+    old = [prev] + [stop.location_id for stop in route[i:i + length]] + [following]
+    new = [prev] + [stop.location_id for stop in segment] + [following]
+
+    return sum(matrix[u][v] for u, v in zip(new, new[1:])) - sum(matrix[u][v] for u, v in zip(old, old[1:]))
+
+
+def arriving(segment, visits, i, length):
+    """
+    Gets the stops of a segment that become new stops on a route, rather than joining a stop the route keeps.
+
+    :param list[Stop] segment: the stops moved to the route
+    :param dict[int -> int] visits: the position of each location on the route
+    :param int i: the position of the first stop the route gives up
+    :param int length: the number of stops the route gives up
+    :return: the stops that are not at a location the route visits outside the stops it gives up
+    :rtype: list[Stop]
+    """
+    # Time complexity O(1), segments hold at most SEGMENT_MAX stops
+    return [stop for stop in segment
+            if stop.location_id not in visits or i <= visits[stop.location_id] < i + length]
+
+
+def exchange(routes, move):
+    """
+    Gets the stops of the two routes changed by a move, without changing the routes.
+
+    Route a's stops i to i + l1 are exchanged with route b's stops j to j + l2. A moved stop whose location the other
+    route still visits joins the stop there, with the packages of that stop delivered first, instead of becoming a
+    second visit to the location.
+
+    :param list[list[Stop]] routes: the stops of each truck
+    :param tuple[int, int, int, int, int, int] move: the move (a, i, l1, b, j, l2)
+    :return: the new stops of route a and of route b
+    :rtype: tuple[list[Stop], list[Stop]]
+    """
+    # Time complexity O(s)
+    a, i, l1, b, j, l2 = move
+    return (replace(routes[a], i, l1, routes[b][j:j + l2]),  # O(s)
+            replace(routes[b], j, l2, routes[a][i:i + l1]))  # O(s)
+
+
+def replace(route, i, length, segment):
+    """
+    Replaces stops i to i + length of a route with a segment of stops, joining each stop of the segment to a stop the
+    route keeps at its location.
+
+    :param list[Stop] route: the stops of the route
+    :param int i: the position of the first stop replaced
+    :param int length: the number of stops replaced
+    :param list[Stop] segment: the stops put in their place
+    :return: the new stops of the route
+    :rtype: list[Stop]
+    """
+    # Time complexity O(s)
+    visits = positions(route)  # O(s)
+    joining = arriving(segment, visits, i, length)
+    new_route = route[:i] + joining + route[i + length:]
+
+    for stop in segment:
+        if stop not in joining:
+            k = visits[stop.location_id]
+            k = k if k < i else k - length + len(joining)
+            kept = new_route[k]
+            new_route[k] = Stop(kept.location_id, kept.pkg_ids + stop.pkg_ids, min(kept.deadline, stop.deadline))
+
+    return new_route
+
+
+def positions(route):
+    """
+    Gets the position of each location on a route.
+
+    :param list[Stop] route: the stops of the route
+    :return: the position of the stop at each location
+    :rtype: dict[int -> int]
+    """
+    # Time complexity O(s)
+    return {stop.location_id: k for k, stop in enumerate(route)}
+
+
+def allowed(truck_list, routes, move, matrix, groups, package_hash, permitted_late=None):
+    """
+    Checks if a move keeps every load within capacity, on an allowed truck, with its siblings and on time.
+
+    :param list[Truck] truck_list: the trucks
+    :param list[list[Stop]] routes: the stops of each truck
+    :param tuple[int, int, int, int, int, int] move: the move (a, i, l1, b, j, l2)
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param dict[str -> int] groups: the sibling group of each package that has siblings
+    :param PackageStore package_hash: the Package objects
+    :param set[str] permitted_late: the packages that may be late, None for the packages late before the move
+    :return: True if the move is allowed
+    """
+    # Time complexity O(s)
+    a, i, l1, b, j, l2 = move
+    segment_a, segment_b = routes[a][i:i + l1], routes[b][j:j + l2]
+    new_a, new_b = exchange(routes, move)  # O(s)
+
+    for truck, new_route, segment, old_route in ((truck_list[a], new_a, segment_b, routes[a]),
+                                                 (truck_list[b], new_b, segment_a, routes[b])):
+        if sum(len(stop) for stop in new_route) > Truck.MAX_PKGS:
+            return False
+        if not can_carry(truck, segment, package_hash):
+            return False
+        if not whole_sibling_groups(segment, old_route, groups):
+            return False
+
+    if permitted_late is None:
+        permitted_late = late_packages(truck_list[a], routes[a], matrix, package_hash) | \
+            late_packages(truck_list[b], routes[b], matrix, package_hash)
+    new_late = late_packages(truck_list[a], new_a, matrix, package_hash) | \
+        late_packages(truck_list[b], new_b, matrix, package_hash)
+
+    return new_late <= permitted_late
+
+
+def can_carry(truck, segment, package_hash):
+    """
+    Checks if a truck may deliver every package of a segment of stops.
+
+    :param Truck truck: the truck
+    :param list[Stop] segment: the stops
+    :param PackageStore package_hash: the Package objects
+    :return: True if no package requires another truck and every package is at the hub when the truck leaves
+    """
+    # Time complexity O(s)
+    for stop in segment:
+        for pkg in package_hash.lookup_many(stop.pkg_ids):
+            if (pkg.req_truck and pkg.req_truck != truck.id) or (pkg.delay_time and pkg.delay_time > truck.time):
+                return False
+
+    return True
+
+
+def whole_sibling_groups(segment, route, groups):
+    """
+    Checks that a segment taken from a route holds every sibling on the route of each package it holds.
+
+    :param list[Stop] segment: the stops taken
+    :param list[Stop] route: the stops of the route the segment is taken from
+    :param dict[str -> int] groups: the sibling group of each package that has siblings
+    :return: True if no siblings are split
+    """
+    # Time complexity O(s)
+    taken = [groups[pkg_id] for stop in segment for pkg_id in stop.pkg_ids if pkg_id in groups]
+
+    if len(taken) == 0:
+        return True
+
+    on_route = [groups[pkg_id] for stop in route for pkg_id in stop.pkg_ids if pkg_id in groups]
+    return all(taken.count(group) == on_route.count(group) for group in set(taken))
+
+
+def sibling_groups(truck_list, package_hash):
+    """
+    Groups the packages on the trucks that must be delivered together.
+
+    A package's siblings are only listed on one side, so siblings of siblings are joined into one group.
+
+    :param list[Truck] truck_list: the trucks
+    :param PackageStore package_hash: the Package objects
+    :return: the group of each package that has siblings
+    :rtype: dict[str -> int]
+    """
+    # Time complexity O(n)
+    parent = dict()
+
+    def find(pkg_id):
+        while parent[pkg_id] != pkg_id:
+            parent[pkg_id] = parent[parent[pkg_id]]
+            pkg_id = parent[pkg_id]
+        return pkg_id
+
+    pkg_ids = [pkg_id for truck in truck_list for pkg_id, _ in truck.packages]
+    for pkg in package_hash.lookup_many(pkg_ids):  # O(n)
+        for sibling in pkg.siblings:
+            parent.setdefault(pkg.id, pkg.id)
+            parent.setdefault(sibling, sibling)
+            parent[find(sibling)] = find(pkg.id)
+
+    roots = dict()  # root -> group
+    return {pkg_id: roots.setdefault(find(pkg_id), len(roots)) for pkg_id in parent}
+
+
+def late_packages(truck, route, matrix, package_hash):
+    """
+    Gets the packages that would be delivered late if a truck drove a route.
+
+    :param Truck truck: the truck, leaving from its current location at its current time
+    :param list[Stop] route: the stops
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :return: the ids of the late packages
+    :rtype: set[str]
+    """
+    # Time complexity O(s)
+    seconds_per_mile = 3600.0 / truck.SPEED
+    arrival = utils.time_to_seconds(truck.time)
+    loc = truck.current_location
+    late = set()
+
+    for stop in route:
+        arrival += matrix[loc][stop.location_id] * seconds_per_mile
+        loc = stop.location_id
+        for pkg_id in stop.pkg_ids:
+            row = package_hash.rows.lookup(pkg_id)
+            if arrival > package_hash.deadlines[row]:
+                late.add(pkg_id)
+
+    return late
+
+
+def location(truck, route, i):
+    """
+    Gets the location at a position of a route, where the truck starts before the first stop and its hub after the last.
+
+    :param Truck truck: the truck
+    :param list[Stop] route: the stops
+    :param int i: the position, from -1 to len(route)
+    :return: the location id
+    :rtype: int
+    """
+    # Time complexity O(1)
+    if i < 0:
+        return truck.current_location
+    if i >= len(route):
+        return truck.hub
+
+    return route[i].location_id
+
+
+def nearest_locations(matrix, k):
+    """
+    Gets the k nearest locations of every location, including the location itself.
+
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param int k: the number of nearest locations
+    :return: the nearest locations of each location
+    :rtype: list[set[int]]
+    """
+    # Time complexity O(l^2 log l) for l locations
+    return [set(sorted(range(len(row)), key=lambda loc: row[loc])[:k + 1]) for row in matrix]
+
+
+def truck_stops(truck, package_hash):
+    """
+    Groups the packages on a truck into stops, one for each location, in the order the truck first reaches them.
+
+    :param Truck truck: the truck
+    :param PackageStore package_hash: the Package objects
+    :return: the stops in delivery order
+    :rtype: list[Stop]
+    """
+    # Time complexity O(n)
+    return Stop.group([pkg_id for pkg_id, _ in truck.packages], package_hash)  # O(n)
+
+
+def load_stops(truck, route, matrix, package_hash):
+    """
+    Puts the packages of a route on a truck in order, and records the truck on packages moved to it.
+
+    :param Truck truck: the truck
+    :param list[Stop] route: the stops
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :return:
+    """
+    # Time complexity O(n)
+    truck.packages = list()
+    loc = truck.current_location
+
+    for stop in route:
+        for pkg_id in stop.pkg_ids:
+            truck.packages.append((pkg_id, matrix[loc][stop.location_id]))
+            loc = stop.location_id
+
+    for pkg in package_hash.lookup_many([pkg_id for pkg_id, _ in truck.packages]):  # O(n)
+        if pkg.delivery_truck != truck.id:
+            pkg.delivery_truck = truck.id
+            pkg.en_route_time = truck.time
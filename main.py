@@ -1,121 +1,161 @@
 # Main entry point for the program
-# Also contains logic for the optimized process of loading and delivering packages
 # Name: Steven Kazmierkiewicz
 # Student ID: 001367934
 
+import argparse
+
 import cli
-import delivering
+import compare
 import dijkstras
-import issues
-from models.package import Package
-from models.truck import Truck
-from datetime import time
+import fleet
+import hubs
+import local_search
+import plan
+import scheduling
+import snapshot
+import tracking_service
+import updates
+from data_structures.address_index import AddressIndex
+from data_structures.package_index import PackageIndex
 import csv_parsing.location_csv as location_csv
 import csv_parsing.package_csv as package_csv
 import loading
 
 
-if __name__ == '__main__':
-    truck1 = Truck(1, time(8), loading.HUB_ADDRESS)
-    truck2 = Truck(2, time(8), loading.HUB_ADDRESS)
-
-    location_hash = location_csv.read()  # O(n^3)
-    graph = dijkstras.build_graph(location_hash)  # O(n^3)
-    package_hash, priority_1, priority_2, priority_3, delayed, sibling_sets = package_csv.read()  # O(n^3)
-
-    # Initial Loading
-
-    # -- Load sibling sets
-    loading.load_siblings_dijkstras([truck1, truck2], sibling_sets, [priority_1, priority_2, priority_3], package_hash)  # O(n^3)
-
-    # -- Sort Trucks
-    loading.sort_truck_dijkstras(truck1, graph, package_hash)  # O(n^3)
-    loading.sort_truck_dijkstras(truck2, graph, package_hash)  # O(n^3)
-    # -- Main loading
-    loading.initiate_loading_dijkstras([truck1, truck2], [priority_1, priority_2, priority_3], graph, package_hash)  # O(n^6)
-
-    # -- Deliver first round
-    while not truck1.empty():  # O(n^2)
-        delivering.deliver_dijkstras(truck1, package_hash)   # O(n)
-
-    while not truck2.empty():  # O(n^2)
-        delivering.deliver_dijkstras(truck2, package_hash)  # O(n)
-
-    # Trucks return to hub
-    delivering.return_to_hub([truck1, truck2], loading.HUB_ADDRESS, location_hash)  # O(n^2)
-
-    # Repeat until there are no more package
-    while len(delayed + priority_1 + priority_2 + priority_3) > 0:  # O(n^7)
-
-        # First truck done will load and deliver immediately
-        [first_truck, last_truck] = loading.get_return_order_of_trucks([truck1, truck2])  # O(n^2)
-
-        # Check for fixing wrong address and delayed package issues
-        issues.check_issues(first_truck.time, delayed,
-                            {
-                                Package.PRIORITY_1: priority_1,
-                                Package.PRIORITY_2: priority_2,
-                                Package.PRIORITY_3: priority_3
-                            }, package_hash)  # O(n^2)
-
-        # Load first truck
-        loading.initiate_loading_dijkstras([first_truck], [priority_1, priority_2, priority_3], graph, package_hash)  # O(n^6)
-
-        # Deliver first truck that returned to hub
-        while not first_truck.empty():  # O(n^2)
-            delivering.deliver_dijkstras(first_truck, package_hash)  # O(n)
-
-        # Return to the hub
-        delivering.return_to_hub([first_truck], loading.HUB_ADDRESS, location_hash)  # O(n^2)
-
-        # Second truck done will wait for last delayed package, if any
-        # Need to find the time of last delayed package and set
-        # the second truck's time to this.
-        # There should be no delayed packages after the first iteration.
-        if len(delayed) > 0:
-            last_delayed_pkg = loading.get_last_delayed_package(delayed, package_hash)  # O(n^2)
-            last_truck.time = last_delayed_pkg.delay_time
-
-        # Check for fixing wrong address and delayed package issues
-        issues.check_issues(last_truck.time, delayed,
-                            {
-                                Package.PRIORITY_1: priority_1,
-                                Package.PRIORITY_2: priority_2,
-                                Package.PRIORITY_3: priority_3
-                             },
-                            package_hash)  # O(n^2)
-
-        # If first truck returns before second truck leaves, first truck must wait at least until second truck
-        # leaves before loading again.
-        if first_truck.time < last_truck.time:
-            first_truck.time = last_truck.time
-
-        # Load second truck
-        loading.initiate_loading_dijkstras([last_truck], [priority_1, priority_2, priority_3], graph, package_hash)  # O(n^6)
-
-        # Deliver second truck
-        while not last_truck.empty():  # O(n^2)
-            delivering.deliver_dijkstras(last_truck, package_hash)  # O(n)
-
-        # Return to the hub
-        delivering.return_to_hub([last_truck], loading.HUB_ADDRESS, location_hash)  # O(n^2)
+def parse_args():
+    """
+    Parses the command line arguments.
+
+    :return: the parsed arguments
+    :rtype: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Plan delivery truck routes to ensure on-time delivery of packages.')
+    parser.add_argument('--packages', default=package_csv.PACKAGE_FILE, help='path of the package file')
+    parser.add_argument('--loader', choices=scheduling.LOADERS, default='nearest',
+                        help='the algorithm used to load the trucks')
+    parser.add_argument('--sequencer', choices=scheduling.SEQUENCERS, default='nearest',
+                        help='the algorithm used to order the packages on each truck')
+    parser.add_argument('--anneal', metavar='SECONDS', type=float, default=0.0,
+                        help='keep improving each truck load with simulated annealing for SECONDS before it leaves')
+    parser.add_argument('--hubs', nargs='+', metavar='ADDRESS', default=[loading.HUB_ADDRESS],
+                        help='the addresses of the hubs, each with two trucks')
+    parser.add_argument('--save-plan', metavar='PATH', help='save the final plan to PATH')
+    parser.add_argument('--delta', metavar='PLAN',
+                        help='re-plan only the packages that changed since the plan saved at PLAN')
+    parser.add_argument('--updates', metavar='PATH',
+                        help='follow the file at PATH for package updates, one JSON event per line, while planning')
+    parser.add_argument('--updates-port', metavar='PORT', type=int,
+                        help='listen on PORT for package updates, one JSON event per line, while planning. The port '
+                             'closes once the day is planned, so use --updates-speed to keep it open for the day')
+    parser.add_argument('--updates-speed', metavar='FACTOR', type=float,
+                        help='pace the simulated day at FACTOR simulated seconds per real second, so updates sent '
+                             'during the day take effect at the simulated time they were sent')
+    parser.add_argument('--save-snapshot', metavar='PATH', help='save the simulated day to a snapshot file at PATH')
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help='open the snapshot file at PATH instead of planning the day again')
+    parser.add_argument('--serve', metavar='PORT', type=int,
+                        help='answer tracking queries over HTTP on PORT instead of opening the menu')
+    parser.add_argument('--host', default='127.0.0.1', help='host for the tracking service')
+    parser.add_argument('--compare', nargs='*', metavar='LOADER[/SEQUENCER]',
+                        help='plan the day with each strategy, every loader and sequencer if none are given, and '
+                             'print the runtime, miles and late packages of each instead of opening the menu')
+    parser.add_argument('--fleet', nargs='?', const=fleet.MAX_TRUCKS, type=int, metavar='MAX_TRUCKS',
+                        help='search for the fewest trucks at the first hub, up to MAX_TRUCKS, that deliver every '
+                             'package on time and print the miles of each fleet tried instead of opening the menu')
+    args = parser.parse_args()
+
+    if (args.updates or args.updates_port) and (len(args.hubs) > 1 or args.delta):
+        parser.error('package updates can only be streamed into a new plan of one hub')
+    if args.updates_speed is not None and args.updates_speed <= 0:
+        parser.error('--updates-speed must be positive')
+
+    return args
+
+
+def plan_day(args):
+    """
+    Reads the locations and packages, then plans and simulates the day.
+
+    :param argparse.Namespace args: the parsed command line arguments
+    :return: the trucks, the lists of package ids that were not delivered, the Package objects, their indexes and the
+             addresses of every location
+    :rtype: tuple[list[Truck], list[list[str]], PackageStore, PackageIndex, AddressIndex]
+    """
+    # Time complexity O(n^7)
+    address_index = AddressIndex()
+    location_hash = location_csv.read(address_index)  # O(n^3)
+    graph = dijkstras.build_graph(location_hash)  # O(n^2)
+    matrix = dijkstras.build_distance_matrix(graph, len(address_index))  # O(n^3)
+    edges = dijkstras.build_edge_matrix(location_hash, len(address_index))  # O(n^2)
+    package_hash, pending, delayed, sibling_sets = package_csv.read(address_index, args.packages)  # O(n^3)
+    package_index = PackageIndex(package_hash)  # O(n log n)
+
+    if args.delta:
+        # Only the packages that changed since the previous plan are planned
+        truck_list = plan.replan(plan.load(args.delta), package_csv.read_rows(args.packages), package_hash,
+                                 address_index, matrix)  # O(n)
+        package_lists = [[], []]
+    else:
+        hub_ids = hubs.find_hubs(address_index, args.hubs)
+        feed = None
+
+        if args.updates or args.updates_port:
+            # Updates are read while the day is planned and applied each time issues are checked
+            feed = updates.UpdateFeed(args.updates_speed)
+            feed.start(args.updates, args.host, args.updates_port)  # O(u log u)
+
+        try:
+            truck_list, package_lists = hubs.plan(package_hash, hub_ids, graph, matrix, edges, address_index,
+                                                  [delayed, pending], sibling_sets, args.loader, args.sequencer,
+                                                  args.anneal,
+                                                  local_search.print_progress if args.anneal > 0 else None,
+                                                  feed)  # O(n^7)
+        finally:
+            if feed is not None:
+                feed.stop()
+
+        if feed is not None:
+            print(f'Package updates applied: {feed.applied}, waiting after the last truck returned: {len(feed)}')
+
+    if args.save_plan:
+        plan.save(args.save_plan, truck_list, package_hash, address_index, package_csv.read_rows(args.packages))
 
     # Print length of buckets in package hash
     # for i in range(len(package_hash.table)):
     #     print(str(i) + ': ' + str(len(package_hash.table[i])) + ' packages')
 
-    # Give control of the program to the command line interface for user input
-    cli.control([truck1, truck2], [delayed, priority_1, priority_2, priority_3], package_hash)
-
-
-
-
-
-
-
-
-
-
-
+    return truck_list, package_lists, package_hash, package_index, address_index
 
 
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.compare is not None:
+        # Compare strategies on the same manifest instead of planning the day once
+        compare.print_results(compare.compare(args.packages, args.hubs, compare.strategies(args.compare),
+                                              args.anneal))
+        raise SystemExit
+
+    if args.fleet is not None:
+        # Size the fleet instead of planning the day with two trucks
+        fleet.print_results(*fleet.size_fleet(args.packages, args.hubs[0], args.loader, args.sequencer, args.anneal,
+                                              args.fleet))
+        raise SystemExit
+
+    if args.snapshot:
+        # The day was already simulated, so the snapshot is opened without re-planning
+        truck_list, package_lists, package_hash, address_index = snapshot.load(args.snapshot)  # O(1)
+        package_index = None  # built the first time it is needed
+    else:
+        truck_list, package_lists, package_hash, package_index, address_index = plan_day(args)  # O(n^7)
+
+    if args.save_snapshot:
+        snapshot.save(args.save_snapshot, truck_list, package_lists, package_hash, address_index)  # O(n)
+
+    if args.serve:
+        # Serve tracking queries from the planned schedule, with the addresses of every location including the hubs
+        tracking_service.run(truck_list, package_hash, package_index or PackageIndex(package_hash), address_index,
+                             args.host, args.serve)
+    else:
+        # Give control of the program to the command line interface for user input
+        cli.control(truck_list, package_lists, package_hash, package_index)
@@ -2,10 +2,11 @@ class Location:
     """
     Represents a physical location and the distances to all other possible destinations from this location.
     """
-    def __init__(self, address, zipcode, name):
+    def __init__(self, location_id, address, zipcode, name):
         # Time complexity O(1)
 
-        self.address = address
+        self.id = location_id
+        self.address = address  # kept for display, destinations are keyed by location id
         self.zipcode = zipcode
         self.name = name
         self.destinations = dict()
@@ -25,27 +26,27 @@ class Location:
 
         return s
 
-    def add_destination(self, address, distance):
+    def add_destination(self, location_id, distance):
         """
         Add a possible destination from this location.
 
-        :param string address: the address of the destination
+        :param int location_id: the location id of the destination
         :param float distance: the distance to the destination
         :return:
         """
         # Time complexity O(1)
 
-        self.destinations[address] = float(distance)
+        self.destinations[location_id] = float(distance)
 
-    def get_distance(self, address):
+    def get_distance(self, location_id):
         """
         Gets the distance to a destination.
 
-        :param string address: the address of the destination
+        :param int location_id: the location id of the destination
         :return: the distance to the destination
         :rtype: float
         """
         # Time complexity O(1)
 
-        return self.destinations[address]
+        return self.destinations[location_id]
 
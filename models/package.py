@@ -2,39 +2,124 @@ from datetime import time
 import utils
 
 
+class _Column:
+    """
+    Attribute of a Package view that reads and writes one column of its PackageStore.
+    """
+    def __init__(self, column):
+        # Time complexity O(1)
+        self.column = column
+
+    def __get__(self, pkg, owner=None):
+        # Time complexity O(1)
+        if pkg is None:
+            return self
+        return self.decode(getattr(pkg.store, self.column)[pkg.row])
+
+    def __set__(self, pkg, value):
+        # Time complexity O(1)
+        pkg.store.set_value(pkg.row, self.column, self.encode(value))
+
+    def decode(self, value):
+        # Time complexity O(1)
+        return value
+
+    def encode(self, value):
+        # Time complexity O(1)
+        return value
+
+
+class _TimeColumn(_Column):
+    """
+    Column of times stored as seconds since midnight, negative when there is no time.
+    """
+    def decode(self, value):
+        # Time complexity O(1)
+        return utils.seconds_to_time(value)
+
+    def encode(self, value):
+        # Time complexity O(1)
+        return utils.time_to_seconds(value)
+
+
+class _TruckColumn(_Column):
+    """
+    Column of truck ids stored as integers, 0 when there is no truck.
+    """
+    def decode(self, value):
+        # Time complexity O(1)
+        return value if value else None
+
+    def encode(self, value):
+        # Time complexity O(1)
+        return value if value else 0
+
+
+class _StatusColumn(_Column):
+    """
+    Column of package statuses stored as their index in Package.STATUSES.
+    """
+    def decode(self, value):
+        # Time complexity O(1)
+        return Package.STATUSES[value]
+
+    def encode(self, value):
+        # Time complexity O(1)
+        return Package.STATUS_CODES[value]
+
+
 class Package:
     """
     Represents a package to be delivered.
+
+    A Package is a lightweight view of one row of a PackageStore. It holds no data of its own, so views are cheap to
+    create and any number of them can refer to the same package.
     """
+    __slots__ = ('store', 'row')
+
     # Values for package status
     DELAYED = "Delayed"
     AT_HUB = "At Hub"
     EN_ROUTE = "En Route"
     DELIVERED = "Delivered"
+    CANCELLED = "Cancelled"
+
+    STATUSES = (DELAYED, AT_HUB, EN_ROUTE, DELIVERED, CANCELLED)
+    STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
 
     # Values for package priority based on delivery time
     PRIORITY_1 = time(9)       # 9:00 AM
     PRIORITY_2 = time(10, 30)  # 10:30 AM
     PRIORITY_3 = time(23, 59)  # 11:59 PM or EOD
 
-    def __init__(self, pid, address, deadline, city, state, zipcode, weight, status=AT_HUB, delay_time=None, req_truck=None, siblings=[]):
+    id = _Column('ids')
+    location_id = _Column('location_ids')  # interned id of the address, used for all distance lookups
+    address = _Column('addresses')  # kept for display
+    deadline = _TimeColumn('deadlines')
+    city = _Column('cities')
+    state = _Column('states')
+    zipcode = _Column('zipcodes')
+    weight = _Column('weights')
+    status = _StatusColumn('statuses')
+    req_truck = _TruckColumn('req_trucks')
+    siblings = _Column('siblings')  # siblings are packages that it must be delivered with
+    delay_time = _TimeColumn('delay_times')
+    at_hub_time = _TimeColumn('at_hub_times')
+    en_route_time = _TimeColumn('en_route_times')
+    delivered_time = _TimeColumn('delivered_times')
+    delivery_truck = _TruckColumn('delivery_trucks')
+
+    def __init__(self, store, row):
+        """
+        Creates a view of a package stored in a PackageStore.
+
+        :param PackageStore store: the store holding the package's data
+        :param int row: the row of the package in the store
+        """
         # Time complexity O(1)
 
-        self.id = pid
-        self.address = address
-        self.deadline = deadline
-        self.city = city
-        self.state = state
-        self.zipcode = zipcode
-        self.weight = weight
-        self.status = status
-        self.req_truck = req_truck
-        self.siblings = siblings  # siblings are packages that it must be delivered with
-        self.delay_time = delay_time
-        self.at_hub_time = time(0)
-        self.en_route_time = None
-        self.delivered_time = None
-        self.delivery_truck = None
+        self.store = store
+        self.row = row
 
     def __str__(self):
         """
@@ -50,6 +135,8 @@ class Package:
 
         if self.status == Package.DELAYED:
             s += f' until {self.delay_time.strftime("%I:%M %p")}'
+        elif self.status == Package.CANCELLED:
+            pass
         else:
             s += f' as of '
 
@@ -99,13 +186,7 @@ class Package:
         # Time complexity O(1)
 
         orig_status = self.status
-
-        if self.delay_time and time < self.delay_time:
-            self.status = Package.DELAYED
-        elif time < self.en_route_time:
-            self.status = Package.AT_HUB
-        elif time < self.delivered_time:
-            self.status = Package.EN_ROUTE
+        self.status = self.store.status_at(self.row, utils.time_to_seconds(time))
 
         print(f'*** Snapshot at {utils.time_str(time, utils.TIME_FORMAT)} ***')
         print(self)
@@ -0,0 +1,272 @@
+import copy
+
+from models.stop import Stop
+from models.truck import Truck
+import utils
+
+
+class Route:
+    """
+    Represents the ordered stops of a truck along with the arrival time and forward time slack of each stop.
+
+    Each location is visited by at most one stop. A delivery to a location the route already visits joins that stop, so
+    the truck never returns to a destination it has already left.
+
+    The forward slack of a stop is the most that its arrival time, and every arrival after it, can be pushed back
+    without any of those deliveries missing their deadline. Keeping the slack up to date lets a heuristic check whether
+    a stop can be inserted at a position without simulating the rest of the route.
+
+    Times are kept as seconds since midnight and distances are looked up in a distance matrix indexed by location id.
+    """
+    def __init__(self, start_location, start_time, matrix, speed=Truck.SPEED):
+        """
+        Creates an empty route.
+
+        :param int start_location: the location id the route starts from
+        :param datetime.time start_time: the time the route starts
+        :param list[list[float]] matrix: the distances between locations, indexed by location id
+        :param float speed: the speed of the truck in mph
+        """
+        # Time complexity O(1)
+        self.start_location = start_location
+        self.start_seconds = utils.time_to_seconds(start_time)
+        self.matrix = matrix
+        self.seconds_per_mile = 3600.0 / speed
+
+        self.stops = list()
+        self.locations = list()
+        self.deadlines = list()  # seconds since midnight, the earliest deadline of each stop
+        self.arrivals = list()  # seconds since midnight
+        self.slack = list()  # slack[i] is the minimum of deadline - arrival over stops i and after
+
+    def __len__(self):
+        """
+        Provide the number of stops on the route.
+
+        :return: number of stops
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return len(self.locations)
+
+    def package_ids(self):
+        """
+        Gets the ids of the packages on the route, in the order they are delivered.
+
+        :return: the package ids
+        :rtype: list[str]
+        """
+        # Time complexity O(n)
+        return [pkg_id for stop in self.stops for pkg_id in stop.pkg_ids]
+
+    def position(self, location):
+        """
+        Gets the position of the stop at a location.
+
+        :param int location: the location id
+        :return: the position, None if the route does not visit the location
+        :rtype: int
+        """
+        # Time complexity O(n)
+        return self.locations.index(location) if location in self.locations else None
+
+    def location_before(self, i):
+        """
+        Gets the location the truck is at before reaching position i.
+
+        :param int i: the position
+        :return: the location id
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return self.start_location if i == 0 else self.locations[i - 1]
+
+    def departure_before(self, i):
+        """
+        Gets the time the truck leaves for position i.
+
+        :param int i: the position
+        :return: the seconds since midnight
+        :rtype: float
+        """
+        # Time complexity O(1)
+        return self.start_seconds if i == 0 else self.arrivals[i - 1]
+
+    def added_distance(self, location, i):
+        """
+        Gets the distance added to the route by visiting a location at position i.
+
+        :param int location: the location id to insert
+        :param int i: the position to insert at, from 0 to len(route)
+        :return: the added distance in miles
+        :rtype: float
+        """
+        # Time complexity O(1)
+        prev = self.location_before(i)
+
+        if i == len(self.locations):
+            return self.matrix[prev][location]
+
+        following = self.locations[i]
+        return self.matrix[prev][location] + self.matrix[location][following] - self.matrix[prev][following]
+
+    def can_insert(self, location, deadline, i):
+        """
+        Checks if a new stop can be inserted at position i without it, or any delivery after it, being late.
+
+        :param int location: the location id of the delivery
+        :param datetime.time deadline: the deadline of the delivery
+        :param int i: the position to insert at, from 0 to len(route)
+        :return: True if every delivery would still be on time
+        :rtype: bool
+        """
+        # Time complexity O(1)
+        arrival = self.departure_before(i) + self.matrix[self.location_before(i)][location] * self.seconds_per_mile
+
+        if arrival > utils.time_to_seconds(deadline):
+            return False
+
+        if i == len(self.locations):
+            return True
+
+        return self.added_distance(location, i) * self.seconds_per_mile <= self.slack[i]
+
+    def best_insertion(self, location, deadline, on_time=True):
+        """
+        Finds the feasible position that adds the least distance to the route.
+
+        If the route already visits the location, the delivery can only join that stop, which adds no distance and moves
+        no arrival time.
+
+        :param int location: the location id of the delivery
+        :param datetime.time deadline: the deadline of the delivery
+        :param bool on_time: if False, deadlines are ignored and the position that adds the least distance is found
+        :return: the position and the added distance, None if no position keeps every delivery on time
+        :rtype: tuple[int, float]
+        """
+        # Time complexity O(n)
+        visit = self.position(location)  # O(n)
+        if visit is not None:
+            if on_time and self.arrivals[visit] > utils.time_to_seconds(deadline):
+                return None
+            return visit, 0.0
+
+        best = None
+
+        for i in range(len(self.locations) + 1):  # O(n)
+            if not on_time or self.can_insert(location, deadline, i):
+                added = self.added_distance(location, i)
+                if best is None or added < best[1]:
+                    best = (i, added)
+
+        return best
+
+    def insert(self, stop, i):
+        """
+        Inserts a stop at position i and updates the arrival times and slack.
+
+        If the route already visits the stop's location, the stop's packages join the stop there instead, and i is not
+        used.
+
+        :param Stop stop: the stop, which is copied so the caller may keep changing it
+        :param int i: the position to insert at, from 0 to len(route)
+        :return: the position of the stop that holds the packages
+        :rtype: int
+        """
+        # Time complexity O(n)
+        visit = self.position(stop.location_id)  # O(n)
+
+        if visit is not None:
+            for pkg_id in stop.pkg_ids:
+                self.stops[visit].add(pkg_id, stop.deadline)
+            self.deadlines[visit] = utils.time_to_seconds(self.stops[visit].deadline)
+            self.update(len(self.locations))  # O(n)
+            return visit
+
+        self.stops.insert(i, Stop(stop.location_id, list(stop.pkg_ids), stop.deadline))
+        self.locations.insert(i, stop.location_id)
+        self.deadlines.insert(i, utils.time_to_seconds(stop.deadline))
+        self.arrivals.insert(i, 0.0)
+        self.slack.insert(i, 0.0)
+        self.update(i)
+        return i
+
+    def append(self, stop):
+        """
+        Adds a stop to the end of the route, or its packages to the stop at its location if the route visits it.
+
+        :param Stop stop: the stop
+        :return:
+        """
+        # Time complexity O(n)
+        self.insert(stop, len(self.locations))
+
+    def remove(self, i):
+        """
+        Removes the stop at position i and updates the arrival times and slack.
+
+        :param int i: the position to remove
+        :return: the removed stop
+        :rtype: Stop
+        """
+        # Time complexity O(n)
+        stop = self.stops.pop(i)
+        self.locations.pop(i)
+        self.deadlines.pop(i)
+        self.arrivals.pop(i)
+        self.slack.pop(i)
+        self.update(i)
+        return stop
+
+    def copy(self):
+        """
+        Copies the route, so changes to the copy leave the route as it is.
+
+        :return: the copy
+        :rtype: Route
+        """
+        # Time complexity O(n)
+        route = copy.copy(self)
+        route.stops = [Stop(stop.location_id, list(stop.pkg_ids), stop.deadline) for stop in self.stops]
+        route.locations = list(self.locations)
+        route.deadlines = list(self.deadlines)
+        route.arrivals = list(self.arrivals)
+        route.slack = list(self.slack)
+        return route
+
+    def update(self, i):
+        """
+        Recomputes the arrival times from position i onward and the slack of every stop.
+
+        :param int i: the first position whose arrival time may have changed
+        :return:
+        """
+        # Time complexity O(n)
+        for j in range(i, len(self.locations)):  # O(n)
+            leg = self.matrix[self.location_before(j)][self.locations[j]]
+            self.arrivals[j] = self.departure_before(j) + leg * self.seconds_per_mile
+
+        following = float('inf')
+        for j in range(len(self.locations) - 1, -1, -1):  # O(n)
+            following = min(following, self.deadlines[j] - self.arrivals[j])
+            self.slack[j] = following
+
+    def feasible(self):
+        """
+        Checks if every delivery on the route is on time.
+
+        :return: True if no delivery is late
+        :rtype: bool
+        """
+        # Time complexity O(1)
+        return len(self.slack) == 0 or self.slack[0] >= 0
+
+    def distance(self):
+        """
+        Gets the distance driven from the start of the route to the last stop.
+
+        :return: the distance in miles
+        :rtype: float
+        """
+        # Time complexity O(n)
+        return sum(self.matrix[self.location_before(i)][self.locations[i]] for i in range(len(self.locations)))
@@ -0,0 +1,57 @@
+class Stop:
+    """
+    Represents one destination on a route and the packages delivered there.
+
+    Packages that share an address share a location id, so routing over stops instead of packages visits each
+    destination once and delivers every package there in a single hop. Routes insert whole stops and local search moves
+    whole stops between trucks, so the packages of a stop are never split across visits.
+    """
+    def __init__(self, location_id, pkg_ids=None, deadline=None):
+        # Time complexity O(1)
+        self.location_id = location_id
+        self.pkg_ids = list() if pkg_ids is None else pkg_ids  # in the order they were added
+        self.deadline = deadline  # the earliest deadline of the packages
+
+    def add(self, pkg_id, deadline):
+        """
+        Adds a package to the stop.
+
+        :param str pkg_id: the id of the package
+        :param datetime.time deadline: the deadline of the package
+        :return:
+        """
+        # Time complexity O(1)
+        self.pkg_ids.append(pkg_id)
+
+        if self.deadline is None or deadline < self.deadline:
+            self.deadline = deadline
+
+    @staticmethod
+    def group(pkg_ids, package_hash):
+        """
+        Groups packages by their location id.
+
+        :param list[str] pkg_ids: the ids of the packages
+        :param PackageStore package_hash: the Package objects
+        :return: the stops in the order their first package appears
+        :rtype: list[Stop]
+        """
+        # Time complexity O(n)
+        stops = dict()  # location id -> Stop
+
+        for pkg_id, pkg in zip(pkg_ids, package_hash.lookup_many(pkg_ids)):  # O(n)
+            if pkg.location_id not in stops:
+                stops[pkg.location_id] = Stop(pkg.location_id)
+            stops[pkg.location_id].add(pkg_id, pkg.deadline)
+
+        return list(stops.values())
+
+    def __len__(self):
+        """
+        Provide the number of packages delivered at the stop.
+
+        :return: number of packages
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return len(self.pkg_ids)
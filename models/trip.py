@@ -0,0 +1,19 @@
+class Trip:
+    """
+    Represents one trip of a truck, from leaving the hub to returning to it.
+    """
+    def __init__(self, departure, pkg_ids=None, distance=0.0, return_time=None):
+        # Time complexity O(1)
+        self.departure = departure
+        self.pkg_ids = list() if pkg_ids is None else pkg_ids  # in the order they were delivered
+        self.distance = distance
+        self.return_time = return_time
+
+    def returned(self):
+        """
+        Checks if the truck has returned to the hub from this trip.
+
+        :return: True if the trip is over
+        """
+        # Time complexity O(1)
+        return self.return_time is not None
@@ -1,3 +1,9 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from models.trip import Trip
+
+
 class Truck:
     """
     Represents a delivery truck and keeps track of the packages loaded on to it.
@@ -5,13 +11,91 @@ class Truck:
     SPEED = 18.0 # mph
     MAX_PKGS = 16
 
-    def __init__(self, tid, time, start_address):
+    def __init__(self, tid, time, hub):
         # Time complexity O(1)
         self.id = tid
         self.time = time
         self.distance = 0
         self.packages = list()
-        self.current_address = start_address
+        self.hub = hub  # location id of the hub the truck loads at and returns to
+        self.current_location = hub
+        self.trips = list()  # Trips the truck has made, in order
+
+        # The route the truck has driven, one point per stop reached, sorted by time
+        self.track_times = array('d')  # seconds since midnight
+        self.track_miles = array('d')  # miles driven when the stop was reached
+        self.track_locations = array('l')  # location id of the stop
+
+    def current_trip(self):
+        """
+        Gets the trip the truck is on, starting a new trip if the truck is at the hub.
+
+        :return: the current trip
+        :rtype: Trip
+        """
+        # Time complexity O(1)
+
+        if len(self.trips) == 0 or self.trips[-1].returned():
+            self.trips.append(Trip(self.time))
+
+        return self.trips[-1]
+
+    def record_stops(self, times, miles, locations):
+        """
+        Adds the stops the truck reached to its track. Stops must be added in the order they were reached.
+
+        :param list[float] times: the time each stop was reached, in seconds since midnight
+        :param list[float] miles: the miles driven when each stop was reached
+        :param list[int] locations: the location id of each stop
+        :return:
+        """
+        # Time complexity O(n)
+        self.track_times.extend(times)
+        self.track_miles.extend(miles)
+        self.track_locations.extend(locations)
+
+    def truncate_track(self, seconds):
+        """
+        Drops the stops reached at or after a time from the track, so a re-planned part of a route can be recorded
+        again.
+
+        :param float seconds: the time, in seconds since midnight
+        :return:
+        """
+        # Time complexity O(log n + k) for k stops dropped
+        i = bisect_left(self.track_times, seconds)  # O(log n)
+        del self.track_times[i:]
+        del self.track_miles[i:]
+        del self.track_locations[i:]
+
+    def position_at(self, seconds):
+        """
+        Gets where the truck was at a time and how far it had driven, from its track.
+
+        Between two stops with the same miles driven, the truck was waiting at the first of them. Otherwise it was
+        driving between them, and the miles are interpolated.
+
+        :param float seconds: the time, in seconds since midnight
+        :return: the location id the truck was at or last left, the location id it was driving to, None if it was not
+                 driving, and the miles it had driven
+        :rtype: tuple[int, int, float]
+        """
+        # Time complexity O(log n)
+        if len(self.track_times) == 0:
+            return self.current_location, None, self.distance
+
+        i = bisect_right(self.track_times, seconds) - 1  # O(log n), the last stop reached by the time
+
+        if i < 0:
+            return self.track_locations[0], None, self.track_miles[0]
+
+        if i + 1 == len(self.track_times) or self.track_miles[i + 1] == self.track_miles[i]:
+            return self.track_locations[i], None, self.track_miles[i]
+
+        fraction = (seconds - self.track_times[i]) / (self.track_times[i + 1] - self.track_times[i])
+        miles = self.track_miles[i] + fraction * (self.track_miles[i + 1] - self.track_miles[i])
+
+        return self.track_locations[i], self.track_locations[i + 1], miles
 
     def add_package_dijkstras(self, pkg_id, pkg_dist):
         """
@@ -0,0 +1,342 @@
+# Module for persisting the final delivery plan and re-planning only what changed in a new package file
+import json
+
+from models.package import Package
+from models.route import Route
+from models.stop import Stop
+from models.trip import Trip
+from models.truck import Truck
+import utils
+
+PLAN_VERSION = 1
+
+
+def save(path, truck_list, package_hash, address_index, rows):
+    """
+    Saves the final plan (truck trips, package assignments and times) as JSON.
+
+    The raw package file rows are saved with the plan so the next package file can be compared against them.
+
+    :param str path: the path of the plan file
+    :param list[Truck] truck_list: the trucks
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param dict[str -> list[str]] rows: the raw package file rows keyed by package id
+    :return:
+    """
+    # Time complexity O(n^2)
+    trucks = list()
+    for truck in truck_list:  # O(n)
+        trucks.append({
+            'id': truck.id,
+            'hub': address_index.get_address(truck.hub),
+            'trips': [{
+                'departure': utils.time_to_seconds(trip.departure),
+                'pkg_ids': trip.pkg_ids,
+                'distance': trip.distance,
+                'return_time': utils.time_to_seconds(trip.return_time)
+            } for trip in truck.trips]
+        })
+
+    packages = dict()
+    for pid, row in rows.items():  # O(n^2)
+        pkg = package_hash.lookup(pid)  # O(n)
+        packages[pid] = {
+            'row': row,
+            'address': pkg.address,
+            'status': pkg.status,
+            'at_hub': utils.time_to_seconds(pkg.at_hub_time),
+            'en_route': utils.time_to_seconds(pkg.en_route_time),
+            'delivered': utils.time_to_seconds(pkg.delivered_time),
+            'truck': pkg.delivery_truck
+        }
+
+    with open(path, 'w') as plan_file:
+        json.dump({'version': PLAN_VERSION, 'trucks': trucks, 'packages': packages}, plan_file)
+
+
+def load(path):
+    """
+    Loads a plan saved by save.
+
+    :param str path: the path of the plan file
+    :return: the plan
+    :rtype: dict
+    """
+    # Time complexity O(n)
+    with open(path) as plan_file:
+        previous = json.load(plan_file)
+
+    if previous.get('version') != PLAN_VERSION:
+        raise ValueError(f'Plan file {path} has version {previous.get("version")}, expected {PLAN_VERSION}.')
+
+    return previous
+
+
+def diff(previous_rows, rows):
+    """
+    Compares two versions of the package file.
+
+    :param dict[str -> list[str]] previous_rows: the raw rows of the previous package file keyed by package id
+    :param dict[str -> list[str]] rows: the raw rows of the new package file keyed by package id
+    :return: the ids of the added, removed and modified packages
+    :rtype: tuple[list[str], list[str], list[str]]
+    """
+    # Time complexity O(n)
+    added = [pid for pid in rows if pid not in previous_rows]
+    removed = [pid for pid in previous_rows if pid not in rows]
+    modified = [pid for pid, row in rows.items() if pid in previous_rows and previous_rows[pid] != row]
+
+    return added, removed, modified
+
+
+def replan(previous, rows, package_hash, address_index, matrix):
+    """
+    Re-plans a day from a previous plan, changing only what differs between the previous and new package files.
+
+    Unchanged packages keep their previous truck, trip and times. Removed and modified packages are taken off their
+    trips, then added and modified packages are inserted into the trip where they add the least distance without making
+    a delivery late. If no trip can take a package on time, it is given a new trip on the truck that returns first.
+    Only the trips that changed, and the trips after them on the same truck, are re-timed. Re-timing can push later
+    trips back, so any package that becomes late is reported.
+
+    :param dict previous: the previous plan, as returned by load
+    :param dict[str -> list[str]] rows: the raw rows of the new package file keyed by package id
+    :param PackageStore package_hash: the Package objects read from the new package file
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the trucks with their re-planned trips
+    :rtype: list[Truck]
+    :raises ValueError: if a changed package cannot join the trip of a sibling that is already planned
+    """
+    # Time complexity O(n + m*t) for n packages, m changed packages and t trips
+    previous_packages = previous['packages']
+    added, removed, modified = diff({pid: p['row'] for pid, p in previous_packages.items()}, rows)  # O(n)
+    changed = set(added + modified)
+    dropped = set(removed + modified)
+
+    # Rebuild the trucks and their trips
+    truck_list = list()
+    trip_of = dict()  # package id -> (truck, trip index)
+
+    for t in previous['trucks']:  # O(n)
+        truck = Truck(t['id'], None, address_index.intern(t['hub']))
+
+        for trip_data in t['trips']:  # O(n)
+            trip = Trip(utils.seconds_to_time(trip_data['departure']), list(trip_data['pkg_ids']),
+                        trip_data['distance'], utils.seconds_to_time(trip_data['return_time']))
+            for pid in trip.pkg_ids:
+                trip_of[pid] = (truck, len(truck.trips))
+            truck.trips.append(trip)
+
+        truck_list.append(truck)
+
+    stale = dict()  # truck -> index of its first trip that must be re-timed
+
+    # Take removed and modified packages off their trips
+    for pid in dropped:  # O(m)
+        if pid in trip_of:
+            truck, i = trip_of.pop(pid)
+            truck.trips[i].pkg_ids.remove(pid)
+            stale[truck] = min(stale.get(truck, i), i)
+
+    # Unchanged packages keep their previous state
+    for pid, p in previous_packages.items():  # O(n)
+        if pid in rows and pid not in changed:
+            pkg = package_hash.lookup(pid)
+            pkg.address = p['address']
+            pkg.location_id = address_index.intern(p['address'])
+            pkg.status = p['status']
+            pkg.at_hub_time = utils.seconds_to_time(p['at_hub'])
+            pkg.en_route_time = utils.seconds_to_time(p['en_route'])
+            pkg.delivered_time = utils.seconds_to_time(p['delivered'])
+            pkg.delivery_truck = p['truck']
+
+    # Insert added and modified packages, most urgent first
+    for pid in sorted(changed, key=lambda p_id: package_hash.lookup(p_id).deadline):  # O(m*t)
+        pkg = package_hash.lookup(pid)
+        truck, i = place(pkg, truck_list, trip_of, package_hash, matrix)  # O(t)
+        trip_of[pid] = (truck, i)
+        stale[truck] = min(stale.get(truck, i), i)
+
+    late = list()
+    for truck, i in stale.items():  # O(m)
+        late.extend(retime(truck, i, package_hash, matrix))
+
+    for pkg in package_hash.lookup_many(late):  # O(n)
+        print(f'Package {pkg.id} is late after re-planning: due {utils.time_str(pkg.deadline, utils.TIME_FORMAT)}, '
+              f'delivered {utils.time_str(pkg.delivered_time, utils.TIME_FORMAT)} by Truck {pkg.delivery_truck}')
+
+    for truck in truck_list:  # O(t)
+        truck.distance = sum(trip.distance for trip in truck.trips)
+        truck.time = truck.trips[-1].return_time if len(truck.trips) > 0 else None
+        truck.current_location = truck.hub
+        trace(truck, package_hash, matrix)  # O(n)
+
+    return truck_list
+
+
+def place(pkg, truck_list, trip_of, package_hash, matrix):
+    """
+    Inserts a package into the trip where it adds the least distance without making a delivery late.
+
+    A package with a sibling that is already planned must be placed on the sibling's trip, so the sibling set stays on
+    one truck. Otherwise, if no trip can take the package on time, a new trip is started for it by the allowed truck
+    that returns first.
+
+    :param Package pkg: the package to place
+    :param list[Truck] truck_list: the trucks
+    :param dict[str -> tuple[Truck, int]] trip_of: the truck and trip index of each planned package
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the truck and index of the trip the package was placed on
+    :rtype: tuple[Truck, int]
+    :raises ValueError: if the trip of a planned sibling is full, leaves before the package is ready, or cannot
+                        take the package on time
+    """
+    # Time complexity O(t) for t trips
+    ready = utils.time_to_seconds(pkg.delay_time) if pkg.status == Package.DELAYED else 0.0
+    best = None  # (added distance, truck, trip index, route of the trip, position)
+
+    for sibling in pkg.siblings:
+        if sibling in trip_of:
+            truck, i = trip_of[sibling]
+            trip = truck.trips[i]
+            if len(trip.pkg_ids) < Truck.MAX_PKGS and utils.time_to_seconds(trip.departure) >= ready:
+                route = trip_route(truck, trip, package_hash, matrix)  # O(n^2)
+                position = route.best_insertion(pkg.location_id, pkg.deadline)  # O(n)
+                if position is not None:
+                    best = (position[1], truck, i, route, position[0])
+            if best is None:
+                raise ValueError(f'Package {pkg.id} cannot join the trip of package {sibling} on Truck {truck.id}: '
+                                 'the trip is full, leaves before the package is ready, or cannot take it on time.')
+            break
+
+    if best is None:
+        for truck in truck_list:  # O(t)
+            if pkg.req_truck and pkg.req_truck != truck.id:
+                continue
+
+            for i, trip in enumerate(truck.trips):
+                if len(trip.pkg_ids) >= Truck.MAX_PKGS or utils.time_to_seconds(trip.departure) < ready:
+                    continue
+
+                route = trip_route(truck, trip, package_hash, matrix)  # O(n^2)
+                position = route.best_insertion(pkg.location_id, pkg.deadline)  # O(n)
+                if position is not None and (best is None or position[1] < best[0]):
+                    best = (position[1], truck, i, route, position[0])
+
+    if best is None:
+        allowed = [t for t in truck_list if not pkg.req_truck or pkg.req_truck == t.id]
+        truck = min(allowed, key=lambda t: utils.time_to_seconds(t.trips[-1].return_time) if t.trips else 0.0)
+        last_return = utils.time_to_seconds(truck.trips[-1].return_time) if truck.trips else 0.0
+        truck.trips.append(Trip(utils.seconds_to_time(max(last_return, ready))))
+        best = (0.0, truck, len(truck.trips) - 1, trip_route(truck, truck.trips[-1], package_hash, matrix), 0)
+
+    _, truck, i, route, position = best
+    route.insert(Stop(pkg.location_id, [pkg.id], pkg.deadline), position)  # O(n)
+    truck.trips[i].pkg_ids = route.package_ids()  # O(n)
+    return truck, i
+
+
+def trip_route(truck, trip, package_hash, matrix):
+    """
+    Builds the Route of a trip, starting at the truck's hub when the trip departs. Packages at a location the trip
+    already visits join the stop there.
+
+    :param Truck truck: the truck making the trip
+    :param Trip trip: the trip
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the route of the trip
+    :rtype: Route
+    """
+    # Time complexity O(n^2)
+    route = Route(truck.hub, trip.departure, matrix, truck.SPEED)
+
+    for pid in trip.pkg_ids:  # O(n^2)
+        pkg = package_hash.lookup(pid)  # O(n)
+        route.append(Stop(pkg.location_id, [pid], pkg.deadline))  # O(n)
+
+    return route
+
+
+def retime(truck, first, package_hash, matrix):
+    """
+    Recomputes the times and distances of a truck's trips, from trip number first onward.
+
+    A trip departs at its planned time, or when the truck returns from its previous trip if that is later.
+
+    :param Truck truck: the truck
+    :param int first: the index of the first trip to re-time
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the ids of the packages on the re-timed trips that are delivered after their deadline
+    :rtype: list[str]
+    """
+    # Time complexity O(n^2)
+    seconds_per_mile = 3600.0 / truck.SPEED
+    prev_return = utils.time_to_seconds(truck.trips[first - 1].return_time) if first > 0 else 0.0
+    late = list()
+
+    for trip in truck.trips[first:]:  # O(n^2)
+        departure = max(utils.time_to_seconds(trip.departure), prev_return)
+        now = departure
+        loc = truck.hub
+        distance = 0.0
+
+        for pid in trip.pkg_ids:  # O(n^2)
+            pkg = package_hash.lookup(pid)  # O(n)
+            leg = matrix[loc][pkg.location_id]
+            now += leg * seconds_per_mile
+            distance += leg
+            loc = pkg.location_id
+
+            if pkg.delay_time is not None:
+                pkg.at_hub_time = pkg.delay_time
+            pkg.status = Package.DELIVERED
+            pkg.en_route_time = utils.seconds_to_time(departure)
+            pkg.delivered_time = utils.seconds_to_time(now)
+            pkg.delivery_truck = truck.id
+
+            if now > utils.time_to_seconds(pkg.deadline):
+                late.append(pid)
+
+        leg = matrix[loc][truck.hub]
+        trip.departure = utils.seconds_to_time(departure)
+        trip.distance = distance + leg
+        trip.return_time = utils.seconds_to_time(now + leg * seconds_per_mile)
+        prev_return = utils.time_to_seconds(trip.return_time)
+
+    return late
+
+
+def trace(truck, package_hash, matrix):
+    """
+    Rebuilds the track of a truck from its trips, so its position at any time can be found.
+
+    :param Truck truck: the truck
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return:
+    """
+    # Time complexity O(n)
+    miles = 0.0
+
+    for trip in truck.trips:  # O(n)
+        times = [utils.time_to_seconds(trip.departure)]
+        distances = [miles]
+        locations = [truck.hub]
+
+        for pkg in package_hash.lookup_many(trip.pkg_ids):  # O(n)
+            miles += matrix[locations[-1]][pkg.location_id]
+            times.append(utils.time_to_seconds(pkg.delivered_time))
+            distances.append(miles)
+            locations.append(pkg.location_id)
+
+        miles += matrix[locations[-1]][truck.hub]
+        times.append(utils.time_to_seconds(trip.return_time))
+        distances.append(miles)
+        locations.append(truck.hub)
+
+        truck.record_stops(times, distances, locations)
@@ -0,0 +1,351 @@
+# Module for re-planning truck routes after packages change during the day
+# Only the route of the affected truck is repaired, using local insertion and removal, instead of re-running the
+# whole loading and delivering process. A trip is simulated in full when its truck leaves, so a package on a trip that
+# has left is already marked delivered. Changes made before its delivery time re-plan the part of the trip the truck
+# has not yet driven.
+import delivering
+import issues
+from loading import build_route, follow_route
+from models.package import Package
+from models.stop import Stop
+import utils
+
+
+def find_truck(pkg_id, truck_list):
+    """
+    Finds the truck that a package is loaded on and has not yet been delivered by.
+
+    :param str pkg_id: the id of the package
+    :param list[Truck] truck_list: the trucks
+    :return: the truck and the position of the package on it, (None, -1) if the package is not on a truck
+    :rtype: tuple[Truck, int]
+    """
+    # Time complexity O(n)
+    for truck in truck_list:  # O(n)
+        for i, (loaded_id, _) in enumerate(truck.packages):  # O(1), trucks hold at most MAX_PKGS
+            if loaded_id == pkg_id:
+                return truck, i
+
+    return None, -1
+
+
+def find_trip(pkg, truck_list, curr_time):
+    """
+    Finds the truck whose last trip has not yet delivered a package at a time.
+
+    :param Package pkg: the package
+    :param list[Truck] truck_list: the trucks
+    :param datetime.time curr_time: the time, None to only find packages that are not marked delivered
+    :return: the truck, None if the package is not delivered by a truck after the time
+    :rtype: Truck
+    :raises ValueError: if the package is delivered after the time on a trip the truck has already returned from and
+                        left the hub again
+    """
+    # Time complexity O(t) for t trucks
+    if pkg.status != Package.DELIVERED or curr_time is None or pkg.delivered_time <= curr_time:
+        return None
+
+    for truck in truck_list:  # O(t)
+        if truck.id == pkg.delivery_truck and len(truck.trips) > 0:
+            if pkg.id not in truck.trips[-1].pkg_ids:  # O(1), trips hold at most MAX_PKGS
+                raise ValueError(f'Package {pkg.id} is on an earlier trip of Truck {truck.id}, which has already '
+                                 f'left the hub again.')
+            return truck
+
+    return None
+
+
+def check_open(pkg, truck):
+    """
+    Checks that a package can still be changed.
+
+    :param Package pkg: the package
+    :param Truck truck: the truck still on the way to deliver the package at the time of the change, see find_trip
+    :return:
+    :raises ValueError: if the package was cancelled, or was delivered by the time
+    """
+    # Time complexity O(1)
+    if pkg.status == Package.CANCELLED or (pkg.status == Package.DELIVERED and truck is None):
+        raise ValueError(f'Package {pkg.id} is already {pkg.status.lower()}.')
+
+
+def reopen_trip(truck, curr_time, package_hash, matrix):
+    """
+    Takes the packages a truck has not delivered by a time back off its last trip, so the rest of the trip can be
+    re-planned.
+
+    The truck finishes the leg it is driving at the time, so it is put back at the next stop it reaches, with the
+    miles and time it has when it gets there, or at the hub when the trip leaves if it has not left yet. The deliveries
+    from that stop on are undone, and their packages are put back on the truck in the order they were to be delivered.
+    The truck's track is cut back to the same point.
+
+    :param Truck truck: the truck
+    :param datetime.time curr_time: the time
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the packages already loaded for the truck's next trip and the time it was to leave with them
+    :rtype: tuple[list[tuple[str, float]], datetime.time]
+    """
+    # Time complexity O(n)
+    trip = truck.trips[-1]
+    waiting = (truck.packages, truck.time)
+    pkgs = package_hash.lookup_many(trip.pkg_ids)  # O(n)
+    done = sum(1 for pkg in pkgs if pkg.delivered_time <= curr_time)  # deliveries are in order, the made ones first
+
+    start_loc = truck.hub
+    start_miles = truck.distance - trip.distance
+    for pkg in pkgs[:done]:  # O(n)
+        start_miles += matrix[start_loc][pkg.location_id]
+        start_loc = pkg.location_id
+
+    if curr_time < trip.departure:
+        start_time = trip.departure
+    else:
+        start_time = pkgs[done].delivered_time
+        start_miles += matrix[start_loc][pkgs[done].location_id]
+        start_loc = pkgs[done].location_id
+
+    truck.truncate_track(utils.time_to_seconds(start_time))  # O(log n + k)
+    truck.current_location = start_loc
+    truck.time = start_time
+    trip.distance -= truck.distance - start_miles
+    truck.distance = start_miles
+    trip.return_time = None
+    trip.pkg_ids = trip.pkg_ids[:done]
+    truck.packages = [(pkg.id, 0.0) for pkg in pkgs[done:]]
+
+    for pkg in pkgs[done:]:  # O(n)
+        pkg.status = Package.EN_ROUTE
+        pkg.delivered_time = None
+
+    return waiting
+
+
+def close_trip(truck, waiting, package_hash, edges):
+    """
+    Delivers the packages put back on a truck by reopen_trip, returns the truck to the hub, and puts back the packages
+    loaded for its next trip.
+
+    :param Truck truck: the truck
+    :param tuple[list[tuple[str, float]], datetime.time] waiting: as returned by reopen_trip
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id
+    :return: the ids of the packages that are now delivered late
+    :rtype: list[str]
+    """
+    # Time complexity O(n)
+    pkg_ids = [pkg_id for pkg_id, _ in truck.packages]
+
+    if truck.empty():
+        truck.record_stops([utils.time_to_seconds(truck.time)], [truck.distance], [truck.current_location])
+    delivering.deliver_route(truck, package_hash)  # O(n)
+    delivering.return_to_hub([truck], edges)  # O(1)
+
+    next_packages, departure = waiting
+    truck.packages = next_packages
+    truck.time = max(truck.time, departure)
+
+    return [pkg.id for pkg in package_hash.lookup_many(pkg_ids) if pkg.delivered_time > pkg.deadline]  # O(n)
+
+
+def refresh_legs(truck, package_hash, matrix):
+    """
+    Recomputes the distance of each leg of a truck's remaining route, starting from the truck's current location.
+
+    :param Truck truck: the truck
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return:
+    """
+    # Time complexity O(n)
+    prev_loc = truck.current_location
+    legs = list()
+
+    for (pkg_id, _) in truck.packages:  # O(n)
+        loc = package_hash.lookup(pkg_id).location_id  # O(n)
+        legs.append((pkg_id, matrix[prev_loc][loc]))
+        prev_loc = loc
+
+    truck.packages = legs
+
+
+def insert_on_truck(truck, pkg, package_hash, matrix):
+    """
+    Inserts a package into a truck's remaining route at the position that adds the least distance.
+
+    The package joins the stop at its location if the route already visits it, otherwise it is inserted as a new stop
+    between two stops. Positions that would make a delivery late are avoided. If every position would make a delivery
+    late, the package is inserted at the position that adds the least distance.
+
+    :param Truck truck: the truck
+    :param Package pkg: the package to insert
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return:
+    """
+    # Time complexity O(n^2)
+    route = build_route(truck, package_hash, matrix)  # O(n^2)
+    best = route.best_insertion(pkg.location_id, pkg.deadline)  # O(n)
+
+    if best is None:
+        best = route.best_insertion(pkg.location_id, pkg.deadline, on_time=False)  # O(n)
+
+    route.insert(Stop(pkg.location_id, [pkg.id], pkg.deadline), best[0])  # O(n)
+    follow_route(truck, route)  # O(n)
+
+
+def update_address(pkg_id, new_address, truck_list, package_hash, address_index, matrix, curr_time=None,
+                   edges=None):
+    """
+    Changes the address of a package and repairs the route of the truck it is loaded on, if any.
+
+    The package is removed from the truck's remaining route and re-inserted at the best position for its new address.
+    If the package is on a trip that has left and is not delivered by the time of the change, only the part of the trip
+    the truck has not driven by then is re-planned, see reopen_trip. No other truck is changed.
+
+    :param str pkg_id: the id of the package
+    :param str new_address: the new address of the package
+    :param list[Truck] truck_list: the trucks
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param datetime.time curr_time: the time of the change, None to not change trips that have left
+    :param list[list[float]] edges: the distances listed in the location file, used for the trip back to the hub, the
+                                    matrix if not given
+    :return: the truck that was re-planned, None if the package is not on a truck
+    :rtype: Truck
+    :raises ValueError: if the package was already delivered or cancelled
+    """
+    # Time complexity O(n^2)
+    pkg_id = str(pkg_id)
+    pkg = package_hash.lookup(pkg_id)  # O(n)
+    on_trip = find_trip(pkg, truck_list, curr_time)  # O(t)
+    check_open(pkg, on_trip)
+
+    if on_trip is not None:
+        waiting = reopen_trip(on_trip, curr_time, package_hash, matrix)  # O(n)
+
+    issues.fix_address(pkg_id, new_address, package_hash, address_index)  # O(n)
+
+    truck, i = find_truck(pkg_id, truck_list)  # O(n)
+    if truck is None:
+        return None
+
+    truck.packages.pop(i)
+    insert_on_truck(truck, pkg, package_hash, matrix)  # O(n^2)
+
+    if on_trip is not None:
+        report_late(close_trip(truck, waiting, package_hash, matrix if edges is None else edges), package_hash)  # O(n)
+    return truck
+
+
+def add_package(pkg, truck_list, delayed, pending, package_hash, matrix, curr_time=None):
+    """
+    Plans a package that was added after loading.
+
+    A package that is at the hub is planned against the next departure of each truck that is at its hub, has room,
+    and is allowed to carry it. A truck departs next when it is back at the hub, or when the package was added if that
+    is later. The package is put on the truck and position that add the least distance with every delivery, the new
+    package included, on time, and that truck waits for the package if it would have left before it was added. If no
+    truck can deliver it on time, or it is delayed, it is added to the packages waiting to be loaded or to the delayed
+    packages, to be loaded later.
+
+    :param Package pkg: the new package, already added to the package store
+    :param list[Truck] truck_list: the trucks
+    :param DelayedQueue delayed: the ids of the packages that are delayed
+    :param DeadlineQueue pending: the ids of the packages waiting to be loaded
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param datetime.time curr_time: the time the package was added, None for no earliest departure
+    :return: the truck the package was put on, None if it was added to a package list
+    :rtype: Truck
+    """
+    # Time complexity O(t * n^2) for t trucks
+    if pkg.status == Package.DELAYED:
+        delayed.append(pkg.id)  # O(n)
+        return None
+
+    best = None  # (added distance, truck, route, position, departure)
+
+    for truck in truck_list:  # O(t * n^2)
+        if truck.full() or truck.current_location != truck.hub:
+            continue
+        if pkg.req_truck and pkg.req_truck != truck.id:
+            continue
+
+        departure = truck.time if curr_time is None else max(truck.time, curr_time)
+        route = build_route(truck, package_hash, matrix, departure)  # O(n^2)
+        position = route.best_insertion(pkg.location_id, pkg.deadline)  # O(n)
+        if position is not None and (best is None or position[1] < best[0]):
+            best = (position[1], truck, route, position[0], departure)
+
+    if best is None:
+        pending.append(pkg.id)  # O(n)
+        return None
+
+    _, truck, route, position, departure = best
+    truck.time = departure
+    route.insert(Stop(pkg.location_id, [pkg.id], pkg.deadline), position)  # O(n)
+    follow_route(truck, route)  # O(n)
+    pkg.advance_status(departure, truck.id)
+    return truck
+
+
+def cancel_package(pkg_id, truck_list, package_lists, package_hash, matrix, curr_time=None, edges=None):
+    """
+    Cancels a package, removing it from the truck it is loaded on or from the package list it is waiting in.
+
+    If the package is on a trip that has left and is not delivered by the time it is cancelled, the part of the trip the
+    truck has not driven by then is re-planned without it, see reopen_trip.
+
+    :param str pkg_id: the id of the package
+    :param list[Truck] truck_list: the trucks
+    :param list[list[str]] package_lists: the delayed and pending package ids
+    :param PackageStore package_hash: the Package objects
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param datetime.time curr_time: the time of the cancellation, None to not change trips that have left
+    :param list[list[float]] edges: the distances listed in the location file, used for the trip back to the hub, the
+                                    matrix if not given
+    :return: the truck that was re-planned, None if the package was not on a truck
+    :rtype: Truck
+    :raises ValueError: if the package was already delivered or cancelled
+    """
+    # Time complexity O(n)
+    pkg_id = str(pkg_id)
+    pkg = package_hash.lookup(pkg_id)  # O(n)
+    on_trip = find_trip(pkg, truck_list, curr_time)  # O(t)
+    check_open(pkg, on_trip)
+
+    if on_trip is not None:
+        waiting = reopen_trip(on_trip, curr_time, package_hash, matrix)  # O(n)
+
+    pkg.status = Package.CANCELLED
+
+    for package_list in package_lists:  # O(n)
+        if pkg_id in package_list:
+            package_list.remove(pkg_id)
+
+    truck, i = find_truck(pkg_id, truck_list)  # O(n)
+    if truck is None:
+        return None
+
+    truck.packages.pop(i)
+    refresh_legs(truck, package_hash, matrix)  # O(n)
+
+    if on_trip is not None:
+        report_late(close_trip(truck, waiting, package_hash, matrix if edges is None else edges), package_hash)  # O(n)
+    return truck
+
+
+def report_late(pkg_ids, package_hash):
+    """
+    Prints the packages that are delivered late after a trip was re-planned.
+
+    :param list[str] pkg_ids: the ids of the late packages
+    :param PackageStore package_hash: the Package objects
+    :return:
+    """
+    # Time complexity O(n)
+    for pkg in package_hash.lookup_many(pkg_ids):  # O(n)
+        print(f'Package {pkg.id} is late after re-planning: due {utils.time_str(pkg.deadline, utils.TIME_FORMAT)}, '
+              f'delivered {utils.time_str(pkg.delivered_time, utils.TIME_FORMAT)} by Truck {pkg.delivery_truck}')
@@ -0,0 +1,219 @@
+# Module for scheduling the loading and delivery of packages with the trucks of one hub
+import delivering
+import issues
+import loading
+import local_search
+
+
+LOADERS = dict()  # name -> loader(truck_list, package_lists, graph, matrix, package_hash)
+SEQUENCERS = dict()  # name -> sequencer(truck, graph, matrix, package_hash)
+
+
+def register_loader(name, loader):
+    """
+    Registers a loader so it can be selected by name, e.g. with --loader.
+
+    A loader loads packages from the package lists onto the trucks, removing each loaded package from its list.
+
+    :param str name: the name of the loader
+    :param loader: the function loader(truck_list, package_lists, graph, matrix, package_hash)
+    :return:
+    """
+    # Time complexity O(1)
+    LOADERS[name] = loader
+
+
+def register_sequencer(name, sequencer):
+    """
+    Registers a sequencer so it can be selected by name, e.g. with --sequencer.
+
+    A sequencer orders the packages already loaded on a truck.
+
+    :param str name: the name of the sequencer
+    :param sequencer: the function sequencer(truck, graph, matrix, package_hash)
+    :return:
+    """
+    # Time complexity O(1)
+    SEQUENCERS[name] = sequencer
+
+
+def load_nearest(truck_list, package_lists, graph, matrix, package_hash):
+    """
+    Loads the trucks by nearest neighbor. See loading.initiate_loading_dijkstras.
+    """
+    # Time complexity O(n^6)
+    loading.initiate_loading_dijkstras(truck_list, package_lists, graph, package_hash, matrix)
+
+
+def load_savings(truck_list, package_lists, graph, matrix, package_hash):
+    """
+    Loads the trucks with the Clarke-Wright savings algorithm. See loading.initiate_loading_savings.
+    """
+    # Time complexity O(n^2 log n)
+    loading.initiate_loading_savings(truck_list, package_lists, matrix, package_hash)
+
+
+def load_cluster(truck_list, package_lists, graph, matrix, package_hash):
+    """
+    Loads each truck with one cluster of nearby packages. See loading.initiate_loading_cluster.
+    """
+    # Time complexity O(n + p*t + t*c^3)
+    loading.initiate_loading_cluster(truck_list, package_lists, graph, matrix, package_hash)
+
+
+def sequence_nearest(truck, graph, matrix, package_hash):
+    """
+    Keeps the order of the loader, which already sorts each truck by nearest neighbor.
+    """
+    # Time complexity O(1)
+    pass
+
+
+def sequence_exact(truck, graph, matrix, package_hash):
+    """
+    Orders the truck's stops exactly when it has few enough of them. See loading.sort_truck_exact.
+    """
+    # Time complexity O(2^n * n^2) for n stops, bounded by loading.EXACT_MAX_STOPS
+    loading.sort_truck_exact(truck, matrix, package_hash, graph)
+
+
+register_loader('nearest', load_nearest)
+register_loader('savings', load_savings)
+register_loader('cluster', load_cluster)
+register_sequencer('nearest', sequence_nearest)
+register_sequencer('exact', sequence_exact)
+
+
+def load_trucks(loader, truck_list, package_lists, graph, matrix, package_hash, sequencer='nearest', anneal=0.0,
+                report=None):
+    """
+    Loads the trucks with the selected loader, then orders each truck's packages with the selected sequencer.
+
+    When several trucks are loaded together, stops are moved between them while that shortens their routes. If there
+    is an annealing budget, the routes are then improved with simulated annealing until it runs out. The trucks are
+    sequenced last.
+
+    :param str loader: the name of the loader, one of LOADERS
+    :param list[Truck] truck_list: the trucks to be loaded
+    :param list[PendingQueue] package_lists: the package ids to be loaded
+    :param Graph graph: the Graph structure of the locations
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param PackageStore package_hash: the Package objects
+    :param str sequencer: the name of the sequencer, one of SEQUENCERS
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :param report: called with the progress of the annealing, see local_search.anneal_routes, None for no reports
+    :return:
+    """
+    LOADERS[loader](truck_list, package_lists, graph, matrix, package_hash)
+    local_search.improve_routes(truck_list, matrix, package_hash)  # O(m * t^2 * s^2)
+    local_search.anneal_routes(truck_list, matrix, package_hash, anneal, report)  # O(k * s) for k steps
+
+    for truck in truck_list:
+        SEQUENCERS[sequencer](truck, graph, matrix, package_hash)
+
+
+def schedule(truck_list, package_hash, pending, delayed, sibling_sets, graph, matrix, edges, address_index,
+             loader='nearest', sequencer='nearest', anneal=0.0, report=None, updates=None):
+    """
+    Loads and delivers every package with the trucks, starting from the hub.
+
+    After the first loads, the trucks are taken in the order they return to the hub. Each truck but the last one back
+    loads and leaves right away. The last truck back waits for the last delayed package, and the other trucks wait
+    until it leaves before loading again.
+
+    :param list[Truck] truck_list: the trucks
+    :param PackageStore package_hash: the Package objects
+    :param DeadlineQueue pending: ids of packages waiting to be loaded, ordered by deadline
+    :param DelayedQueue delayed: ids of delayed packages
+    :param list[set[str]] sibling_sets: the sets of package ids that must be loaded together
+    :param graph: the Graph structure of the locations, or the distance matrix in its place
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param str loader: the loader used to load the trucks, one of LOADERS
+    :param str sequencer: the sequencer used to order each truck's packages, one of SEQUENCERS
+    :param float anneal: the seconds spent improving each load with simulated annealing before the trucks leave
+    :param report: called with the progress of the annealing, see local_search.anneal_routes, None for no reports
+    :param UpdateFeed updates: the streamed package updates, applied each time issues are checked, None for none
+    :return:
+    """
+    # Time complexity O(n^7)
+    # Updates that take effect before the trucks leave are applied before the first loads
+    if updates is not None:
+        issues.check_issues(min(truck.time for truck in truck_list), delayed, pending, package_hash, address_index,
+                            updates, [], matrix)  # O(u * n^2)
+
+    # Initial Loading
+
+    # -- Load sibling sets
+    loading.load_siblings_dijkstras(truck_list, sibling_sets, [pending], package_hash)  # O(n^3)
+
+    # -- Sort Trucks
+    for truck in truck_list:
+        loading.sort_truck_dijkstras(truck, graph, package_hash)  # O(n^3)
+    # -- Main loading
+    load_trucks(loader, truck_list, pending.batches(), graph, matrix, package_hash,
+                sequencer, anneal, report)  # O(n^6)
+
+    # -- Deliver first round
+    for truck in truck_list:
+        delivering.deliver_route(truck, package_hash)  # O(n)
+
+    # Trucks return to hub
+    delivering.return_to_hub(truck_list, edges)  # O(t)
+
+    # Repeat until there are no more package, including packages from updates already put on a truck's next trip
+    while len(delayed) + len(pending) > 0 or not all(truck.empty() for truck in truck_list):  # O(n^7)
+
+        # Trucks done first will load and deliver immediately
+        *first_trucks, last_truck = loading.get_return_order_of_trucks(list(truck_list))  # O(t^2)
+
+        for first_truck in first_trucks:
+            # Check for fixing wrong address and delayed package issues
+            issues.check_issues(first_truck.time, delayed, pending, package_hash, address_index, updates, truck_list,
+                                matrix, edges)  # O(n)
+
+            # Nothing is ready to load, so the truck waits for the next delayed package instead of leaving empty
+            if len(pending) == 0 and len(delayed) > 0 and first_truck.empty():
+                first_truck.time = max(first_truck.time, package_hash.lookup(delayed.first()).delay_time)  # O(log n)
+                issues.check_issues(first_truck.time, delayed, pending, package_hash, address_index, updates,
+                                    truck_list, matrix, edges)  # O(n)
+
+            # Load the truck
+            load_trucks(loader, [first_truck], pending.batches(), graph, matrix, package_hash,
+                        sequencer, anneal, report)  # O(n^6)
+
+            # Deliver the truck that returned to hub
+            delivering.deliver_route(first_truck, package_hash)  # O(n)
+
+            # Return to the hub
+            delivering.return_to_hub([first_truck], edges)  # O(1)
+
+        # Last truck done will wait for last delayed package, if any
+        # Need to find the time of last delayed package and set
+        # the last truck's time to this.
+        # There should be no delayed packages after the first iteration.
+        # A truck already carrying packages from updates leaves on time instead of waiting.
+        if len(delayed) > 0 and last_truck.empty():
+            last_delayed_pkg = loading.get_last_delayed_package(delayed, package_hash)  # O(log n)
+            last_truck.time = last_delayed_pkg.delay_time
+
+        # Check for fixing wrong address and delayed package issues
+        issues.check_issues(last_truck.time, delayed, pending, package_hash, address_index, updates, truck_list,
+                            matrix, edges)  # O(n)
+
+        # If a truck returns before the last truck leaves, it must wait at least until the last truck leaves before
+        # loading again, unless it already carries packages from updates.
+        for first_truck in first_trucks:
+            if first_truck.time < last_truck.time and first_truck.empty():
+                first_truck.time = last_truck.time
+
+        # Load last truck
+        load_trucks(loader, [last_truck], pending.batches(), graph, matrix, package_hash,
+                    sequencer, anneal, report)  # O(n^6)
+
+        # Deliver last truck
+        delivering.deliver_route(last_truck, package_hash)  # O(n)
+
+        # Return to the hub
+        delivering.return_to_hub([last_truck], edges)  # O(1)
@@ -0,0 +1,209 @@
+# Module for saving the simulated day to a compact snapshot file and opening it again without re-planning
+# A snapshot is a short header followed by the package columns. The header holds the trucks, their trips and tracks,
+# and where each column is in the file. Numeric columns are written as the raw bytes of their arrays and text columns
+# as JSON, so opening a snapshot only reads the header, and each column is read from the memory-mapped file the first
+# time it is used.
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from data_structures.address_index import AddressIndex
+from data_structures.chaining_hash_table import ChainingHashTable
+from data_structures.package_store import PackageStore
+from models.trip import Trip
+from models.truck import Truck
+import utils
+
+SNAPSHOT_MAGIC = b'WGUPSSNP'
+SNAPSHOT_VERSION = 3  # version 2 adds the track of each truck, version 3 the address of each location
+HEADER = struct.Struct('<8sHI')  # magic, version, length of the JSON header
+
+TEXT_COLUMNS = ('ids', 'addresses', 'cities', 'states', 'zipcodes', 'weights', 'siblings')
+ARRAY_COLUMNS = ('location_ids', 'deadlines', 'statuses', 'req_trucks', 'delivery_trucks', 'delay_times',
+                 'at_hub_times', 'en_route_times', 'delivered_times')
+
+
+class SnapshotStore(PackageStore):
+    """
+    PackageStore read from a snapshot file.
+
+    Columns, and the hash table of package ids, are only read from the file the first time they are used, so packages
+    can be looked up without reading columns that are never shown.
+    """
+    def __init__(self, mm, columns, count, num_buckets):
+        """
+        Creates a store over the columns of a memory-mapped snapshot.
+
+        :param mmap.mmap mm: the memory-mapped snapshot file
+        :param dict[str -> dict] columns: the position and encoding of each column in the file
+        :param int count: the number of packages
+        :param int num_buckets: the number of buckets used to hash package ids to rows
+        """
+        # Time complexity O(1)
+        self.listeners = list()
+        self._mm = mm
+        self._columns = columns
+        self._count = count
+        self._num_buckets = num_buckets
+
+    def __getattr__(self, name):
+        """
+        Reads a column from the snapshot the first time it is used.
+
+        :param str name: the name of the attribute
+        :return: the column
+        """
+        # Time complexity O(n)
+        if name == 'rows':
+            value = ChainingHashTable(self._num_buckets)
+            value.insert_many((pid, row) for row, pid in enumerate(self.ids))  # O(n)
+        elif name.startswith('_') or name not in self._columns:
+            raise AttributeError(name)
+        else:
+            value = read_column(self._mm, self._columns[name])  # O(n)
+
+        setattr(self, name, value)
+        return value
+
+    def __len__(self):
+        """
+        Provide the number of packages in the store, without reading any column.
+
+        :return: number of packages in the store
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return self._count
+
+
+def save(path, truck_list, package_lists, package_hash, address_index):
+    """
+    Saves the trucks, the packages left over, every package column and the address of every location to a snapshot
+    file. The addresses include the hubs, which are not package destinations.
+
+    :param str path: the path of the snapshot file
+    :param list[Truck] truck_list: the trucks
+    :param list[list[str]] package_lists: the lists of package ids that were not delivered
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index of every location's address, including the hubs
+    :return:
+    """
+    # Time complexity O(n)
+    blobs = list()
+    columns = dict()
+    offset = 0
+
+    for name in TEXT_COLUMNS + ARRAY_COLUMNS:  # O(n)
+        values = getattr(package_hash, name)
+        if name in TEXT_COLUMNS:
+            blob = json.dumps(values, default=sorted).encode()  # sibling sets are saved as lists
+            columns[name] = {'offset': offset, 'length': len(blob)}
+        else:
+            blob = values.tobytes()
+            columns[name] = {'offset': offset, 'length': len(blob), 'typecode': values.typecode}
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps({
+        'byteorder': sys.byteorder,
+        'count': len(package_hash),
+        'num_buckets': len(package_hash.rows.table),
+        'package_lists': [list(package_list) for package_list in package_lists],
+        'addresses': address_index.addresses,
+        'trucks': [{
+            'id': truck.id,
+            'time': utils.time_to_seconds(truck.time),
+            'distance': truck.distance,
+            'hub': truck.hub,
+            'current_location': truck.current_location,
+            'trips': [{
+                'departure': utils.time_to_seconds(trip.departure),
+                'pkg_ids': trip.pkg_ids,
+                'distance': trip.distance,
+                'return_time': utils.time_to_seconds(trip.return_time)
+            } for trip in truck.trips],
+            'track': {
+                'times': truck.track_times.tolist(),
+                'miles': truck.track_miles.tolist(),
+                'locations': truck.track_locations.tolist()
+            }
+        } for truck in truck_list],
+        'columns': columns
+    }).encode()
+
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        snapshot_file.write(header)
+        for blob in blobs:
+            snapshot_file.write(blob)
+
+
+def load(path):
+    """
+    Opens a snapshot saved by save.
+
+    Only the header is read. Package columns are read when they are first used.
+
+    :param str path: the path of the snapshot file
+    :return: the trucks, the lists of package ids that were not delivered, the Package objects and the addresses
+    :rtype: tuple[list[Truck], list[list[str]], SnapshotStore, AddressIndex]
+    """
+    # Time complexity O(t + m) for t trips and m locations
+    with open(path, 'rb') as snapshot_file:
+        mm = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_length = HEADER.unpack_from(mm, 0)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f'{path} is not a snapshot file.')
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f'Snapshot file {path} has version {version}, expected {SNAPSHOT_VERSION}.')
+
+    header = json.loads(mm[HEADER.size:HEADER.size + header_length])
+    start = HEADER.size + header_length
+    swap = header['byteorder'] != sys.byteorder
+
+    columns = dict()
+    for name, column in header['columns'].items():
+        columns[name] = dict(column, offset=column['offset'] + start, swap=swap)
+
+    truck_list = list()
+    for t in header['trucks']:  # O(t)
+        truck = Truck(t['id'], utils.seconds_to_time(t['time']), t['hub'])
+        truck.distance = t['distance']
+        truck.current_location = t['current_location']
+        truck.trips = [Trip(utils.seconds_to_time(trip['departure']), trip['pkg_ids'], trip['distance'],
+                            utils.seconds_to_time(trip['return_time'])) for trip in t['trips']]
+        truck.record_stops(t['track']['times'], t['track']['miles'], t['track']['locations'])
+        truck_list.append(truck)
+
+    package_hash = SnapshotStore(mm, columns, header['count'], header['num_buckets'])
+
+    address_index = AddressIndex(header['addresses'])  # O(m), the ids are interned in the order they were saved
+
+    return truck_list, header['package_lists'], package_hash, address_index
+
+
+def read_column(mm, column):
+    """
+    Reads one column from a memory-mapped snapshot.
+
+    :param mmap.mmap mm: the memory-mapped snapshot file
+    :param dict column: the position and encoding of the column in the file
+    :return: the column
+    :rtype: list or array
+    """
+    # Time complexity O(n)
+    blob = mm[column['offset']:column['offset'] + column['length']]
+
+    if 'typecode' not in column:
+        return json.loads(blob)
+
+    values = array(column['typecode'])
+    values.frombytes(blob)
+    if column['swap']:
+        values.byteswap()
+
+    return values
@@ -0,0 +1,300 @@
+# Module for the package tracking query service
+# A local HTTP/JSON service that answers package lookups, time snapshots and truck status from the planned schedule.
+# All responses are computed from indexes built once when the service starts, so the schedule is never changed and any
+# number of requests can be answered concurrently.
+import asyncio
+import json
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import utils
+
+TIME_FORMATS = (utils.TIME_FORMAT, '%I:%M%p', '%H:%M', '%H:%M:%S')
+
+
+class TrackingIndex:
+    """
+    Read-only indexes of the planned schedule used to answer tracking queries.
+    """
+    def __init__(self, truck_list, package_hash, package_index, address_index):
+        """
+        Builds the indexes from the trucks and packages after the day has been planned.
+
+        :param list[Truck] truck_list: the trucks
+        :param PackageStore package_hash: the Package objects
+        :param PackageIndex package_index: the secondary indexes of the Package objects
+        :param AddressIndex address_index: the index of every location's address, including the hubs
+        """
+        # Time complexity O(n)
+        self.package_hash = package_hash
+        self.package_index = package_index
+        self.rows = {pid: row for row, pid in enumerate(package_hash.ids)}  # O(n)
+        self.packages = {pid: package_record(package_hash, row) for pid, row in self.rows.items()}  # O(n)
+        self.trucks = {str(truck.id): truck_record(truck) for truck in truck_list}  # O(n)
+        self.truck_list = truck_list
+        self.addresses = {i: address_index.get_address(i) for i in range(len(address_index))}  # location id -> address
+        self.addresses.update(zip(package_hash.location_ids, package_hash.addresses))  # O(n)
+
+    def package(self, pid, seconds=None):
+        """
+        Gets a package, in its final state or as it was at a time.
+
+        :param str pid: the id of the package
+        :param float seconds: the time of the snapshot in seconds since midnight, None for the final state
+        :return: the package record, None if the package is not found
+        :rtype: dict
+        """
+        # Time complexity O(1)
+        record = self.packages.get(pid)
+
+        if record is None or seconds is None:
+            return record
+
+        return dict(record, status=self.package_hash.status_at(self.rows[pid], seconds))
+
+    def snapshot(self, seconds):
+        """
+        Gets the status of every package at a time.
+
+        :param float seconds: the time of the snapshot in seconds since midnight
+        :return: the status of each package keyed by package id
+        :rtype: dict[str -> str]
+        """
+        # Time complexity O(n)
+        return {pid: self.package_hash.status_at(row, seconds) for pid, row in self.rows.items()}
+
+    def positions(self, seconds):
+        """
+        Gets where every truck was at a time and how many miles it had driven.
+
+        :param float seconds: the time in seconds since midnight
+        :return: the position record of each truck
+        :rtype: list[dict]
+        """
+        # Time complexity O(t log n) for t trucks
+        records = list()
+
+        for truck in self.truck_list:
+            location, next_location, miles = truck.position_at(seconds)  # O(log n)
+            records.append({
+                'id': truck.id,
+                'location': location,
+                'address': self.addresses.get(location),
+                'next_location': next_location,
+                'next_address': self.addresses.get(next_location),
+                'driving': next_location is not None,
+                'miles': miles
+            })
+
+        return records
+
+
+def package_record(package_hash, row):
+    """
+    Builds the JSON record of a package.
+
+    :param PackageStore package_hash: the Package objects
+    :param int row: the row of the package
+    :return: the record
+    :rtype: dict
+    """
+    # Time complexity O(1)
+    pkg = package_hash.lookup(package_hash.ids[row])
+
+    return {
+        'id': pkg.id,
+        'address': pkg.address,
+        'city': pkg.city,
+        'state': pkg.state,
+        'zip': pkg.zipcode,
+        'weight': pkg.weight,
+        'deadline': time_json(pkg.deadline),
+        'status': pkg.status,
+        'truck': pkg.delivery_truck,
+        'delay_time': time_json(pkg.delay_time),
+        'en_route_time': time_json(pkg.en_route_time),
+        'delivered_time': time_json(pkg.delivered_time),
+        'on_time': None if pkg.delivered_time is None else pkg.delivered_time <= pkg.deadline
+    }
+
+
+def truck_record(truck):
+    """
+    Builds the JSON record of a truck.
+
+    :param Truck truck: the truck
+    :return: the record
+    :rtype: dict
+    """
+    # Time complexity O(n)
+    return {
+        'id': truck.id,
+        'finished': time_json(truck.time),
+        'distance': truck.distance,
+        'trips': [{
+            'departure': time_json(trip.departure),
+            'return_time': time_json(trip.return_time),
+            'distance': trip.distance,
+            'packages': list(trip.pkg_ids)
+        } for trip in truck.trips]
+    }
+
+
+def time_json(t):
+    """
+    Formats a time for a JSON response.
+
+    :param datetime.time t: the time, may be None
+    :return: the time formatted as HH:MM:SS, None if there is no time
+    :rtype: str
+    """
+    # Time complexity O(1)
+    return None if t is None else t.strftime('%H:%M:%S')
+
+
+def parse_time(s):
+    """
+    Parses a time given in a query string.
+
+    :param str s: the time, e.g. 10:05 AM or 10:05
+    :return: the seconds since midnight
+    :rtype: float
+    """
+    # Time complexity O(1)
+    for fmt in TIME_FORMATS:
+        try:
+            return utils.time_to_seconds(datetime.strptime(s.strip().upper(), fmt).time())
+        except ValueError:
+            pass
+
+    raise ValueError(f'Invalid time: {s}')
+
+
+def route(index, path, query):
+    """
+    Answers a request.
+
+    Supported requests:
+
+        - /packages, filtered by any of ?zip=, ?status=, ?truck=, ?due_after=<time> and ?due_by=<time>
+        - /packages/<id>, optionally with ?time=<time> for a snapshot
+        - /snapshot?time=<time>
+        - /trucks
+        - /trucks/<id>
+        - /positions?time=<time>
+
+    :param TrackingIndex index: the indexes of the schedule
+    :param str path: the request path
+    :param dict[str -> list[str]] query: the parsed query string
+    :return: the HTTP status code and the response body
+    :rtype: tuple[int, object]
+    """
+    # Time complexity O(n)
+    parts = [unquote(p) for p in path.strip('/').split('/') if p]
+
+    try:
+        seconds = parse_time(query['time'][0]) if 'time' in query else None
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+    if parts == ['packages']:
+        try:
+            pkg_ids = index.package_index.query(
+                zipcode=query['zip'][0] if 'zip' in query else None,
+                status=query['status'][0] if 'status' in query else None,
+                truck=int(query['truck'][0]) if 'truck' in query else None,
+                due_after=utils.seconds_to_time(parse_time(query['due_after'][0])) if 'due_after' in query else None,
+                due_by=utils.seconds_to_time(parse_time(query['due_by'][0])) if 'due_by' in query else None)
+        except (KeyError, ValueError) as e:
+            return 400, {'error': f'Invalid filter: {e}'}
+        return 200, [index.packages[pid] for pid in pkg_ids]
+    elif len(parts) == 2 and parts[0] == 'packages':
+        record = index.package(parts[1], seconds)
+        return (404, {'error': f'Package {parts[1]} not found'}) if record is None else (200, record)
+    elif parts == ['snapshot']:
+        if seconds is None:
+            return 400, {'error': 'A time is required'}
+        return 200, index.snapshot(seconds)
+    elif parts == ['trucks']:
+        return 200, list(index.trucks.values())
+    elif len(parts) == 2 and parts[0] == 'trucks':
+        record = index.trucks.get(parts[1])
+        return (404, {'error': f'Truck {parts[1]} not found'}) if record is None else (200, record)
+    elif parts == ['positions']:
+        if seconds is None:
+            return 400, {'error': 'A time is required'}
+        return 200, index.positions(seconds)
+
+    return 404, {'error': f'Unknown path {path}'}
+
+
+async def handle(index, reader, writer):
+    """
+    Handles one HTTP connection.
+
+    :param TrackingIndex index: the indexes of the schedule
+    :param asyncio.StreamReader reader: the connection's reader
+    :param asyncio.StreamWriter writer: the connection's writer
+    :return:
+    """
+    # Time complexity O(n)
+    try:
+        request_line = (await reader.readline()).decode('latin-1').split()
+
+        # Skip the headers
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+
+        if len(request_line) < 2 or request_line[0] != 'GET':
+            status, body = 405, {'error': 'Only GET requests are supported'}
+        else:
+            url = urlsplit(request_line[1])
+            status, body = route(index, url.path, parse_qs(url.query))
+
+        payload = json.dumps(body).encode()
+        writer.write(f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}\r\n'
+                     f'Content-Type: application/json\r\n'
+                     f'Content-Length: {len(payload)}\r\n'
+                     f'Connection: close\r\n\r\n'.encode() + payload)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(index, host, port):
+    """
+    Serves tracking requests until cancelled.
+
+    :param TrackingIndex index: the indexes of the schedule
+    :param str host: the host to listen on
+    :param int port: the port to listen on
+    :return:
+    """
+    # Time complexity O(n) per request
+    server = await asyncio.start_server(lambda r, w: handle(index, r, w), host, port)
+
+    print(f'WGUPS Package Tracking service listening on http://{host}:{port}')
+
+    async with server:
+        await server.serve_forever()
+
+
+def run(truck_list, package_hash, package_index, address_index, host='127.0.0.1', port=8080):
+    """
+    Builds the indexes of the schedule and runs the tracking service until interrupted.
+
+    :param list[Truck] truck_list: the trucks
+    :param PackageStore package_hash: the Package objects
+    :param PackageIndex package_index: the secondary indexes of the Package objects
+    :param AddressIndex address_index: the index of every location's address, including the hubs
+    :param str host: the host to listen on
+    :param int port: the port to listen on
+    :return:
+    """
+    # Time complexity O(n) per request, after O(n) to build the indexes
+    index = TrackingIndex(truck_list, package_hash, package_index, address_index)
+
+    try:
+        asyncio.run(serve(index, host, port))
+    except KeyboardInterrupt:
+        print('Goodbye.')
@@ -0,0 +1,445 @@
+# Module for streaming package updates into the simulated day
+# Update events are read as JSON lines from a file that is followed as it grows, or from TCP connections, by an asyncio
+# loop on a background thread. The events wait in a feed ordered by the time they take effect, and the scheduler applies
+# the due events each time it checks for issues, so new packages, delays, address changes and cancellations reach the
+# package store and the waiting packages without restarting the plan. The feed is only read while the day is planned.
+# Unless the feed is given a speed, the simulated day takes far less time than the real one, so an event sent to the
+# port during planning only takes effect if it arrives before the last check.
+import asyncio
+import heapq
+import json
+import threading
+import time
+
+import replanning
+import utils
+from models.package import Package
+from tracking_service import parse_time
+
+POLL_SECONDS = 0.25  # how often a followed file is checked for new lines
+EVENT_TYPES = ('new', 'delay', 'address', 'cancel')
+
+
+def parse_event(line):
+    """
+    Parses one update event.
+
+    An event is a JSON object with a type, the id of the package and, optionally, the time the update takes effect.
+    An event without a time takes effect the next time issues are checked.
+
+        - {"type": "new", "id": "41", "address": ..., "city": ..., "state": ..., "zip": ..., "weight": ...,
+          "deadline": "10:30 AM" or "EOD", "truck": 2, "delay": "9:05 AM"}, truck and delay are optional
+        - {"type": "delay", "id": "6", "until": "10:30 AM"}
+        - {"type": "address", "id": "9", "address": "410 S State St"}
+        - {"type": "cancel", "id": "12"}
+
+    :param str line: the event as a line of JSON
+    :return: the event, with the time it takes effect in seconds since midnight as seconds
+    :rtype: dict
+    :raises ValueError: if the event is not valid
+    """
+    # Time complexity O(1)
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError:
+        raise ValueError(f'Invalid update: {line.strip()}')
+
+    if not isinstance(event, dict) or event.get('type') not in EVENT_TYPES:
+        raise ValueError(f'Unknown update: {line.strip()}')
+    if 'id' not in event:
+        raise ValueError(f'Update without a package id: {line.strip()}')
+
+    event['id'] = str(event['id'])
+    event['seconds'] = parse_time(str(event['time'])) if event.get('time') else 0.0
+
+    # Check the times now, so a bad event is refused when it arrives instead of when it is applied
+    for key in ('until', 'delay', 'deadline'):
+        if event.get(key) and event[key] != 'EOD':
+            parse_time(str(event[key]))
+
+    if event['type'] == 'delay' and not event.get('until'):
+        raise ValueError(f'Delay without a time: {line.strip()}')
+    if event['type'] in ('new', 'address') and not event.get('address'):
+        raise ValueError(f'Update without an address: {line.strip()}')
+
+    return event
+
+
+class UpdateFeed:
+    """
+    Update events received while the day is planned, waiting until the time they take effect.
+
+    The events are held in a min-heap keyed by the time they take effect, and the order they arrived breaks ties. The
+    readers run on an asyncio loop in a background thread and push events as they arrive, while the scheduler pops the
+    events that are due, so a lock guards the heap.
+
+    With a speed, the simulated day is paced against the wall clock: before the due events are applied, the scheduler
+    waits until as much real time has passed since the first check as the simulated time, divided by the speed. Events
+    sent during the day then take effect at the simulated time they were sent.
+    """
+
+    def __init__(self, speed=None):
+        """
+        Creates an empty feed. No events are read until the feed is started.
+
+        :param float speed: the simulated seconds that pass per real second, None to simulate as fast as possible
+        """
+        # Time complexity O(1)
+        self.speed = speed
+        self.origin = None  # (monotonic clock, simulated seconds) of the first check, when paced
+        self.events = list()  # (seconds, order, event) min-heap
+        self.received = 0
+        self.applied = 0
+        self.lock = threading.Lock()
+        self.loop = None
+        self.stopping = None
+        self.thread = None
+        self.error = None
+
+    def push(self, line):
+        """
+        Parses an event and adds it to the feed.
+
+        :param str line: the event as a line of JSON
+        :return: the event
+        :rtype: dict
+        :raises ValueError: if the event is not valid
+        """
+        # Time complexity O(log n)
+        event = parse_event(line)
+
+        with self.lock:
+            heapq.heappush(self.events, (event['seconds'], self.received, event))  # O(log n)
+            self.received += 1
+
+        return event
+
+    def due(self, curr_time):
+        """
+        Removes every event that takes effect at or before a time.
+
+        :param datetime.time curr_time: the time
+        :return: the events, earliest first and in the order they arrived for equal times
+        :rtype: list[dict]
+        """
+        # Time complexity O(k log n) for k events
+        seconds = utils.time_to_seconds(curr_time)
+        events = list()
+
+        with self.lock:
+            while len(self.events) > 0 and self.events[0][0] <= seconds:  # O(k log n)
+                events.append(heapq.heappop(self.events)[2])
+
+        return events
+
+    def wait_for(self, curr_time):
+        """
+        Waits until the wall clock reaches a simulated time. Does nothing unless the feed has a speed.
+
+        :param datetime.time curr_time: the simulated time
+        :return:
+        """
+        # Time complexity O(1)
+        if self.speed is None:
+            return
+
+        seconds = utils.time_to_seconds(curr_time)
+        if self.origin is None:
+            self.origin = (time.monotonic(), seconds)
+
+        started, start_seconds = self.origin
+        delay = started + (seconds - start_seconds) / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def apply_due(self, curr_time, truck_list, delayed, pending, package_hash, address_index, matrix, edges=None):
+        """
+        Applies every event that takes effect at or before a time, after waiting for that time if the feed is paced. An
+        event that cannot be applied is reported and skipped.
+
+        :param datetime.time curr_time: the time
+        :param list[Truck] truck_list: the trucks that may be re-planned
+        :param DelayedQueue delayed: the ids of the packages that are delayed
+        :param DeadlineQueue pending: the ids of the packages waiting to be loaded
+        :param PackageStore package_hash: the Package objects
+        :param AddressIndex address_index: the index used to intern addresses to location ids
+        :param list[list[float]] matrix: the distances between locations, indexed by location id
+        :param list[list[float]] edges: the distances listed in the location file, indexed by location id
+        :return:
+        """
+        # Time complexity O(k * t * n^2) for k events and t trucks
+        self.wait_for(curr_time)
+
+        for event in self.due(curr_time):  # O(k * t * n^2)
+            try:
+                apply_event(event, curr_time, truck_list, delayed, pending, package_hash, address_index, matrix,
+                            edges)  # O(t * n^2)
+                self.applied += 1
+            except ValueError as e:
+                print(f'Update skipped: {e}')
+
+    def __len__(self):
+        """
+        Provide the number of events waiting to take effect.
+
+        :return: number of events in the feed
+        :rtype: int
+        """
+        # Time complexity O(1)
+        return len(self.events)
+
+    def start(self, path=None, host='127.0.0.1', port=None):
+        """
+        Starts reading events on a background thread.
+
+        The events already in the file are read before this returns, so they are all in the feed when planning
+        starts. Lines added to the file later, and events sent to the port, are applied the next time issues are
+        checked after they arrive. The port is closed when the feed is stopped, once the day is planned.
+
+        :param str path: the path of a file of events to follow, None for no file
+        :param str host: the host to listen on for events
+        :param int port: the port to listen on for events, None to not listen
+        :return:
+        :raises OSError: if the file cannot be opened or the port cannot be listened on
+        """
+        # Time complexity O(n) for the n events already in the file
+        ready = threading.Event()
+        self.thread = threading.Thread(target=asyncio.run, args=(self.run(path, host, port, ready),), daemon=True)
+        self.thread.start()
+        ready.wait()
+
+        if self.error is not None:
+            self.thread.join()
+            raise self.error
+
+    def stop(self):
+        """
+        Stops reading events and waits for the background thread to finish. Events already in the feed are kept.
+
+        :return:
+        """
+        # Time complexity O(1)
+        if self.thread is None:
+            return
+
+        if self.loop is not None and self.error is None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+        self.thread.join()
+        self.thread = None
+
+    async def run(self, path, host, port, ready):
+        """
+        Reads events from the file and the port until the feed is stopped.
+
+        :param str path: the path of a file of events to follow, None for no file
+        :param str host: the host to listen on for events
+        :param int port: the port to listen on for events, None to not listen
+        :param threading.Event ready: set once the file has been read to its end and the port is listened on
+        :return:
+        """
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        tasks = list()
+
+        try:
+            if path is not None:
+                caught_up = asyncio.Event()
+                tasks.append(asyncio.create_task(follow(self, open(path, encoding='utf-8'), caught_up)))
+                await caught_up.wait()
+
+            if port is not None:
+                server = await asyncio.start_server(lambda r, w: receive(self, r, w), host, port)
+                tasks.append(asyncio.create_task(server.serve_forever()))
+                print(f'Listening for package updates on {host}:{port}')
+        except OSError as e:
+            self.error = e
+        finally:
+            ready.set()
+
+        if self.error is None:
+            await self.stopping.wait()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def follow(feed, file, caught_up, interval=POLL_SECONDS):
+    """
+    Follows a file of events as it grows, one event per line, like tail -f.
+
+    :param UpdateFeed feed: the feed the events are added to
+    :param file: the open file
+    :param asyncio.Event caught_up: set the first time the end of the file is reached
+    :param float interval: the seconds between checks for new lines once the end of the file is reached
+    :return:
+    """
+    partial = ''
+
+    try:
+        while True:
+            line = file.readline()
+
+            # A line that is still being written is kept until its end arrives
+            if not line.endswith('\n'):
+                partial += line
+                caught_up.set()
+                await asyncio.sleep(interval)
+                continue
+
+            line, partial = partial + line, ''
+            if line.strip():
+                try:
+                    feed.push(line)
+                except ValueError as e:
+                    print(f'Update skipped: {e}')
+    finally:
+        file.close()
+        caught_up.set()
+
+
+async def receive(feed, reader, writer):
+    """
+    Reads events from one TCP connection, one event per line, and answers each line with a line of JSON.
+
+    :param UpdateFeed feed: the feed the events are added to
+    :param asyncio.StreamReader reader: the connection's reader
+    :param asyncio.StreamWriter writer: the connection's writer
+    :return:
+    """
+    try:
+        while line := (await reader.readline()).decode('utf-8'):
+            if not line.strip():
+                continue
+
+            try:
+                event = feed.push(line)
+                reply = {'queued': event['id'], 'type': event['type']}
+            except ValueError as e:
+                reply = {'error': str(e)}
+
+            writer.write((json.dumps(reply) + '\n').encode())
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def apply_event(event, curr_time, truck_list, delayed, pending, package_hash, address_index, matrix, edges=None):
+    """
+    Applies one update event through the re-planning functions.
+
+    A new package that is at the hub is planned against the next departure of each truck. If no truck can deliver it
+    on time, it waits to be loaded and a warning is printed.
+
+    A cancellation or address change takes effect at the time of the event. Trips are simulated in full when they
+    leave, so a package on a trip that left is marked delivered, but it can still be changed if it is delivered after
+    the event. The part of that trip the truck has not driven by then is re-planned.
+
+    :param dict event: the event, as returned by parse_event
+    :param datetime.time curr_time: the time the event is applied
+    :param list[Truck] truck_list: the trucks that may be re-planned
+    :param DelayedQueue delayed: the ids of the packages that are delayed
+    :param DeadlineQueue pending: the ids of the packages waiting to be loaded
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :param list[list[float]] edges: the distances listed in the location file, indexed by location id, the matrix if
+                                    not given
+    :return:
+    :raises ValueError: if the event cannot be applied
+    """
+    # Time complexity O(t * n^2) for t trucks
+    pkg_id = event['id']
+    pkg = package_hash.lookup(pkg_id)  # O(n)
+    changed_at = utils.seconds_to_time(event['seconds']) if event.get('time') else curr_time
+
+    if event['type'] == 'new':
+        if pkg is not None:
+            raise ValueError(f'Package {pkg_id} already exists.')
+
+        pkg = add_package(event, package_hash, address_index, matrix)
+        truck = replanning.add_package(pkg, truck_list, delayed, pending, package_hash, matrix,
+                                       curr_time)  # O(t * n^2)
+
+        if truck is None and pkg.status != Package.DELAYED and len(truck_list) > 0:
+            print(f'Update warning: no truck can deliver package {pkg_id} by '
+                  f'{utils.time_str(pkg.deadline, utils.TIME_FORMAT)}, so it waits to be loaded.')
+        return
+
+    if pkg is None:
+        raise ValueError(f'Package {pkg_id} not found.')
+
+    if event['type'] == 'cancel':
+        replanning.cancel_package(pkg_id, truck_list, [delayed, pending], package_hash, matrix, changed_at,
+                                  edges)  # O(n)
+    elif event['type'] == 'address':
+        check_address(event['address'], address_index, matrix)
+        replanning.update_address(pkg_id, event['address'], truck_list, package_hash, address_index, matrix,
+                                  changed_at, edges)  # O(n^2)
+    elif event['type'] == 'delay':
+        if pkg.status in (Package.DELIVERED, Package.CANCELLED):
+            raise ValueError(f'Package {pkg_id} is already {pkg.status.lower()}.')
+        if pkg.status != Package.DELAYED and pkg_id not in pending:
+            raise ValueError(f'Package {pkg_id} is already loaded.')
+
+        pending.discard(pkg_id)
+        delayed.discard(pkg_id)
+        pkg.status = Package.DELAYED
+        pkg.delay_time = event_time(event['until'])
+        delayed.append(pkg_id)  # O(log n)
+
+
+def add_package(event, package_hash, address_index, matrix):
+    """
+    Adds the package of a new package event to the package store.
+
+    :param dict event: the new package event
+    :param PackageStore package_hash: the Package objects
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the new package
+    :rtype: Package
+    :raises ValueError: if the address is not a known location
+    """
+    # Time complexity O(1)
+    location_id = check_address(event['address'], address_index, matrix)
+    deadline = event.get('deadline', 'EOD')
+    delay_time = event_time(event['delay']) if event.get('delay') else None
+
+    return package_hash.add(event['id'], event['address'], Package.PRIORITY_3 if deadline == 'EOD' else
+                            event_time(deadline), event.get('city'), event.get('state'), event.get('zip'),
+                            event.get('weight'), Package.DELAYED if delay_time else Package.AT_HUB, delay_time,
+                            int(event['truck']) if event.get('truck') else None, set(), location_id)
+
+
+def check_address(address, address_index, matrix):
+    """
+    Checks that an address is one of the locations in the distance matrix.
+
+    :param str address: the address
+    :param AddressIndex address_index: the index used to intern addresses to location ids
+    :param list[list[float]] matrix: the distances between locations, indexed by location id
+    :return: the location id of the address
+    :rtype: int
+    :raises ValueError: if the address is not a known location
+    """
+    # Time complexity O(1)
+    location_id = address_index.get_id(address)
+
+    if location_id is None or location_id >= len(matrix):
+        raise ValueError(f'Unknown address: {address}')
+
+    return location_id
+
+
+def event_time(s):
+    """
+    Parses a time given in an event.
+
+    :param str s: the time, e.g. 10:05 AM or 10:05
+    :return: the time
+    :rtype: datetime.time
+    """
+    # Time complexity O(1)
+    return utils.seconds_to_time(parse_time(str(s)))
@@ -71,3 +71,31 @@ def time_diff(t1, t2):
     dt1 = time_to_datetime(t1)
     dt2 = time_to_datetime(t2)
     return dt1 - dt2
+
+
+def time_to_seconds(t):
+    """
+    Converts a time object to the number of seconds since midnight.
+
+    :param datetime.time t: the time object, may be None
+    :return: the seconds since midnight, -1.0 if the time is None
+    :rtype: float
+    """
+    # Time complexity O(1)
+    if t is None:
+        return -1.0
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1000000
+
+
+def seconds_to_time(s):
+    """
+    Converts a number of seconds since midnight to a time object.
+
+    :param float s: the seconds since midnight, negative if there is no time
+    :return: the time object, None if the seconds are negative
+    :rtype: datetime.time
+    """
+    # Time complexity O(1)
+    if s < 0:
+        return None
+    return (datetime.min + timedelta(seconds=s)).time()